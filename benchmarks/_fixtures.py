@@ -0,0 +1,57 @@
+# benchmarks/_fixtures.py
+"""
+基准测试公共工具：准备测试用的基础数据、生成单号、计时统计
+注意：基准脚本会真实写入数据库，请在测试库上运行
+"""
+import statistics
+import time
+import uuid
+from src.database.db_manager import DBManager
+
+BENCH_EMP = "EBM01"
+BENCH_SUPP = "SBM0000001"
+BENCH_CUST = "CBM0000001"
+
+
+def bench_medicine_id(i):
+    """第 i 个基准药品的 ID（CHAR(10)）"""
+    return f"BM{i:08d}"
+
+
+def new_doc_id(prefix):
+    """生成不重复的 10 位单据号"""
+    return prefix + uuid.uuid4().hex[:10 - len(prefix)].upper()
+
+
+def ensure_fixtures(n_medicines):
+    """保证基准所需的员工、供应商、客户以及 n 种药品存在（已存在则跳过）"""
+    db = DBManager()
+    with db.session() as cursor:
+        cursor.execute("INSERT IGNORE INTO employee VALUES (%s, '基准员工', 'M', '13000000000', '测试')", (BENCH_EMP,))
+        cursor.execute("INSERT IGNORE INTO supplier VALUES (%s, '基准供应商', '测试', '13000000000', '测试', '0000000000000000')",
+                       (BENCH_SUPP,))
+        cursor.execute("INSERT IGNORE INTO customer VALUES (%s, '基准客户', '13000000000', '测试')", (BENCH_CUST,))
+        rows = [(bench_medicine_id(i), f"基准药品{i}", "测试", "1盒", "测试厂", "2025-01-01", "2030-01-01", 1.00, None)
+                for i in range(n_medicines)]
+        cursor.executemany("INSERT IGNORE INTO medicine VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)", rows)
+
+
+def make_items(n, quantity=1, price=1.00):
+    return [{"medicine_id": bench_medicine_id(i), "quantity": quantity, "unit_price": price} for i in range(n)]
+
+
+def timed(func, *args, **kwargs):
+    """执行一次并返回耗时（毫秒）"""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def median_ms(samples):
+    return statistics.median(samples) if samples else 0.0
+
+
+def percentile(samples, p):
+    """p 分位数（最近秩法，p 取 0~1）"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
@@ -0,0 +1,62 @@
+# benchmarks/bench_pos_lookup.py
+"""
+收银台选药延迟对比：
+  two_call —— 原路径：InventoryDAO.get_by_id + MedicineDAO.get_by_id，两次往返
+  joined   —— InventoryDAO.pos_lookup，一次联表查询
+  batch    —— InventoryDAO.pos_lookup_batch，整篮 N 个药品一次往返（对比逐个 joined 查询）
+用法: python -m benchmarks.bench_pos_lookup [--medicines 200] [--rounds 500] [--basket 1,10,50]
+"""
+import argparse
+import random
+import statistics
+from src.database.dao import InventoryDAO, MedicineDAO, PurchaseDAO
+from benchmarks._fixtures import (BENCH_EMP, BENCH_SUPP, bench_medicine_id, ensure_fixtures,
+                                  make_items, new_doc_id, percentile, timed)
+
+
+def summarize(samples):
+    return statistics.median(samples), percentile(samples, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="收银台药品查询：两次查询 vs 单次联表 vs 批量")
+    parser.add_argument("--medicines", type=int, default=200, help="基准药品数量")
+    parser.add_argument("--rounds", type=int, default=500, help="单个查询的采样次数")
+    parser.add_argument("--basket", default="1,10,50", help="批量查询的篮子大小，逗号分隔")
+    args = parser.parse_args()
+
+    ensure_fixtures(args.medicines)
+    # 保证基准药品都有库存记录，两条路径查到的数据一致
+    PurchaseDAO().register_purchase(new_doc_id("P"), BENCH_SUPP, BENCH_EMP, "BENCH", "基准测试",
+                                    make_items(args.medicines, quantity=100), bulk=True)
+
+    i_dao, m_dao = InventoryDAO(), MedicineDAO()
+    ids = [bench_medicine_id(i) for i in range(args.medicines)]
+
+    def two_call(m_id):
+        i_dao.get_by_id(m_id)
+        m_dao.get_by_id(m_id)
+
+    i_dao.pos_lookup(ids[0])  # 预热连接池
+    print(f"{'路径':<10} | {'p50(ms)':>8} | {'p95(ms)':>8}")
+    print("-" * 34)
+    for name, func in (("two_call", two_call), ("joined", i_dao.pos_lookup)):
+        samples = [timed(func, random.choice(ids)) for _ in range(args.rounds)]
+        p50, p95 = summarize(samples)
+        print(f"{name:<10} | {p50:>8.3f} | {p95:>8.3f}")
+
+    print(f"\n{'篮子大小':>6} | {'逐个(ms)':>9} | {'批量(ms)':>9} | {'加速比':>6}")
+    print("-" * 42)
+    rounds = max(args.rounds // 10, 5)
+    for n in (int(x) for x in args.basket.split(",")):
+        one_by_one, batched = [], []
+        for _ in range(rounds):
+            basket = random.sample(ids, min(n, len(ids)))
+            one_by_one.append(timed(lambda: [i_dao.pos_lookup(m) for m in basket]))
+            batched.append(timed(i_dao.pos_lookup_batch, basket))
+        a, b = statistics.median(one_by_one), statistics.median(batched)
+        print(f"{n:>8} | {a:>9.3f} | {b:>9.3f} | {a / b if b else 0:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
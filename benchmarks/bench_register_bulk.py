@@ -0,0 +1,50 @@
+# benchmarks/bench_register_bulk.py
+"""
+对比 register_purchase / register_sale / register_return 的逐行模式与批量模式
+用法: python -m benchmarks.bench_register_bulk [--sizes 1,10,100,1000] [--repeat 5]
+"""
+import argparse
+from src.database.dao import PurchaseDAO, SalesDAO
+from benchmarks._fixtures import (BENCH_CUST, BENCH_EMP, BENCH_SUPP, ensure_fixtures,
+                                  make_items, median_ms, new_doc_id, timed)
+
+
+def run_mode(n_lines, repeat, bulk):
+    """按给定模式执行 repeat 轮 进货 -> 销售 -> 退货，返回各环节耗时中位数"""
+    p_dao, s_dao = PurchaseDAO(), SalesDAO()
+    samples = {"purchase": [], "sale": [], "return": []}
+    for _ in range(repeat):
+        items = make_items(n_lines, quantity=2)
+        samples["purchase"].append(timed(p_dao.register_purchase, new_doc_id("P"), BENCH_SUPP, BENCH_EMP,
+                                         "BENCH", "基准测试", items, bulk=bulk))
+
+        sales_id = new_doc_id("S")
+        samples["sale"].append(timed(s_dao.register_sale, sales_id, BENCH_CUST, BENCH_EMP, "基准测试",
+                                     make_items(n_lines), bulk=bulk))
+
+        returns = [{"medicine_id": it["medicine_id"], "return_quantity": 1} for it in items]
+        samples["return"].append(timed(s_dao.register_return, new_doc_id("R"), sales_id, BENCH_EMP, BENCH_CUST,
+                                       float(n_lines), "基准测试", returns, bulk=bulk))
+    return {k: median_ms(v) for k, v in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="逐行 INSERT 与批量 INSERT 写入性能对比")
+    parser.add_argument("--sizes", default="1,10,100,1000", help="每张单据的明细行数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每种规模重复次数（取中位数）")
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",")]
+
+    ensure_fixtures(max(sizes))
+    print(f"{'行数':>6} | {'单据':<8} | {'逐行(ms)':>10} | {'批量(ms)':>10} | {'加速比':>6}")
+    print("-" * 54)
+    for n in sizes:
+        row_mode = run_mode(n, args.repeat, bulk=False)
+        bulk_mode = run_mode(n, args.repeat, bulk=True)
+        for doc in ("purchase", "sale", "return"):
+            a, b = row_mode[doc], bulk_mode[doc]
+            print(f"{n:>6} | {doc:<8} | {a:>10.2f} | {b:>10.2f} | {a / b if b else 0:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
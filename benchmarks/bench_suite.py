@@ -0,0 +1,157 @@
+# benchmarks/bench_suite.py
+"""
+端到端基准套件：在（由 benchmarks.datagen 生成的）大数据量库上逐个调用控制器方法，
+统计 p50 / p95 / p99 延迟与吞吐量（次/秒）
+- 结果可用 --out 保存为 JSON，再用 --baseline 与之前的结果逐项对比（延迟变化百分比）
+- 结账、进货会真实写入数据库，请在测试库上运行
+用法:
+  python -m benchmarks.datagen --scale medium
+  python -m benchmarks.bench_suite --rounds 200 --out before.json
+  python -m benchmarks.bench_suite --rounds 200 --baseline before.json
+"""
+import argparse
+import datetime
+import json
+import random
+import subprocess
+import time
+from src.controllers.sales_ctrl import SalesController
+from src.controllers.purchase_ctrl import PurchaseController
+from src.controllers.inventory_ctrl import InventoryController
+from src.controllers.finance_ctrl import FinanceController
+from src.controllers.base_info_ctrl import BaseInfoController
+from src.database.db_manager import DBManager
+from benchmarks._fixtures import new_doc_id, percentile
+
+WARMUP = 3  # 每个用例正式计时前的预热次数
+
+
+def sample_context(n_medicines=500):
+    """从库中取出用例需要的真实数据：有库存的药品、员工、客户、供应商、数据量"""
+    db = DBManager()
+    with db.session() as cursor:
+        cursor.execute("SELECT medicine_id FROM inventory WHERE stock_quantity >= 100 LIMIT %s", (n_medicines,))
+        medicines = [r["medicine_id"] for r in cursor.fetchall()]
+        cursor.execute("SELECT medicine_id, medicine_name FROM medicine LIMIT %s", (n_medicines,))
+        catalog = cursor.fetchall()
+        context = {"medicines": medicines or [r["medicine_id"] for r in catalog],
+                   "names": [r["medicine_name"] for r in catalog]}
+        for key, sql in (("emp", "SELECT emp_id AS id FROM employee LIMIT 1"),
+                         ("cust", "SELECT cust_id AS id FROM customer LIMIT 1"),
+                         ("supp", "SELECT supp_id AS id FROM supplier LIMIT 1")):
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            context[key] = row["id"] if row else None
+        sizes = {}
+        for table in ("medicine", "customer", "sales_order", "sales_detail", "purchase_order", "sales_return"):
+            cursor.execute(f"SELECT COUNT(*) AS cnt FROM {table}")
+            sizes[table] = cursor.fetchone()["cnt"]
+        context["sizes"] = sizes
+    return context
+
+
+def build_cases(ctx):
+    """用例名 -> 无参调用；调用返回 (success, data)，失败计入错误数"""
+    sales, purchase, inventory = SalesController(), PurchaseController(), InventoryController()
+    finance, base = FinanceController(), BaseInfoController()
+    meds, today = ctx["medicines"], datetime.date.today()
+
+    def basket(n_max, quantity):
+        return [{"medicine_id": m, "quantity": quantity, "unit_price": 1.00}
+                for m in random.sample(meds, min(len(meds), random.randint(1, n_max)))]
+
+    def history_two_pages():
+        ok, page = sales.get_history_page(None, 50)
+        return sales.get_history_page(page["last"], 50) if ok and page["last"] else (ok, page)
+
+    def random_month():
+        d = today - datetime.timedelta(days=random.randint(0, 365))
+        return d.year, d.month
+
+    return {
+        "checkout": lambda: sales.submit_sale(new_doc_id("S"), ctx["cust"], ctx["emp"], "基准套件", basket(5, 1)),
+        "purchase": lambda: purchase.submit_purchase(new_doc_id("P"), ctx["supp"], ctx["emp"], "BENCH", "基准套件",
+                                                     basket(10, 20)),
+        "pos_lookup": lambda: inventory.pos_lookup(random.choice(meds)),
+        "sales_history_page": history_two_pages,
+        "purchase_history_page": lambda: purchase.get_purchase_history_page(None, 50),
+        "monthly_report": lambda: finance.get_monthly_summary(*random_month()),
+        "range_report": lambda: finance.get_range_summary(today - datetime.timedelta(days=90), today),
+        "low_stock_scan": inventory.check_low_stock,
+        "medicine_search": lambda: base.query_medicines(random.choice(ctx["names"] or ["阿"])[:2], limit=50),
+    }
+
+
+def run_case(func, rounds):
+    for _ in range(WARMUP):
+        func()
+    samples, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        t = time.perf_counter()
+        ok, _ = func()
+        samples.append((time.perf_counter() - t) * 1000)
+        errors += 0 if ok else 1
+    elapsed = time.perf_counter() - start
+    return {"rounds": rounds, "errors": errors,
+            "p50": percentile(samples, 0.50), "p95": percentile(samples, 0.95), "p99": percentile(samples, 0.99),
+            "throughput": rounds / elapsed if elapsed else 0.0}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def delta(now, before):
+    """延迟变化百分比（负数表示变快）"""
+    return f"{(now - before) / before * 100:+.0f}%" if before else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="控制器级端到端基准（p50/p95/p99 与吞吐量）")
+    parser.add_argument("--rounds", type=int, default=200, help="每个用例的采样次数")
+    parser.add_argument("--only", help="只运行这些用例，逗号分隔")
+    parser.add_argument("--out", help="把结果保存为 JSON")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子（用例参数可复现）")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ctx = sample_context()
+    if not ctx["medicines"] or not all(ctx[k] for k in ("emp", "cust", "supp")):
+        print("测试库缺少基础数据，请先运行 python -m benchmarks.datagen")
+        return
+    cases = build_cases(ctx)
+    if args.only:
+        cases = {name: cases[name] for name in args.only.split(",")}
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print("数据量: " + ", ".join(f"{t}={n}" for t, n in ctx["sizes"].items()))
+    print(f"{'用例':<22} | {'p50(ms)':>8} | {'p95(ms)':>8} | {'p99(ms)':>8} | {'次/秒':>8} | {'错误':>4} | 对比基线 p50/p95")
+    print("-" * 100)
+    results = {}
+    for name, func in cases.items():
+        res = results[name] = run_case(func, args.rounds)
+        line = (f"{name:<22} | {res['p50']:>8.2f} | {res['p95']:>8.2f} | {res['p99']:>8.2f} | "
+                f"{res['throughput']:>8.1f} | {res['errors']:>4}")
+        if name in baseline:
+            line += f" | {delta(res['p50'], baseline[name]['p50'])} / {delta(res['p95'], baseline[name]['p95'])}"
+        print(line)
+
+    if args.out:
+        report = {"time": datetime.datetime.now().isoformat(timespec="seconds"), "revision": git_revision(),
+                  "rounds": args.rounds, "sizes": ctx["sizes"], "results": results}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_write_engine.py
+"""
+对比 trigger 与 set_based 两种写入引擎，观察每行明细的平均耗时随单据规模的变化
+trigger 引擎每插入一行明细都会重算整单总价（O(N²)），set_based 引擎整单只计算一次，每行成本应基本持平
+用法: python -m benchmarks.bench_write_engine [--sizes 1,10,100,1000] [--repeat 5]
+前提: 已执行新版 sql/create_trigger.sql
+"""
+import argparse
+from src.database.dao import PurchaseDAO, SalesDAO
+from benchmarks._fixtures import (BENCH_CUST, BENCH_EMP, BENCH_SUPP, ensure_fixtures,
+                                  make_items, median_ms, new_doc_id, timed)
+
+
+def run_engine(n_lines, repeat, engine):
+    """按给定引擎执行 repeat 轮 进货 -> 销售 -> 退货（明细均批量发送），返回各环节耗时中位数"""
+    p_dao, s_dao = PurchaseDAO(), SalesDAO()
+    samples = {"purchase": [], "sale": [], "return": []}
+    for _ in range(repeat):
+        items = make_items(n_lines, quantity=2)
+        samples["purchase"].append(timed(p_dao.register_purchase, new_doc_id("P"), BENCH_SUPP, BENCH_EMP,
+                                         "BENCH", "基准测试", items, bulk=True, engine=engine))
+
+        sales_id = new_doc_id("S")
+        samples["sale"].append(timed(s_dao.register_sale, sales_id, BENCH_CUST, BENCH_EMP, "基准测试",
+                                     make_items(n_lines), bulk=True, engine=engine))
+
+        returns = [{"medicine_id": it["medicine_id"], "return_quantity": 1} for it in items]
+        samples["return"].append(timed(s_dao.register_return, new_doc_id("R"), sales_id, BENCH_EMP, BENCH_CUST,
+                                       float(n_lines), "基准测试", returns, bulk=True, engine=engine))
+    return {k: median_ms(v) for k, v in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="trigger 与 set_based 写入引擎的每行成本对比")
+    parser.add_argument("--sizes", default="1,10,100,1000", help="每张单据的明细行数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每种规模重复次数（取中位数）")
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",")]
+
+    ensure_fixtures(max(sizes))
+    print(f"{'行数':>6} | {'单据':<8} | {'trigger 每行(ms)':>16} | {'set_based 每行(ms)':>18} | {'整单加速比':>8}")
+    print("-" * 70)
+    for n in sizes:
+        trig = run_engine(n, args.repeat, "trigger")
+        setb = run_engine(n, args.repeat, "set_based")
+        for doc in ("purchase", "sale", "return"):
+            a, b = trig[doc], setb[doc]
+            print(f"{n:>6} | {doc:<8} | {a / n:>16.3f} | {b / n:>18.3f} | {a / b if b else 0:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
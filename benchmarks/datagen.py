@@ -0,0 +1,250 @@
+# benchmarks/datagen.py
+"""
+大规模模拟数据生成：按指定规模生成一家药店的基础资料与一段时间的进/销/退单据
+- 药品销量、客户到店次数按 Zipf 分布倾斜（少数热销药品、老顾客贡献大部分单据）
+- 每月月初按当月需求补货，保证任何时刻库存都不为负
+- 单据按时间顺序分批写入：主单、明细各一条多行 INSERT，库存按批次一次 upsert
+  写入在 @set_based_write 会话中进行（与 DAO 的 set_based 写入引擎相同），
+  逐行维护库存/总价的触发器跳过，日结/月结/年结与库存日志等触发器照常执行
+- 同一随机种子生成的数据完全相同，便于跨版本对比基准结果
+请在空的测试库上运行（先执行 sql/create_table.sql 与 sql/create_trigger.sql）
+用法: python -m benchmarks.datagen [--scale medium] [--medicines N] [--customers N] [--orders N] [--days 365]
+"""
+import argparse
+import bisect
+import datetime
+import itertools
+import random
+import time
+from decimal import Decimal
+from src.database.dao import BaseDAO, _money
+
+# 预设规模：药品 / 客户 / 员工 / 供应商 / 销售单
+SCALES = {
+    "small": dict(medicines=500, customers=2000, employees=10, suppliers=20, orders=10000),
+    "medium": dict(medicines=5000, customers=20000, employees=30, suppliers=80, orders=200000),
+    "large": dict(medicines=50000, customers=200000, employees=100, suppliers=300, orders=2000000),
+}
+
+DRUG_STEMS = ["阿莫西林", "布洛芬", "对乙酰氨基酚", "头孢克肟", "阿奇霉素", "奥美拉唑", "氯雷他定", "蒙脱石",
+              "板蓝根", "连花清瘟", "复方甘草", "维生素C", "二甲双胍", "硝苯地平", "阿司匹林", "藿香正气",
+              "感冒灵", "六味地黄", "氨溴索", "左氧氟沙星"]
+DRUG_FORMS = [("片", "0.25g*24片"), ("胶囊", "0.5g*12粒"), ("颗粒", "10g*9袋"), ("缓释片", "0.3g*20片"),
+              ("口服液", "10ml*10支"), ("散", "3g*10袋")]
+CATEGORIES = ["抗生素", "解热镇痛", "消化系统", "抗过敏", "中成药", "维生素", "心血管", "呼吸系统"]
+MANUFACTURERS = ["华北制药", "哈药集团", "白云山", "修正药业", "石药集团", "扬子江药业", "同仁堂", "云南白药"]
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华"
+CITIES = ["北京市朝阳区", "上海市浦东新区", "广州市天河区", "成都市武侯区", "武汉市洪山区", "杭州市西湖区"]
+
+
+def medicine_id(i): return f"GM{i:08d}"
+def customer_id(i): return f"GC{i:08d}"
+def supplier_id(i): return f"GV{i:08d}"
+def employee_id(i): return f"GE{i:03d}"
+def sales_id(i): return f"XS{i:08d}"
+def purchase_id(i): return f"XP{i:08d}"
+def return_id(i): return f"XR{i:08d}"
+
+
+def zipf_cum_weights(n, s):
+    """第 k 名的权重 ∝ 1/k^s 的累积权重（random.choices 用）"""
+    return list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def person_name(rnd):
+    return rnd.choice(SURNAMES) + "".join(rnd.choice(GIVEN) for _ in range(rnd.randint(1, 2)))
+
+
+def phone(rnd):
+    return f"1{rnd.choice('3456789')}{rnd.randrange(10 ** 9):09d}"
+
+
+class StoreGenerator:
+    def __init__(self, medicines, customers, employees, suppliers, orders, days, return_rate=0.02,
+                 skew=1.1, batch=1000, seed=42, end_date=None):
+        self.n_medicines, self.n_customers = medicines, customers
+        self.n_employees, self.n_suppliers = employees, suppliers
+        self.n_orders, self.days = orders, days
+        self.return_rate, self.skew, self.batch = return_rate, skew, batch
+        self.rnd = random.Random(seed)
+        self.end = end_date or datetime.date.today()
+        self.start = self.end - datetime.timedelta(days=days)
+        self.dao = BaseDAO()
+        self.prices = {}
+        self.counts = {}
+
+    # ---------- 基础资料 ----------
+
+    def base_rows(self):
+        rnd = self.rnd
+        medicines = []
+        for i in range(self.n_medicines):
+            stem, (form, spec) = DRUG_STEMS[i % len(DRUG_STEMS)], rnd.choice(DRUG_FORMS)
+            produced = self.start - datetime.timedelta(days=rnd.randint(30, 700))
+            price = _money(rnd.uniform(3, 200))
+            self.prices[medicine_id(i)] = price
+            medicines.append((medicine_id(i), f"{stem}{form}{i}", rnd.choice(CATEGORIES), spec,
+                              rnd.choice(MANUFACTURERS), produced, produced + datetime.timedelta(days=rnd.choice([1095, 1460])),
+                              price, None))
+        employees = [(employee_id(i), person_name(rnd), rnd.choice("MF"), phone(rnd), rnd.choice(["收银员", "药剂师", "店长"]))
+                     for i in range(self.n_employees)]
+        customers = [(customer_id(i), person_name(rnd), phone(rnd), rnd.choice(CITIES)) for i in range(self.n_customers)]
+        suppliers = [(supplier_id(i), f"{rnd.choice(MANUFACTURERS)}医药公司{i}", person_name(rnd), phone(rnd),
+                      rnd.choice(CITIES), f"{rnd.randrange(10 ** 16):016d}") for i in range(self.n_suppliers)]
+        return [("medicine", medicines), ("employee", employees), ("customer", customers), ("supplier", suppliers)]
+
+    def load_base(self):
+        with self.dao.db.transaction() as cursor:
+            for table, rows in self.base_rows():
+                if rows:
+                    cursor.executemany(f"INSERT IGNORE INTO {table} VALUES ({', '.join(['%s'] * len(rows[0]))})", rows)
+                self.counts[table] = len(rows)
+
+    # ---------- 单据 ----------
+
+    def iter_months(self):
+        """
+        按时间顺序逐月生成销售单，产出 ((年, 月), [(sales_id, cust_id, emp_id, 时间, [(medicine_id, 数量, 单价)])])
+        逐月生成而不是一次性生成全部单据，大规模时内存只占一个月的数据
+        """
+        rnd = self.rnd
+        med_weights = zipf_cum_weights(self.n_medicines, self.skew)
+        cust_weights = zipf_cum_weights(self.n_customers, 0.8)
+        meds = [medicine_id(i) for i in range(self.n_medicines)]
+        rnd.shuffle(meds)  # 热销药品不集中在编号靠前的位置
+        opening = 14 * 3600  # 营业时间 8:00 ~ 22:00
+        moments = sorted(rnd.randrange(self.days * opening) for _ in range(self.n_orders))
+        origin = datetime.datetime.combine(self.start, datetime.time(8, 0))
+
+        def make_order(i, offset):
+            day, second = divmod(offset, opening)
+            when = origin + datetime.timedelta(days=day, seconds=second)
+            picked = dict.fromkeys(rnd.choices(meds, cum_weights=med_weights, k=rnd.choice([1, 1, 1, 2, 2, 3, 4, 5])))
+            lines = [(m, rnd.choice([1, 1, 1, 2, 3]), self.prices[m]) for m in picked]
+            cust = customer_id(bisect.bisect_left(cust_weights, rnd.random() * cust_weights[-1]))
+            return sales_id(i), cust, employee_id(rnd.randrange(self.n_employees)), when, lines
+
+        orders = (make_order(i, offset) for i, offset in enumerate(moments))
+        for key, month_orders in itertools.groupby(orders, key=lambda o: (o[3].year, o[3].month)):
+            yield key, list(month_orders)
+
+    def load_documents(self):
+        self.dao._resolve_engine("set_based")  # 确认触发器支持 @set_based_write
+        counts = {"purchase": 0, "sales": 0, "return": 0, "detail": 0}
+        for key, month_orders in self.iter_months():
+            demand = {}
+            for order in month_orders:
+                for m, qty, _ in order[4]:
+                    demand[m] = demand.get(m, 0) + qty
+            self._restock(key, demand, counts)
+            for start in range(0, len(month_orders), self.batch):
+                self._write_sales(month_orders[start:start + self.batch], counts)
+        self.counts.update(counts)
+
+    def _restock(self, month, needs, counts):
+        """月初按当月需求（加上随机余量）向供应商进货"""
+        rnd = self.rnd
+        when = max(datetime.datetime(month[0], month[1], 1, 7, 0),
+                   datetime.datetime.combine(self.start, datetime.time(7, 0)))
+        by_supplier = {}
+        for m, qty in needs.items():
+            by_supplier.setdefault(int(m[2:]) % self.n_suppliers, []).append((m, qty + rnd.randint(5, 50)))
+        with self.dao._set_based_write() as cursor:
+            orders, details, deltas = [], [], {}
+            for supp, lines in by_supplier.items():
+                oid = purchase_id(counts["purchase"])
+                counts["purchase"] += 1
+                lines = [(m, qty, _money(self.prices[m] * Decimal("0.7"))) for m, qty in lines]
+                total = sum((price * qty for _, qty, price in lines), Decimal("0.00"))
+                orders.append((oid, supplier_id(supp), employee_id(rnd.randrange(self.n_employees)), when, total,
+                               f"INV{oid}", "模拟进货"))
+                details += [(oid, m, qty, price) for m, qty, price in lines]
+                for m, qty, _ in lines:
+                    deltas[m] = deltas.get(m, 0) + qty
+            cursor.executemany("INSERT INTO purchase_order (order_id, supp_id, emp_id, order_date, total_amount, "
+                               "invoice_number, remark) VALUES (%s, %s, %s, %s, %s, %s, %s)", orders)
+            cursor.executemany("INSERT INTO purchase_detail (order_id, medicine_id, quantity, unit_price) "
+                               "VALUES (%s, %s, %s, %s)", details)
+            self.dao._apply_stock_deltas(cursor, deltas, +1)
+
+    def _write_sales(self, batch, counts):
+        """一批销售单（及其中部分单据的退货）在一个事务内写入"""
+        rnd = self.rnd
+        latest = datetime.datetime.combine(self.end, datetime.time(22, 0))
+        orders, details, sold = [], [], {}
+        returns, return_details, returned = [], [], {}
+        for sid, cust, emp, when, lines in batch:
+            total = sum((price * qty for _, qty, price in lines), Decimal("0.00"))
+            orders.append((sid, cust, emp, when, total, None))
+            for m, qty, price in lines:
+                details.append((sid, m, qty, price))
+                sold[m] = sold.get(m, 0) + qty
+            if rnd.random() < self.return_rate:
+                m, qty, price = rnd.choice(lines)
+                back = rnd.randint(1, qty)
+                rid = return_id(counts["return"])
+                counts["return"] += 1
+                returned_at = min(when + datetime.timedelta(days=rnd.randint(0, 7)), latest)
+                returns.append((rid, sid, emp, cust, returned_at,
+                                _money(price * back), "模拟退货"))
+                return_details.append((rid, m, back))
+                returned[m] = returned.get(m, 0) + back
+        with self.dao._set_based_write() as cursor:
+            cursor.executemany("INSERT INTO sales_order (sales_id, cust_id, emp_id, sales_date, total_amount, remark) "
+                               "VALUES (%s, %s, %s, %s, %s, %s)", orders)
+            cursor.executemany("INSERT INTO sales_detail (sales_id, medicine_id, quantity, unit_price) "
+                               "VALUES (%s, %s, %s, %s)", details)
+            self.dao._apply_stock_deltas(cursor, sold, -1)
+            if returns:
+                cursor.executemany("INSERT INTO sales_return (return_id, sales_id, emp_id, cust_id, return_date, "
+                                   "total_amount, reason) VALUES (%s, %s, %s, %s, %s, %s, %s)", returns)
+                cursor.executemany("INSERT INTO sales_return_detail (return_id, medicine_id, return_quantity) "
+                                   "VALUES (%s, %s, %s)", return_details)
+                self.dao._apply_stock_deltas(cursor, returned, +1)
+        counts["sales"] += len(orders)
+        counts["detail"] += len(details)
+
+    def already_loaded(self):
+        with self.dao.db.session() as cursor:
+            cursor.execute("SELECT 1 FROM sales_order WHERE sales_id = %s", (sales_id(0),))
+            return cursor.fetchone() is not None
+
+    def run(self):
+        start = time.perf_counter()
+        self.load_base()
+        base_done = time.perf_counter()
+        self.load_documents()
+        return base_done - start, time.perf_counter() - base_done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成大规模模拟数据（写入当前配置的数据库）")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="预设规模")
+    for name in ("medicines", "customers", "employees", "suppliers", "orders"):
+        parser.add_argument(f"--{name}", type=int, help=f"覆盖预设规模中的 {name} 数量")
+    parser.add_argument("--days", type=int, default=365, help="单据覆盖的天数（截至今天）")
+    parser.add_argument("--return-rate", type=float, default=0.02, help="发生退货的销售单比例")
+    parser.add_argument("--skew", type=float, default=1.1, help="药品销量的 Zipf 指数，越大越集中")
+    parser.add_argument("--batch", type=int, default=1000, help="每个事务写入的销售单数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    sizes.update({k: getattr(args, k) for k in sizes if getattr(args, k) is not None})
+    gen = StoreGenerator(days=args.days, return_rate=args.return_rate, skew=args.skew,
+                         batch=args.batch, seed=args.seed, **sizes)
+    if gen.already_loaded():
+        print("数据库中已有模拟单据（XS00000000），请在新建的测试库上运行")
+        return
+
+    base_s, doc_s = gen.run()
+    c = gen.counts
+    print(f"基础资料: 药品 {c['medicine']} / 客户 {c['customer']} / 员工 {c['employee']} / 供应商 {c['supplier']}，"
+          f"耗时 {base_s:.1f}s")
+    print(f"单据: 销售单 {c['sales']}（明细 {c['detail']} 行）/ 退货单 {c['return']} / 进货单 {c['purchase']}，"
+          f"耗时 {doc_s:.1f}s，{c['sales'] / doc_s if doc_s else 0:.0f} 单/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# benchmarks/explain_queries.py
+"""
+DAO 查询计划检查：逐个调用 DAO 的只读方法，记录其实际发出的 SELECT 语句，
+再对每条语句执行 EXPLAIN，检查全表扫描（type=ALL）与文件排序（Using filesort）
+- 估算行数超过 --max-rows 的全表扫描 / 文件排序判为 FAIL，进程以退出码 1 结束（可接入 CI）
+- 整表列表、导出、整体汇总等本来就要读全表的方法标记为 allow_scan，只报告不判失败
+- 需要先有数据的测试库（如执行 sql/insert_test_data.sql，或 --seed-medicines 生成基准药品），
+  旧库请先执行 sql/migrate_indexes.sql
+用法: python -m benchmarks.explain_queries [--max-rows 1000] [--seed-medicines 0] [-v]
+"""
+import argparse
+import datetime
+import sys
+from contextlib import contextmanager
+from itertools import islice
+from src.database.db_manager import DBManager
+from src.database.dao import (MedicineDAO, EmployeeDAO, CustomerDAO, SupplierDAO, PurchaseDAO, InventoryDAO,
+                              SalesDAO, FinanceDAO, AnalyticsDAO, ExportDAO, ImportDAO)
+from benchmarks._fixtures import ensure_fixtures
+
+
+class _RecordingCursor:
+    """转发全部调用，只把 execute 的语句与参数记下来"""
+    def __init__(self, cursor, statements):
+        self._cursor = cursor
+        self._statements = statements
+
+    def execute(self, sql, args=None):
+        self._statements.append((sql, args))
+        return self._cursor.execute(sql, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+@contextmanager
+def recording(statements):
+    """在 with 块内让 DBManager.session 交出记录用的游标"""
+    original = DBManager.session
+
+    @contextmanager
+    def session(self, cursor_kind=None):
+        with original(self, cursor_kind) as cursor:
+            yield _RecordingCursor(cursor, statements)
+
+    DBManager.session = session
+    try:
+        yield
+    finally:
+        DBManager.session = original
+
+
+def sample_keys(db):
+    """从库中各取一个真实存在的主键，作为查询参数"""
+    queries = {
+        "medicine": "SELECT medicine_id FROM medicine LIMIT 1",
+        "employee": "SELECT emp_id FROM employee LIMIT 1",
+        "customer": "SELECT cust_id FROM customer LIMIT 1",
+        "supplier": "SELECT supp_id FROM supplier LIMIT 1",
+        "purchase": "SELECT order_id FROM purchase_order LIMIT 1",
+        "sales": "SELECT sales_id FROM sales_order LIMIT 1",
+        "return": "SELECT return_id FROM sales_return LIMIT 1",
+    }
+    keys = {}
+    with db.session() as cursor:
+        for name, sql in queries.items():
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            keys[name] = next(iter(row.values())) if row else "__none__"
+    return keys
+
+
+def build_cases(keys):
+    """(名称, 调用, allow_scan)；调用为无参函数"""
+    today = datetime.date.today()
+    medicine, employee, customer, supplier = MedicineDAO(), EmployeeDAO(), CustomerDAO(), SupplierDAO()
+    purchase, inventory, sales, finance = PurchaseDAO(), InventoryDAO(), SalesDAO(), FinanceDAO()
+    analytics, export, importer = AnalyticsDAO(), ExportDAO(), ImportDAO()
+
+    def second_page(page_func):
+        first = page_func()
+        return page_func(cursor=first["last"]) if first["last"] else first
+
+    cases = [
+        ("MedicineDAO.get_all", medicine.get_all, True),
+        ("MedicineDAO.get_by_id", lambda: medicine.get_by_id(keys["medicine"]), False),
+        ("MedicineDAO.search(keyword)", lambda: medicine.search("阿"), False),
+        ("MedicineDAO.search(category)", lambda: medicine.search(filters=[("category", "=", "西药")]), False),
+        ("MedicineDAO.search(sort=name)", lambda: medicine.search(sort="medicine_name"), False),
+        ("EmployeeDAO.get_all", employee.get_all, True),
+        ("EmployeeDAO.get_by_id", lambda: employee.get_by_id(keys["employee"]), False),
+        ("EmployeeDAO.search(keyword)", lambda: employee.search("张"), False),
+        ("CustomerDAO.get_all", customer.get_all, True),
+        ("CustomerDAO.get_by_id", lambda: customer.get_by_id(keys["customer"]), False),
+        ("CustomerDAO.search(keyword)", lambda: customer.search("138"), False),
+        ("SupplierDAO.get_all", supplier.get_all, True),
+        ("SupplierDAO.get_by_id", lambda: supplier.get_by_id(keys["supplier"]), False),
+        ("SupplierDAO.search(keyword)", lambda: supplier.search("医药"), False),
+        ("PurchaseDAO.get_all_orders", purchase.get_all_orders, True),
+        ("PurchaseDAO.get_orders_page", lambda: second_page(purchase.get_orders_page), False),
+        ("PurchaseDAO.get_order_details", lambda: purchase.get_order_details(keys["purchase"]), False),
+        ("InventoryDAO.get_inventory_report", inventory.get_inventory_report, True),
+        ("InventoryDAO.get_by_id", lambda: inventory.get_by_id(keys["medicine"]), False),
+        ("InventoryDAO.pos_lookup", lambda: inventory.pos_lookup(keys["medicine"]), False),
+        ("InventoryDAO.pos_lookup_batch", lambda: inventory.pos_lookup_batch([keys["medicine"], "__none__"]), False),
+        ("InventoryDAO.get_low_stock", lambda: inventory.get_low_stock(10), False),
+        ("InventoryDAO.get_changed_stock",
+         lambda: inventory.get_changed_stock(0, inventory.get_latest_change_id(), 10), False),
+        ("SalesDAO.get_sales_history", sales.get_sales_history, True),
+        ("SalesDAO.get_sales_history_page", lambda: second_page(sales.get_sales_history_page), False),
+        ("SalesDAO.get_sale_details", lambda: sales.get_sale_details(keys["sales"]), False),
+        ("SalesDAO.get_return_history", sales.get_return_history, True),
+        ("SalesDAO.get_return_history_page", lambda: second_page(sales.get_return_history_page), False),
+        ("SalesDAO.get_return_details", lambda: sales.get_return_details(keys["return"]), False),
+        ("FinanceDAO.get_daily_summaries", finance.get_daily_summaries, True),
+        ("FinanceDAO.get_monthly_report", lambda: finance.get_monthly_report(today.year, today.month), False),
+        ("FinanceDAO.get_quarterly_report", lambda: finance.get_quarterly_report(today.year, 1), False),
+        ("FinanceDAO.get_yearly_report", lambda: finance.get_yearly_report(today.year), False),
+        ("FinanceDAO.get_range_report",
+         lambda: finance.get_range_report(today - datetime.timedelta(days=30), today), False),
+        ("FinanceDAO.get_monthly_trend", lambda: finance.get_monthly_trend(today.year - 1, today.year), False),
+        ("FinanceDAO.get_yearly_trend", lambda: finance.get_yearly_trend(today.year - 5, today.year), False),
+        ("AnalyticsDAO.iter_sales_lines",
+         lambda: list(islice(analytics.iter_sales_lines(today - datetime.timedelta(days=30),
+                                                        today + datetime.timedelta(days=1)), 1)), False),
+        ("ImportDAO.existing_keys",
+         lambda: importer.existing_keys("medicine", "medicine_id", [keys["medicine"]]), False),
+    ]
+    for name in ExportDAO.DATASETS:
+        cases.append((f"ExportDAO.count_rows({name})", lambda n=name: export.count_rows(n), True))
+        cases.append((f"ExportDAO.iter_rows({name})", lambda n=name: list(islice(export.iter_rows(n), 1)), True))
+    return cases
+
+
+def explain(db, sql, args):
+    """返回 EXPLAIN 的每一行（字典）"""
+    with db.session() as cursor:
+        cursor.execute("EXPLAIN " + cursor.mogrify(sql, args))
+        return cursor.fetchall()
+
+
+def problems(plan, max_rows):
+    """计划中超过行数阈值的全表扫描 / 文件排序"""
+    found = []
+    for row in plan:
+        rows = row.get("rows") or 0
+        extra = row.get("Extra") or ""
+        if rows <= max_rows:
+            continue
+        if row.get("type") == "ALL":
+            found.append(f"{row.get('table')}: 全表扫描 ~{rows} 行")
+        if "Using filesort" in extra:
+            found.append(f"{row.get('table')}: 文件排序 ~{rows} 行")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对 DAO 查询执行 EXPLAIN，检查全表扫描与文件排序")
+    parser.add_argument("--max-rows", type=int, default=1000, help="超过该估算行数的全表扫描/文件排序判为失败")
+    parser.add_argument("--seed-medicines", type=int, default=0, help="先写入 N 个基准药品（0 表示不写入）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="打印每条语句的执行计划")
+    args = parser.parse_args()
+
+    db = DBManager()
+    if args.seed_medicines:
+        ensure_fixtures(args.seed_medicines)
+    keys = sample_keys(db)
+
+    failures = 0
+    print(f"{'DAO 方法':<42} | {'语句':>4} | 结果")
+    print("-" * 70)
+    for name, call, allow_scan in build_cases(keys):
+        statements = []
+        with recording(statements):
+            call()
+        selects = [(sql, a) for sql, a in statements if sql.lstrip().upper().startswith("SELECT")]
+        issues = []
+        for sql, a in selects:
+            plan = explain(db, sql, a)
+            issues += problems(plan, args.max_rows)
+            if args.verbose:
+                print(" ".join(sql.split()))
+                for row in plan:
+                    print(f"    {row.get('table')} type={row.get('type')} key={row.get('key')} "
+                          f"rows={row.get('rows')} extra={row.get('Extra')}")
+        if not issues:
+            verdict = "OK"
+        elif allow_scan:
+            verdict = "允许（整表读取）: " + "; ".join(issues)
+        else:
+            verdict = "FAIL: " + "; ".join(issues)
+            failures += 1
+        print(f"{name:<42} | {len(selects):>4} | {verdict}")
+
+    print("-" * 70)
+    print(f"失败 {failures} 项（阈值 {args.max_rows} 行）")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/import_report.py
+"""
+启动导入耗时报告：在全新的子进程中执行 python -X importtime -c "import main"，
+汇总每个模块的自身/累计导入耗时（多次运行取中位数），并做预算检查
+- 导入 main 的累计耗时中位数超过 --budget-ms 判为失败
+- 启动阶段（首个窗口出现之前）不应导入的模块（数据库驱动、DAO、控制器、各功能页面、NumPy）
+  一旦出现在导入记录中即判为失败，与机器快慢无关
+- 任一检查失败时进程以退出码 1 结束（可接入 CI）
+不需要数据库与显示设备。用法:
+    python -m benchmarks.import_report [--runs 5] [--budget-ms 150] [--top 20] [--out report.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 首个窗口出现之前不应导入的模块（前缀匹配）：它们在页面首次构建或首次绘制之后才需要
+FORBIDDEN_AT_STARTUP = ("pymysql", "numpy", "src.database", "src.controllers", "src.ui.modules")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_once(target):
+    """执行一次冷启动导入，返回 [(模块, 自身微秒, 累计微秒, 缩进层级)]"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0", QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {target} 失败:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cum_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cum_us), len(indent) // 2))
+    return rows
+
+
+def category(name):
+    if name == "main" or name.startswith("src.") or name == "src":
+        return "项目"
+    if name.startswith("PyQt6"):
+        return "PyQt6"
+    if name.split(".")[0] in sys.stdlib_module_names or name.startswith("_"):
+        return "标准库"
+    return "第三方"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计启动阶段的模块导入耗时并检查预算")
+    parser.add_argument("--target", default="main", help="要导入的入口模块（默认 main）")
+    parser.add_argument("--runs", type=int, default=5, help="计入统计的运行次数（另有 1 次预热）")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="导入入口模块的累计耗时上限（中位数，毫秒）")
+    parser.add_argument("--top", type=int, default=20, help="列出累计耗时最高的模块数")
+    parser.add_argument("--out", help="把报告写成 JSON 文件")
+    args = parser.parse_args()
+
+    run_once(args.target)  # 预热：生成字节码缓存、让文件系统缓存就绪
+    runs = [run_once(args.target) for _ in range(max(args.runs, 1))]
+
+    self_us, cum_us = {}, {}
+    for rows in runs:
+        for name, s, c, _ in rows:
+            self_us.setdefault(name, []).append(s)
+            cum_us.setdefault(name, []).append(c)
+    modules = {name: {"self_ms": round(statistics.median(self_us[name]) / 1000, 2),
+                      "cumulative_ms": round(statistics.median(cum_us[name]) / 1000, 2),
+                      "category": category(name)} for name in self_us}
+    total_ms = modules.get(args.target, {}).get("cumulative_ms", 0.0)
+
+    by_category = {}
+    for info in modules.values():
+        by_category[info["category"]] = by_category.get(info["category"], 0.0) + info["self_ms"]
+
+    print(f"导入 {args.target}: 累计 {total_ms:.1f} ms（{len(runs)} 次中位数），共 {len(modules)} 个模块")
+    print("按来源的自身耗时: " + "，".join(f"{k} {v:.1f} ms" for k, v in sorted(by_category.items(), key=lambda kv: -kv[1])))
+    print()
+    print(f"{'模块':<44} {'累计(ms)':>9} {'自身(ms)':>9}  来源")
+    print("-" * 72)
+    ranked = sorted(modules.items(), key=lambda kv: -kv[1]["cumulative_ms"])
+    for name, info in ranked[:args.top]:
+        print(f"{name:<44} {info['cumulative_ms']:>9.2f} {info['self_ms']:>9.2f}  {info['category']}")
+    print("-" * 72)
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"导入耗时 {total_ms:.1f} ms 超过预算 {args.budget_ms:g} ms")
+    forbidden = sorted(name for name in modules
+                       if any(name == p or name.startswith(p + ".") for p in FORBIDDEN_AT_STARTUP))
+    if forbidden:
+        failures.append("启动阶段导入了应延迟加载的模块: " + ", ".join(forbidden))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"target": args.target, "runs": len(runs), "total_ms": total_ms, "budget_ms": args.budget_ms,
+                       "by_category_ms": by_category, "modules": modules, "failures": failures},
+                      f, ensure_ascii=False, indent=2)
+        print(f"报告已保存: {args.out}")
+
+    for msg in failures:
+        print("FAIL: " + msg)
+    if not failures:
+        print(f"OK: 导入耗时在预算内（{total_ms:.1f} / {args.budget_ms:g} ms），未发现应延迟加载的模块")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+import time
+_START = time.perf_counter()  # 启动计时起点：在导入任何项目模块之前
+
 import sys
-import traceback
+import threading
 from PyQt6.QtWidgets import QApplication, QMessageBox
+from PyQt6.QtCore import QObject, QTimer
 from src.ui.main_window import MainWindow
+from src.utils.config_loader import get_settings
 from src.utils.logger import logger  
 
+_IMPORTED = time.perf_counter()
+
 def global_exception_handler(exc_type, exc_value, exc_traceback):
     """
     全局异常捕获函数：当程序发生未处理的崩溃时，记录日志并弹窗，防止无声无息的闪退。
@@ -14,11 +21,16 @@ def global_exception_handler(exc_type, exc_value, exc_traceback):
         return
 
     # 将错误堆栈转换为字符串
+    import traceback
     err_msg = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
     
     # 记录到日志文件（CRITICAL 级别）
     logger.critical(f"检测到未捕获的系统崩溃:\n{err_msg}")
 
+    # 后台线程中不能创建窗口（模态框会让线程永远阻塞），只记录日志
+    if threading.current_thread() is not threading.main_thread():
+        return
+
     # 给用户一个友好的弹窗提示
     error_dialog = QMessageBox()
     error_dialog.setIcon(QMessageBox.Icon.Critical)
@@ -31,24 +43,64 @@ def global_exception_handler(exc_type, exc_value, exc_traceback):
     # 确保程序安全退出
     sys.exit(1)
 
+class StartupTimer(QObject):
+    """
+    启动耗时测量（--measure-startup）：记录导入、窗口构造、首次绘制与全部页面预建完成的时间点，
+    打印报告后退出程序。各时间点均从 main.py 开始执行算起
+    """
+    def __init__(self, app, window, constructed):
+        super().__init__(app)   # 挂在 app 上，生命周期与程序一致
+        self.app = app
+        self.marks = {"导入模块": _IMPORTED, "构造主窗口": constructed}
+        window.first_painted.connect(lambda: self.mark("首次绘制（窗口可见）"))
+        window.pages_ready.connect(self.finish)
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter()
+
+    def finish(self):
+        self.mark("全部页面就绪")
+        elapsed = {name: round((t - _START) * 1000, 1) for name, t in self.marks.items()}
+        print("启动耗时（自进程执行 main.py 起）:")
+        for name, ms in elapsed.items():
+            print(f"  {name}: {ms} ms")
+        logger.info("启动耗时 | %s", " | ".join(f"{name}: {ms}ms" for name, ms in elapsed.items()))
+        QTimer.singleShot(0, self.app.quit)
+
+
+MEASURE_STARTUP_FLAG = "--measure-startup"  # 测量启动耗时（首次绘制、全部页面就绪），打印后退出
+
+def parse_args(argv):
+    """取出本程序的命令行开关，其余参数原样交给 QApplication（不用 argparse，免去其导入开销）"""
+    measure = MEASURE_STARTUP_FLAG in argv
+    return measure, [arg for arg in argv if arg != MEASURE_STARTUP_FLAG]
+
 def main():
     # 1. 设置系统全局异常钩子
     sys.excepthook = global_exception_handler
+    measure_startup, qt_argv = parse_args(sys.argv)
 
     logger.info("==========================================")
-    logger.info("医药销售管理系统 v1.0 正在启动...")
+    app_info = get_settings().app
+    logger.info("%s v%s 正在启动...", app_info.name, app_info.version)
     
     try:
-        app = QApplication(sys.argv)
+        app = QApplication(qt_argv)
         
         app.setStyle("Fusion") 
         logger.debug("已设置 UI 样式为 Fusion")
 
         window = MainWindow()
+        if measure_startup:
+            StartupTimer(app, window, time.perf_counter())
         window.show()
         logger.info("主窗口显示成功，进入事件循环。")
         
         exit_code = app.exec()
+
+        # 等待后台数据库任务结束再退出
+        from src.ui.task_runner import TaskRunner
+        TaskRunner.instance().shutdown()
         
         logger.info(f"程序正常关闭，退出代码: {exit_code}")
         sys.exit(exit_code)
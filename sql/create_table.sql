@@ -16,12 +16,15 @@ SET FOREIGN_KEY_CHECKS = 0;
 -- 1. 基础信息管理
 -- -------------------------
 
+DROP TABLE IF EXISTS sales_yearly_summary;
+DROP TABLE IF EXISTS sales_monthly_summary;
 DROP TABLE IF EXISTS sales_daily_summary;
 DROP TABLE IF EXISTS sales_return_detail;
 DROP TABLE IF EXISTS sales_return;
 DROP TABLE IF EXISTS sales_detail;
 DROP TABLE IF EXISTS sales_order;
 
+DROP TABLE IF EXISTS inventory_change_log;
 DROP TABLE IF EXISTS inventory;
 
 DROP TABLE IF EXISTS purchase_detail;
@@ -44,6 +47,9 @@ CREATE TABLE medicine (
   retail_price    DECIMAL(10,2) NOT NULL COMMENT '零售单价',
   description     VARCHAR(200) DEFAULT NULL COMMENT '药品说明',
   PRIMARY KEY (medicine_id),
+  KEY idx_medicine_name (medicine_name),
+  KEY idx_medicine_category (category),
+  KEY idx_medicine_manufacturer (manufacturer),
   CHECK (retail_price >= 0),
   CHECK (expiry_date >= production_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -56,6 +62,8 @@ CREATE TABLE employee (
   phone     CHAR(11)     NOT NULL COMMENT '联系电话',
   position  VARCHAR(20)  NOT NULL COMMENT '职位',
   PRIMARY KEY (emp_id),
+  KEY idx_employee_name (emp_name),
+  KEY idx_employee_phone (phone),
   CHECK (gender IN ('M','F'))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -65,7 +73,9 @@ CREATE TABLE customer (
   cust_name VARCHAR(10)  NOT NULL COMMENT '客户姓名',
   phone     CHAR(11)     NOT NULL COMMENT '联系电话',
   address   VARCHAR(50)  NOT NULL COMMENT '地址',
-  PRIMARY KEY (cust_id)
+  PRIMARY KEY (cust_id),
+  KEY idx_customer_name (cust_name),
+  KEY idx_customer_phone (phone)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 供应商信息表
@@ -76,7 +86,9 @@ CREATE TABLE supplier (
   phone          CHAR(11)     NOT NULL COMMENT '联系电话',
   address        VARCHAR(50)  NOT NULL COMMENT '地址',
   account        CHAR(16)     NOT NULL COMMENT '银行账户',
-  PRIMARY KEY (supp_id)
+  PRIMARY KEY (supp_id),
+  KEY idx_supplier_name (supp_name),
+  KEY idx_supplier_phone (phone)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 
@@ -94,6 +106,7 @@ CREATE TABLE purchase_order (
   invoice_number  CHAR(20)      NOT NULL COMMENT '发票号',
   remark          VARCHAR(100)  DEFAULT NULL COMMENT '备注',
   PRIMARY KEY (order_id),
+  KEY idx_purchase_date (order_date),
   CONSTRAINT fk_po_supplier FOREIGN KEY (supp_id)
     REFERENCES supplier(supp_id)
     ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -127,13 +140,27 @@ CREATE TABLE purchase_detail (
 
 -- 库存表（每个药品一行库存）
 CREATE TABLE inventory (
-  medicine_id    CHAR(10) NOT NULL COMMENT '药品ID',
-  stock_quantity INT      NOT NULL DEFAULT 0 COMMENT '库存总量',
+  medicine_id         CHAR(10) NOT NULL COMMENT '药品ID',
+  stock_quantity      INT      NOT NULL DEFAULT 0 COMMENT '库存总量',
+  low_stock_threshold INT      NULL COMMENT '低库存预警阈值（NULL 表示使用系统默认值）',
   PRIMARY KEY (medicine_id),
+  KEY idx_inventory_stock (stock_quantity, low_stock_threshold),
+  KEY idx_inventory_threshold (low_stock_threshold),
   CONSTRAINT fk_inv_medicine FOREIGN KEY (medicine_id)
     REFERENCES medicine(medicine_id)
     ON UPDATE CASCADE ON DELETE RESTRICT,
-  CHECK (stock_quantity >= 0)
+  CHECK (stock_quantity >= 0),
+  CHECK (low_stock_threshold IS NULL OR low_stock_threshold >= 0)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 库存变动日志（由 inventory 表上的触发器写入，供低库存监控增量检查）
+CREATE TABLE inventory_change_log (
+  log_id       BIGINT   NOT NULL AUTO_INCREMENT COMMENT '日志流水号',
+  medicine_id  CHAR(10) NOT NULL COMMENT '药品ID',
+  old_quantity INT      NULL COMMENT '变动前库存（新建库存记录时为 NULL）',
+  new_quantity INT      NOT NULL COMMENT '变动后库存',
+  changed_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '变动时间',
+  PRIMARY KEY (log_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- -------------------------
@@ -149,6 +176,7 @@ CREATE TABLE sales_order (
   total_amount  DECIMAL(12,2) NOT NULL COMMENT '销售总金额',
   remark        VARCHAR(100)  DEFAULT NULL COMMENT '备注',
   PRIMARY KEY (sales_id),
+  KEY idx_sales_date (sales_date),
   CONSTRAINT fk_so_customer FOREIGN KEY (cust_id)
     REFERENCES customer(cust_id)
     ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -185,6 +213,7 @@ CREATE TABLE sales_return (
   total_amount DECIMAL(12,2) NOT NULL COMMENT '退货总金额',
   reason       VARCHAR(100)  DEFAULT NULL COMMENT '退货原因',
   PRIMARY KEY (return_id),
+  KEY idx_return_date (return_date),
   CONSTRAINT fk_sr_sales FOREIGN KEY (sales_id)
     REFERENCES sales_order(sales_id)
     ON UPDATE CASCADE ON DELETE RESTRICT,
@@ -230,4 +259,24 @@ CREATE TABLE sales_daily_summary (
   CHECK (order_count >= 0)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 月销售汇总表（由日汇总表上的触发器增量维护，见 create_trigger.sql 第 16~18 号）
+CREATE TABLE sales_monthly_summary (
+  summary_month       DATE         NOT NULL COMMENT '统计月份（当月 1 日）',
+  total_sales_amount  DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月销售总额',
+  total_return_amount DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月退货总额',
+  net_amount          DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月净额',
+  order_count         INT          NOT NULL DEFAULT 0 COMMENT '当月销售单数',
+  PRIMARY KEY (summary_month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 年销售汇总表（同上）
+CREATE TABLE sales_yearly_summary (
+  summary_year        SMALLINT     NOT NULL COMMENT '统计年份',
+  total_sales_amount  DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年销售总额',
+  total_return_amount DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年退货总额',
+  net_amount          DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年净额',
+  order_count         INT          NOT NULL DEFAULT 0 COMMENT '全年销售单数',
+  PRIMARY KEY (summary_year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 SET FOREIGN_KEY_CHECKS = 1;
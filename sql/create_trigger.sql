@@ -2,6 +2,8 @@
 -- 医药销售管理系统：触发器脚本
 -- 说明：本脚本用于触发器的创建，用于对数据的完整性进行校验，并在触发器触发时给出报错提示
 -- 适用环境：MySQL 8.0+
+-- 集合式写入：会话变量 @set_based_write = 1 时，逐行维护库存/总价的触发器跳过，
+--             由 DAO 的 set_based 写入引擎按整张单据一次性计算（见 src/database/dao.py）
 -- =========================================
 
 DELIMITER //
@@ -34,10 +36,13 @@ BEFORE INSERT ON purchase_detail
 FOR EACH ROW
 BEGIN
     DECLARE cnt INT;
-    SELECT COUNT(*) INTO cnt FROM medicine WHERE medicine_id = NEW.medicine_id;
-    IF cnt = 0 THEN
-        SIGNAL SQLSTATE '45000' 
-        SET MESSAGE_TEXT = '错误：药品ID不存在，请先在药品信息模块录入该药品！';
+    -- 集合式写入已在插入前一次性校验整单药品
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        SELECT COUNT(*) INTO cnt FROM medicine WHERE medicine_id = NEW.medicine_id;
+        IF cnt = 0 THEN
+            SIGNAL SQLSTATE '45000' 
+            SET MESSAGE_TEXT = '错误：药品ID不存在，请先在药品信息模块录入该药品！';
+        END IF;
     END IF;
 END //
 
@@ -52,15 +57,17 @@ CREATE TRIGGER tri_purchase_add_stock
 AFTER INSERT ON purchase_detail
 FOR EACH ROW
 BEGIN
-    -- 检查库存表中是否已有该药记录
-    IF EXISTS (SELECT 1 FROM inventory WHERE medicine_id = NEW.medicine_id) THEN
-        UPDATE inventory 
-        SET stock_quantity = stock_quantity + NEW.quantity
-        WHERE medicine_id = NEW.medicine_id;
-    ELSE
-        -- 若medicine表中已存在（已通过T2校验），但库存表还没记录，则新建
-        INSERT INTO inventory (medicine_id, stock_quantity)
-        VALUES (NEW.medicine_id, NEW.quantity);
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        -- 检查库存表中是否已有该药记录
+        IF EXISTS (SELECT 1 FROM inventory WHERE medicine_id = NEW.medicine_id) THEN
+            UPDATE inventory 
+            SET stock_quantity = stock_quantity + NEW.quantity
+            WHERE medicine_id = NEW.medicine_id;
+        ELSE
+            -- 若medicine表中已存在（已通过T2校验），但库存表还没记录，则新建
+            INSERT INTO inventory (medicine_id, stock_quantity)
+            VALUES (NEW.medicine_id, NEW.quantity);
+        END IF;
     END IF;
 END //
 
@@ -94,19 +101,21 @@ FOR EACH ROW
 BEGIN
     DECLARE current_stock INT DEFAULT 0;
     
-    -- 获取当前库存数量
-    SELECT stock_quantity INTO current_stock 
-    FROM inventory 
-    WHERE medicine_id = NEW.medicine_id;
-    
-    -- 判断库存（如果没有库存记录或者数量不够）
-    IF current_stock IS NULL OR current_stock < NEW.quantity THEN
-        SIGNAL SQLSTATE '45000' 
-        SET MESSAGE_TEXT = '库存不足：该药品当前库存无法满足本次销售数量！';
-    ELSE
-        UPDATE inventory 
-        SET stock_quantity = stock_quantity - NEW.quantity
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        -- 获取当前库存数量
+        SELECT stock_quantity INTO current_stock 
+        FROM inventory 
         WHERE medicine_id = NEW.medicine_id;
+        
+        -- 判断库存（如果没有库存记录或者数量不够）
+        IF current_stock IS NULL OR current_stock < NEW.quantity THEN
+            SIGNAL SQLSTATE '45000' 
+            SET MESSAGE_TEXT = '库存不足：该药品当前库存无法满足本次销售数量！';
+        ELSE
+            UPDATE inventory 
+            SET stock_quantity = stock_quantity - NEW.quantity
+            WHERE medicine_id = NEW.medicine_id;
+        END IF;
     END IF;
 END //
 
@@ -120,25 +129,30 @@ CREATE TRIGGER tri_return_add_stock
 AFTER INSERT ON sales_return_detail
 FOR EACH ROW
 BEGIN
-    UPDATE inventory 
-    SET stock_quantity = stock_quantity + NEW.return_quantity
-    WHERE medicine_id = NEW.medicine_id;
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        UPDATE inventory 
+        SET stock_quantity = stock_quantity + NEW.return_quantity
+        WHERE medicine_id = NEW.medicine_id;
+    END IF;
 END //
 
 
 -- -------------------------
 -- 7. 销售订单初始化统计
 -- 需求：插入主单时，初始化财务记录并累加订单数
+-- 说明：逐行写入时主单金额为 0，等待明细插入后由 Trigger 11 同步；
+--       集合式写入时主单已带整单金额，此处一次性计入
 -- -------------------------
 DROP TRIGGER IF EXISTS tri_sales_daily_update //
 CREATE TRIGGER tri_sales_daily_update
 AFTER INSERT ON sales_order
 FOR EACH ROW
 BEGIN
-    -- 初始金额设为 0，等待明细插入后由 Trigger 11 同步
     INSERT INTO sales_daily_summary (summary_date, total_sales_amount, net_amount, order_count)
-    VALUES (DATE(NEW.sales_date), 0.00, 0.00, 1)
+    VALUES (DATE(NEW.sales_date), NEW.total_amount, NEW.total_amount, 1)
     ON DUPLICATE KEY UPDATE
+        total_sales_amount = total_sales_amount + NEW.total_amount,
+        net_amount = net_amount + NEW.total_amount,
         order_count = order_count + 1;
 END //
 
@@ -169,9 +183,11 @@ CREATE TRIGGER tri_calc_purchase_total
 AFTER INSERT ON purchase_detail
 FOR EACH ROW
 BEGIN
-    UPDATE purchase_order 
-    SET total_amount = (SELECT SUM(quantity * unit_price) FROM purchase_detail WHERE order_id = NEW.order_id)
-    WHERE order_id = NEW.order_id;
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        UPDATE purchase_order 
+        SET total_amount = (SELECT SUM(quantity * unit_price) FROM purchase_detail WHERE order_id = NEW.order_id)
+        WHERE order_id = NEW.order_id;
+    END IF;
 END //
 
 
@@ -184,9 +200,11 @@ CREATE TRIGGER tri_calc_sales_total
 AFTER INSERT ON sales_detail
 FOR EACH ROW
 BEGIN
-    UPDATE sales_order 
-    SET total_amount = (SELECT SUM(quantity * unit_price) FROM sales_detail WHERE sales_id = NEW.sales_id)
-    WHERE sales_id = NEW.sales_id;
+    IF IFNULL(@set_based_write, 0) = 0 THEN
+        UPDATE sales_order 
+        SET total_amount = (SELECT SUM(quantity * unit_price) FROM sales_detail WHERE sales_id = NEW.sales_id)
+        WHERE sales_id = NEW.sales_id;
+    END IF;
 END //
 
 -- -------------------------
@@ -239,4 +257,90 @@ BEGIN
     WHERE summary_date = DATE(OLD.sales_date);
 END //
 
+-- -------------------------
+-- 14. 库存变动日志（新建库存记录）
+-- 需求：库存的每次变化都记入 inventory_change_log，低库存监控只检查变动过的药品
+-- 说明：挂在 inventory 表上，逐行触发器与 set_based 写入引擎的库存变化都会被记录
+-- -------------------------
+DROP TRIGGER IF EXISTS tri_inventory_log_insert //
+CREATE TRIGGER tri_inventory_log_insert
+AFTER INSERT ON inventory
+FOR EACH ROW
+BEGIN
+    INSERT INTO inventory_change_log (medicine_id, old_quantity, new_quantity)
+    VALUES (NEW.medicine_id, NULL, NEW.stock_quantity);
+END //
+
+-- -------------------------
+-- 15. 库存变动日志（库存数量或预警阈值变化）
+-- -------------------------
+DROP TRIGGER IF EXISTS tri_inventory_log_update //
+CREATE TRIGGER tri_inventory_log_update
+AFTER UPDATE ON inventory
+FOR EACH ROW
+BEGIN
+    IF NEW.stock_quantity <> OLD.stock_quantity
+       OR NOT (NEW.low_stock_threshold <=> OLD.low_stock_threshold) THEN
+        INSERT INTO inventory_change_log (medicine_id, old_quantity, new_quantity)
+        VALUES (NEW.medicine_id, OLD.stock_quantity, NEW.stock_quantity);
+    END IF;
+END //
+
+-- -------------------------
+-- 16~18. 月/年汇总表同步
+-- 需求：日汇总表的任何变化（新增、金额修正、删除）按差额累加到所属月份和年份，
+--       月度/年度报表直接按主键读取汇总行，不再扫描日汇总表
+-- -------------------------
+DROP PROCEDURE IF EXISTS sp_apply_sales_rollup //
+CREATE PROCEDURE sp_apply_sales_rollup(
+    IN p_date DATE, IN p_sales DECIMAL(12,2), IN p_return DECIMAL(12,2),
+    IN p_net DECIMAL(12,2), IN p_orders INT)
+BEGIN
+    INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (DATE_SUB(p_date, INTERVAL DAYOFMONTH(p_date) - 1 DAY), p_sales, p_return, p_net, p_orders)
+    ON DUPLICATE KEY UPDATE
+        total_sales_amount = total_sales_amount + p_sales,
+        total_return_amount = total_return_amount + p_return,
+        net_amount = net_amount + p_net,
+        order_count = order_count + p_orders;
+
+    INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (YEAR(p_date), p_sales, p_return, p_net, p_orders)
+    ON DUPLICATE KEY UPDATE
+        total_sales_amount = total_sales_amount + p_sales,
+        total_return_amount = total_return_amount + p_return,
+        net_amount = net_amount + p_net,
+        order_count = order_count + p_orders;
+END //
+
+DROP TRIGGER IF EXISTS tri_daily_rollup_insert //
+CREATE TRIGGER tri_daily_rollup_insert
+AFTER INSERT ON sales_daily_summary
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_sales_rollup(NEW.summary_date, NEW.total_sales_amount, NEW.total_return_amount,
+                               NEW.net_amount, NEW.order_count);
+END //
+
+DROP TRIGGER IF EXISTS tri_daily_rollup_update //
+CREATE TRIGGER tri_daily_rollup_update
+AFTER UPDATE ON sales_daily_summary
+FOR EACH ROW
+BEGIN
+    -- 先扣除旧值再加上新值，日期被修改时也能正确迁移到新的月份/年份
+    CALL sp_apply_sales_rollup(OLD.summary_date, -OLD.total_sales_amount, -OLD.total_return_amount,
+                               -OLD.net_amount, -OLD.order_count);
+    CALL sp_apply_sales_rollup(NEW.summary_date, NEW.total_sales_amount, NEW.total_return_amount,
+                               NEW.net_amount, NEW.order_count);
+END //
+
+DROP TRIGGER IF EXISTS tri_daily_rollup_delete //
+CREATE TRIGGER tri_daily_rollup_delete
+AFTER DELETE ON sales_daily_summary
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_sales_rollup(OLD.summary_date, -OLD.total_sales_amount, -OLD.total_return_amount,
+                               -OLD.net_amount, -OLD.order_count);
+END //
+
 DELIMITER ;
\ No newline at end of file
@@ -8,11 +8,14 @@ SET FOREIGN_KEY_CHECKS = 0;
 
 -- 1. 清理历史数据
 TRUNCATE TABLE sales_daily_summary;
+TRUNCATE TABLE sales_monthly_summary;
+TRUNCATE TABLE sales_yearly_summary;
 TRUNCATE TABLE sales_return_detail;
 TRUNCATE TABLE sales_return;
 TRUNCATE TABLE sales_detail;
 TRUNCATE TABLE sales_order;
 TRUNCATE TABLE inventory;
+TRUNCATE TABLE inventory_change_log;
 TRUNCATE TABLE purchase_detail;
 TRUNCATE TABLE purchase_order;
 TRUNCATE TABLE medicine;
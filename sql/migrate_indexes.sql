@@ -0,0 +1,129 @@
+-- =========================================
+-- 医药销售管理系统：旧库迁移脚本（表结构 + 二级索引）
+-- 说明：为已经按旧版 create_table.sql 建好的数据库补齐新增的列、表与二级索引（新建库直接执行 create_table.sql 即可）
+--       第 0 节先补齐后续索引与触发器依赖的表结构：inventory.low_stock_threshold、库存变动日志、
+--       月/年汇总表（新建时按日汇总回填）；第 1~3 节为基础资料、库存、单据历史建立二级索引
+--       脚本可重复执行：列/表已存在则跳过；索引已存在且列相同则跳过，同名但列不同则重建
+-- 执行顺序：本脚本 -> create_trigger.sql（重建触发器，库存变动日志与月/年汇总的触发器都依赖第 0 节的表）
+-- 适用环境：MySQL 8.0.16+（列级 CHECK 约束）
+-- 校验：python -m benchmarks.explain_queries 对每条 DAO 查询执行 EXPLAIN，检查全表扫描与文件排序
+-- =========================================
+
+USE medicine_sales_management_system;
+
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS sp_ensure_index //
+CREATE PROCEDURE sp_ensure_index(IN p_table VARCHAR(64), IN p_index VARCHAR(64), IN p_columns VARCHAR(255))
+BEGIN
+    DECLARE current_columns VARCHAR(255);
+    SELECT GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX SEPARATOR ',') INTO current_columns
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND INDEX_NAME = p_index;
+
+    IF current_columns IS NOT NULL AND current_columns <> REPLACE(p_columns, ' ', '') THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_table, ' DROP INDEX ', p_index);
+        PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+        SET current_columns = NULL;
+    END IF;
+    IF current_columns IS NULL THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_table, ' ADD INDEX ', p_index, ' (', p_columns, ')');
+        PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+DROP PROCEDURE IF EXISTS sp_ensure_column //
+CREATE PROCEDURE sp_ensure_column(IN p_table VARCHAR(64), IN p_column VARCHAR(64), IN p_definition VARCHAR(255))
+BEGIN
+    -- MySQL 没有 ADD COLUMN IF NOT EXISTS，按 information_schema 判断后再执行
+    IF NOT EXISTS (SELECT 1 FROM information_schema.COLUMNS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND COLUMN_NAME = p_column) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_table, ' ADD COLUMN ', p_column, ' ', p_definition);
+        PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- -------------------------
+-- 0. 表结构：与当前 create_table.sql 对齐
+-- -------------------------
+-- 按药品设置的低库存预警阈值（NULL 表示使用系统默认值）
+CALL sp_ensure_column('inventory', 'low_stock_threshold',
+    'INT NULL COMMENT ''低库存预警阈值（NULL 表示使用系统默认值）'' CHECK (low_stock_threshold IS NULL OR low_stock_threshold >= 0)');
+
+-- 库存变动日志（由 inventory 表上的触发器写入，供低库存监控增量检查）
+CREATE TABLE IF NOT EXISTS inventory_change_log (
+  log_id       BIGINT   NOT NULL AUTO_INCREMENT COMMENT '日志流水号',
+  medicine_id  CHAR(10) NOT NULL COMMENT '药品ID',
+  old_quantity INT      NULL COMMENT '变动前库存（新建库存记录时为 NULL）',
+  new_quantity INT      NOT NULL COMMENT '变动后库存',
+  changed_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '变动时间',
+  PRIMARY KEY (log_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 月/年销售汇总表（由日汇总表上的触发器增量维护）
+CREATE TABLE IF NOT EXISTS sales_monthly_summary (
+  summary_month       DATE         NOT NULL COMMENT '统计月份（当月 1 日）',
+  total_sales_amount  DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月销售总额',
+  total_return_amount DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月退货总额',
+  net_amount          DECIMAL(14,2) NOT NULL DEFAULT 0.00 COMMENT '当月净额',
+  order_count         INT          NOT NULL DEFAULT 0 COMMENT '当月销售单数',
+  PRIMARY KEY (summary_month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS sales_yearly_summary (
+  summary_year        SMALLINT     NOT NULL COMMENT '统计年份',
+  total_sales_amount  DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年销售总额',
+  total_return_amount DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年退货总额',
+  net_amount          DECIMAL(16,2) NOT NULL DEFAULT 0.00 COMMENT '全年净额',
+  order_count         INT          NOT NULL DEFAULT 0 COMMENT '全年销售单数',
+  PRIMARY KEY (summary_year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 汇总表为空（刚创建）时按已有的日汇总回填；已有数据时不动，需要重算请调用 FinanceController.rebuild_rollups()
+INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+SELECT DATE_SUB(summary_date, INTERVAL DAYOFMONTH(summary_date) - 1 DAY),
+       SUM(total_sales_amount), SUM(total_return_amount), SUM(net_amount), SUM(order_count)
+FROM sales_daily_summary
+WHERE NOT EXISTS (SELECT 1 FROM sales_monthly_summary)
+GROUP BY 1;
+
+INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+SELECT YEAR(summary_date), SUM(total_sales_amount), SUM(total_return_amount), SUM(net_amount), SUM(order_count)
+FROM sales_daily_summary
+WHERE NOT EXISTS (SELECT 1 FROM sales_yearly_summary)
+GROUP BY 1;
+
+-- -------------------------
+-- 1. 基础资料：条件查询的关键字/筛选列（前缀 LIKE 走范围扫描）
+-- -------------------------
+CALL sp_ensure_index('medicine', 'idx_medicine_name', 'medicine_name');
+CALL sp_ensure_index('medicine', 'idx_medicine_category', 'category');
+CALL sp_ensure_index('medicine', 'idx_medicine_manufacturer', 'manufacturer');
+CALL sp_ensure_index('employee', 'idx_employee_name', 'emp_name');
+CALL sp_ensure_index('employee', 'idx_employee_phone', 'phone');
+CALL sp_ensure_index('customer', 'idx_customer_name', 'cust_name');
+CALL sp_ensure_index('customer', 'idx_customer_phone', 'phone');
+CALL sp_ensure_index('supplier', 'idx_supplier_name', 'supp_name');
+CALL sp_ensure_index('supplier', 'idx_supplier_phone', 'phone');
+
+-- -------------------------
+-- 2. 库存：低库存查询与库存报表按 stock_quantity 范围扫描/排序，
+--    (stock_quantity, low_stock_threshold) 覆盖 inventory 一侧的全部列（主键 medicine_id 隐含在二级索引中）
+-- -------------------------
+CALL sp_ensure_index('inventory', 'idx_inventory_stock', 'stock_quantity, low_stock_threshold');
+CALL sp_ensure_index('inventory', 'idx_inventory_threshold', 'low_stock_threshold');
+
+-- -------------------------
+-- 3. 单据历史：键集分页按 (日期, 单号) 排序，InnoDB 二级索引隐含主键，
+--    单列日期索引即等价于 (日期, 单号)，分页与日期区间查询都不需要文件排序
+-- -------------------------
+CALL sp_ensure_index('purchase_order', 'idx_purchase_date', 'order_date');
+CALL sp_ensure_index('sales_order', 'idx_sales_date', 'sales_date');
+CALL sp_ensure_index('sales_return', 'idx_return_date', 'return_date');
+
+-- 明细表按单号查询走主键 (单号, medicine_id)；按 medicine_id 关联走外键自动创建的索引，无需另建
+
+DROP PROCEDURE IF EXISTS sp_ensure_index;
+DROP PROCEDURE IF EXISTS sp_ensure_column;
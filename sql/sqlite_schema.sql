@@ -0,0 +1,419 @@
+-- =========================================
+-- 医药销售管理系统：SQLite 建表与触发器脚本（嵌入式后端，单店/离线门店与进程内测试使用）
+-- 说明：表结构、约束、索引与 create_table.sql 一致，触发器与 create_trigger.sql 逐条对应
+--   - SIGNAL SQLSTATE '45000'  -> SELECT RAISE(ABORT, ...)，由后端映射为与 MySQL 相同的 1644 业务异常
+--   - @set_based_write 会话变量 -> session_var('set_based_write')（后端在每个连接上注册的函数）
+--   - ON DUPLICATE KEY UPDATE  -> ON CONFLICT ... DO UPDATE；金额累加用 ROUND(..., 2) 保持两位小数
+--   - 存储过程 sp_apply_sales_rollup 展开在三个日汇总触发器中
+-- 由 src/database/backends.py 在首次连接时按 PRAGMA user_version 自动执行，无需手工运行
+-- 触发器依赖 session_var() 函数，请勿用 sqlite3 命令行直接写入业务表
+-- =========================================
+
+-- -------------------------
+-- 1. 基础信息管理
+-- -------------------------
+
+CREATE TABLE IF NOT EXISTS medicine (
+  medicine_id     CHAR(10)      NOT NULL PRIMARY KEY,
+  medicine_name   VARCHAR(50)   NOT NULL,
+  category        VARCHAR(50)   NOT NULL,
+  specification   VARCHAR(50)   NOT NULL,
+  manufacturer    VARCHAR(50)   NOT NULL,
+  production_date DATE          NOT NULL,
+  expiry_date     DATE          NOT NULL,
+  retail_price    DECIMAL(10,2) NOT NULL,
+  description     VARCHAR(200)  DEFAULT NULL,
+  CHECK (retail_price >= 0),
+  CHECK (expiry_date >= production_date)
+);
+CREATE INDEX IF NOT EXISTS idx_medicine_name ON medicine (medicine_name);
+CREATE INDEX IF NOT EXISTS idx_medicine_category ON medicine (category);
+CREATE INDEX IF NOT EXISTS idx_medicine_manufacturer ON medicine (manufacturer);
+
+CREATE TABLE IF NOT EXISTS employee (
+  emp_id    CHAR(5)     NOT NULL PRIMARY KEY,
+  emp_name  VARCHAR(10) NOT NULL,
+  gender    CHAR(1)     NOT NULL,
+  phone     CHAR(11)    NOT NULL,
+  position  VARCHAR(20) NOT NULL,
+  CHECK (gender IN ('M','F'))
+);
+CREATE INDEX IF NOT EXISTS idx_employee_name ON employee (emp_name);
+CREATE INDEX IF NOT EXISTS idx_employee_phone ON employee (phone);
+
+CREATE TABLE IF NOT EXISTS customer (
+  cust_id   CHAR(10)    NOT NULL PRIMARY KEY,
+  cust_name VARCHAR(10) NOT NULL,
+  phone     CHAR(11)    NOT NULL,
+  address   VARCHAR(50) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_customer_name ON customer (cust_name);
+CREATE INDEX IF NOT EXISTS idx_customer_phone ON customer (phone);
+
+CREATE TABLE IF NOT EXISTS supplier (
+  supp_id        CHAR(10)    NOT NULL PRIMARY KEY,
+  supp_name      VARCHAR(30) NOT NULL,
+  contact_person VARCHAR(10) NOT NULL,
+  phone          CHAR(11)    NOT NULL,
+  address        VARCHAR(50) NOT NULL,
+  account        CHAR(16)    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_supplier_name ON supplier (supp_name);
+CREATE INDEX IF NOT EXISTS idx_supplier_phone ON supplier (phone);
+
+-- -------------------------
+-- 2. 进货管理
+-- -------------------------
+
+CREATE TABLE IF NOT EXISTS purchase_order (
+  order_id       CHAR(10)      NOT NULL PRIMARY KEY,
+  supp_id        CHAR(10)      NOT NULL REFERENCES supplier(supp_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  emp_id         CHAR(5)       NOT NULL REFERENCES employee(emp_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  order_date     DATETIME      NOT NULL DEFAULT (datetime('now', 'localtime')),
+  total_amount   DECIMAL(12,2) NOT NULL,
+  invoice_number CHAR(20)      NOT NULL,
+  remark         VARCHAR(100)  DEFAULT NULL,
+  CHECK (total_amount >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_purchase_date ON purchase_order (order_date);
+
+CREATE TABLE IF NOT EXISTS purchase_detail (
+  order_id    CHAR(10)      NOT NULL REFERENCES purchase_order(order_id) ON UPDATE CASCADE ON DELETE CASCADE,
+  medicine_id CHAR(10)      NOT NULL REFERENCES medicine(medicine_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  quantity    INT           NOT NULL,
+  unit_price  DECIMAL(10,2) NOT NULL,
+  PRIMARY KEY (order_id, medicine_id),
+  CHECK (quantity > 0),
+  CHECK (unit_price >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_pd_medicine ON purchase_detail (medicine_id);
+
+-- -------------------------
+-- 3. 库存管理
+-- -------------------------
+
+CREATE TABLE IF NOT EXISTS inventory (
+  medicine_id         CHAR(10) NOT NULL PRIMARY KEY
+                      REFERENCES medicine(medicine_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  stock_quantity      INT      NOT NULL DEFAULT 0,
+  low_stock_threshold INT      NULL,
+  CHECK (stock_quantity >= 0),
+  CHECK (low_stock_threshold IS NULL OR low_stock_threshold >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_inventory_stock ON inventory (stock_quantity, low_stock_threshold);
+CREATE INDEX IF NOT EXISTS idx_inventory_threshold ON inventory (low_stock_threshold);
+
+CREATE TABLE IF NOT EXISTS inventory_change_log (
+  log_id       INTEGER  PRIMARY KEY AUTOINCREMENT,
+  medicine_id  CHAR(10) NOT NULL,
+  old_quantity INT      NULL,
+  new_quantity INT      NOT NULL,
+  changed_at   DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+-- -------------------------
+-- 4. 销售管理
+-- -------------------------
+
+CREATE TABLE IF NOT EXISTS sales_order (
+  sales_id     CHAR(10)      NOT NULL PRIMARY KEY,
+  cust_id      CHAR(10)      NOT NULL REFERENCES customer(cust_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  emp_id       CHAR(5)       NOT NULL REFERENCES employee(emp_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  sales_date   DATETIME      NOT NULL DEFAULT (datetime('now', 'localtime')),
+  total_amount DECIMAL(12,2) NOT NULL,
+  remark       VARCHAR(100)  DEFAULT NULL,
+  CHECK (total_amount >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales_order (sales_date);
+
+CREATE TABLE IF NOT EXISTS sales_detail (
+  sales_id    CHAR(10)      NOT NULL REFERENCES sales_order(sales_id) ON UPDATE CASCADE ON DELETE CASCADE,
+  medicine_id CHAR(10)      NOT NULL REFERENCES medicine(medicine_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  quantity    INT           NOT NULL,
+  unit_price  DECIMAL(10,2) NOT NULL,
+  PRIMARY KEY (sales_id, medicine_id),
+  CHECK (quantity > 0),
+  CHECK (unit_price >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_sd_medicine ON sales_detail (medicine_id);
+
+CREATE TABLE IF NOT EXISTS sales_return (
+  return_id    CHAR(10)      NOT NULL PRIMARY KEY,
+  sales_id     CHAR(10)      NOT NULL REFERENCES sales_order(sales_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  emp_id       CHAR(5)       NOT NULL REFERENCES employee(emp_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  cust_id      CHAR(10)      NOT NULL REFERENCES customer(cust_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  return_date  DATETIME      NOT NULL DEFAULT (datetime('now', 'localtime')),
+  total_amount DECIMAL(12,2) NOT NULL,
+  reason       VARCHAR(100)  DEFAULT NULL,
+  CHECK (total_amount >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_return_date ON sales_return (return_date);
+
+CREATE TABLE IF NOT EXISTS sales_return_detail (
+  return_id       CHAR(10) NOT NULL REFERENCES sales_return(return_id) ON UPDATE CASCADE ON DELETE CASCADE,
+  medicine_id     CHAR(10) NOT NULL REFERENCES medicine(medicine_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+  return_quantity INT      NOT NULL,
+  PRIMARY KEY (return_id, medicine_id),
+  CHECK (return_quantity > 0)
+);
+CREATE INDEX IF NOT EXISTS idx_srd_medicine ON sales_return_detail (medicine_id);
+
+-- -------------------------
+-- 5. 财务统计
+-- -------------------------
+
+CREATE TABLE IF NOT EXISTS sales_daily_summary (
+  summary_date        DATE          NOT NULL PRIMARY KEY,
+  total_sales_amount  DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  total_return_amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  net_amount          DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+  order_count         INT           NOT NULL DEFAULT 0,
+  CHECK (total_sales_amount >= 0),
+  CHECK (total_return_amount >= 0),
+  CHECK (order_count >= 0)
+);
+
+CREATE TABLE IF NOT EXISTS sales_monthly_summary (
+  summary_month       DATE          NOT NULL PRIMARY KEY,
+  total_sales_amount  DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+  total_return_amount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+  net_amount          DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+  order_count         INT           NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sales_yearly_summary (
+  summary_year        SMALLINT      NOT NULL PRIMARY KEY,
+  total_sales_amount  DECIMAL(16,2) NOT NULL DEFAULT 0.00,
+  total_return_amount DECIMAL(16,2) NOT NULL DEFAULT 0.00,
+  net_amount          DECIMAL(16,2) NOT NULL DEFAULT 0.00,
+  order_count         INT           NOT NULL DEFAULT 0
+);
+
+-- =========================================
+-- 触发器（编号与 create_trigger.sql 对应）
+-- =========================================
+
+-- 1. 供应商存在性校验
+CREATE TRIGGER IF NOT EXISTS tri_check_supplier_exists
+BEFORE INSERT ON purchase_order
+WHEN NOT EXISTS (SELECT 1 FROM supplier WHERE supp_id = NEW.supp_id)
+BEGIN
+    SELECT RAISE(ABORT, '错误：供应商ID不存在，请先在供应商管理模块进行登记！');
+END;
+
+-- 2. 进货药品存在性校验（集合式写入已在插入前一次性校验整单药品）
+CREATE TRIGGER IF NOT EXISTS tri_check_medicine_exists_purchase
+BEFORE INSERT ON purchase_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+ AND NOT EXISTS (SELECT 1 FROM medicine WHERE medicine_id = NEW.medicine_id)
+BEGIN
+    SELECT RAISE(ABORT, '错误：药品ID不存在，请先在药品信息模块录入该药品！');
+END;
+
+-- 3. 进货自动增加库存：没有库存记录则新建，有则累加
+CREATE TRIGGER IF NOT EXISTS tri_purchase_add_stock
+AFTER INSERT ON purchase_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+BEGIN
+    INSERT INTO inventory (medicine_id, stock_quantity) VALUES (NEW.medicine_id, NEW.quantity)
+    ON CONFLICT (medicine_id) DO UPDATE SET stock_quantity = stock_quantity + excluded.stock_quantity;
+END;
+
+-- 4. 客户存在性校验
+CREATE TRIGGER IF NOT EXISTS tri_check_customer_exists
+BEFORE INSERT ON sales_order
+WHEN NOT EXISTS (SELECT 1 FROM customer WHERE cust_id = NEW.cust_id)
+BEGIN
+    SELECT RAISE(ABORT, '错误：该客户不存在（散客请先建档或使用通用客户ID）！');
+END;
+
+-- 5. 销售扣减库存与超卖检查（没有库存记录按 0 处理）
+CREATE TRIGGER IF NOT EXISTS tri_sales_reduce_stock
+BEFORE INSERT ON sales_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+BEGIN
+    SELECT RAISE(ABORT, '库存不足：该药品当前库存无法满足本次销售数量！')
+    WHERE IFNULL((SELECT stock_quantity FROM inventory WHERE medicine_id = NEW.medicine_id), 0) < NEW.quantity;
+    UPDATE inventory SET stock_quantity = stock_quantity - NEW.quantity WHERE medicine_id = NEW.medicine_id;
+END;
+
+-- 6. 退货自动增加库存
+CREATE TRIGGER IF NOT EXISTS tri_return_add_stock
+AFTER INSERT ON sales_return_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+BEGIN
+    UPDATE inventory SET stock_quantity = stock_quantity + NEW.return_quantity WHERE medicine_id = NEW.medicine_id;
+END;
+
+-- 7. 销售订单初始化统计
+CREATE TRIGGER IF NOT EXISTS tri_sales_daily_update
+AFTER INSERT ON sales_order
+BEGIN
+    INSERT INTO sales_daily_summary (summary_date, total_sales_amount, net_amount, order_count)
+    VALUES (date(NEW.sales_date), NEW.total_amount, NEW.total_amount, 1)
+    ON CONFLICT (summary_date) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + 1;
+END;
+
+-- 8. 退货汇总统计
+CREATE TRIGGER IF NOT EXISTS tri_return_daily_update
+AFTER INSERT ON sales_return
+BEGIN
+    INSERT INTO sales_daily_summary (summary_date, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (date(NEW.return_date), 0.00, NEW.total_amount, -NEW.total_amount, 0)
+    ON CONFLICT (summary_date) DO UPDATE SET
+        total_return_amount = ROUND(IFNULL(total_return_amount, 0) + excluded.total_return_amount, 2),
+        net_amount = ROUND(IFNULL(net_amount, 0) + excluded.net_amount, 2);
+END;
+
+-- 9. 自动计算入库单总价
+CREATE TRIGGER IF NOT EXISTS tri_calc_purchase_total
+AFTER INSERT ON purchase_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+BEGIN
+    UPDATE purchase_order
+    SET total_amount = (SELECT ROUND(SUM(quantity * unit_price), 2) FROM purchase_detail WHERE order_id = NEW.order_id)
+    WHERE order_id = NEW.order_id;
+END;
+
+-- 10. 自动计算销售单总价
+CREATE TRIGGER IF NOT EXISTS tri_calc_sales_total
+AFTER INSERT ON sales_detail
+WHEN IFNULL(session_var('set_based_write'), 0) = 0
+BEGIN
+    UPDATE sales_order
+    SET total_amount = (SELECT ROUND(SUM(quantity * unit_price), 2) FROM sales_detail WHERE sales_id = NEW.sales_id)
+    WHERE sales_id = NEW.sales_id;
+END;
+
+-- 11. 销售金额实时同步汇总表
+CREATE TRIGGER IF NOT EXISTS tri_sales_amount_sync
+AFTER UPDATE ON sales_order
+WHEN OLD.total_amount <> NEW.total_amount
+BEGIN
+    UPDATE sales_daily_summary
+    SET total_sales_amount = ROUND(total_sales_amount - OLD.total_amount + NEW.total_amount, 2),
+        net_amount = ROUND(net_amount - OLD.total_amount + NEW.total_amount, 2)
+    WHERE summary_date = date(NEW.sales_date);
+END;
+
+-- 12. 销售退货删除同步
+CREATE TRIGGER IF NOT EXISTS tri_sales_return_delete_sync
+AFTER DELETE ON sales_return
+BEGIN
+    UPDATE sales_daily_summary
+    SET total_return_amount = ROUND(total_return_amount - OLD.total_amount, 2),
+        net_amount = ROUND(net_amount + OLD.total_amount, 2)
+    WHERE summary_date = date(OLD.return_date);
+END;
+
+-- 13. 销售订单删除同步
+CREATE TRIGGER IF NOT EXISTS tri_sales_order_delete_sync
+AFTER DELETE ON sales_order
+BEGIN
+    UPDATE sales_daily_summary
+    SET total_sales_amount = ROUND(total_sales_amount - OLD.total_amount, 2),
+        net_amount = ROUND(net_amount - OLD.total_amount, 2),
+        order_count = order_count - 1
+    WHERE summary_date = date(OLD.sales_date);
+END;
+
+-- 14. 库存变动日志（新建库存记录）
+CREATE TRIGGER IF NOT EXISTS tri_inventory_log_insert
+AFTER INSERT ON inventory
+BEGIN
+    INSERT INTO inventory_change_log (medicine_id, old_quantity, new_quantity)
+    VALUES (NEW.medicine_id, NULL, NEW.stock_quantity);
+END;
+
+-- 15. 库存变动日志（库存数量或预警阈值变化）
+CREATE TRIGGER IF NOT EXISTS tri_inventory_log_update
+AFTER UPDATE ON inventory
+WHEN NEW.stock_quantity <> OLD.stock_quantity OR NEW.low_stock_threshold IS NOT OLD.low_stock_threshold
+BEGIN
+    INSERT INTO inventory_change_log (medicine_id, old_quantity, new_quantity)
+    VALUES (NEW.medicine_id, OLD.stock_quantity, NEW.stock_quantity);
+END;
+
+-- 16~18. 月/年汇总表同步（按差额累加到所属月份和年份）
+CREATE TRIGGER IF NOT EXISTS tri_daily_rollup_insert
+AFTER INSERT ON sales_daily_summary
+BEGIN
+    INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (date(NEW.summary_date, 'start of month'), NEW.total_sales_amount, NEW.total_return_amount,
+            NEW.net_amount, NEW.order_count)
+    ON CONFLICT (summary_month) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+    INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (CAST(strftime('%Y', NEW.summary_date) AS INTEGER), NEW.total_sales_amount, NEW.total_return_amount,
+            NEW.net_amount, NEW.order_count)
+    ON CONFLICT (summary_year) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+END;
+
+-- 先扣除旧值再加上新值，日期被修改时也能正确迁移到新的月份/年份
+CREATE TRIGGER IF NOT EXISTS tri_daily_rollup_update
+AFTER UPDATE ON sales_daily_summary
+BEGIN
+    INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (date(OLD.summary_date, 'start of month'), -OLD.total_sales_amount, -OLD.total_return_amount,
+            -OLD.net_amount, -OLD.order_count)
+    ON CONFLICT (summary_month) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+    INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (date(NEW.summary_date, 'start of month'), NEW.total_sales_amount, NEW.total_return_amount,
+            NEW.net_amount, NEW.order_count)
+    ON CONFLICT (summary_month) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+    INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (CAST(strftime('%Y', OLD.summary_date) AS INTEGER), -OLD.total_sales_amount, -OLD.total_return_amount,
+            -OLD.net_amount, -OLD.order_count)
+    ON CONFLICT (summary_year) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+    INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (CAST(strftime('%Y', NEW.summary_date) AS INTEGER), NEW.total_sales_amount, NEW.total_return_amount,
+            NEW.net_amount, NEW.order_count)
+    ON CONFLICT (summary_year) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tri_daily_rollup_delete
+AFTER DELETE ON sales_daily_summary
+BEGIN
+    INSERT INTO sales_monthly_summary (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (date(OLD.summary_date, 'start of month'), -OLD.total_sales_amount, -OLD.total_return_amount,
+            -OLD.net_amount, -OLD.order_count)
+    ON CONFLICT (summary_month) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+    INSERT INTO sales_yearly_summary (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+    VALUES (CAST(strftime('%Y', OLD.summary_date) AS INTEGER), -OLD.total_sales_amount, -OLD.total_return_amount,
+            -OLD.net_amount, -OLD.order_count)
+    ON CONFLICT (summary_year) DO UPDATE SET
+        total_sales_amount = ROUND(total_sales_amount + excluded.total_sales_amount, 2),
+        total_return_amount = ROUND(total_return_amount + excluded.total_return_amount, 2),
+        net_amount = ROUND(net_amount + excluded.net_amount, 2),
+        order_count = order_count + excluded.order_count;
+END;
@@ -0,0 +1,98 @@
+# src/controllers/analytics_ctrl.py
+import datetime
+import threading
+from collections import OrderedDict
+from src.database.dao import AnalyticsDAO
+from src.database.analytics import SalesColumns, DIMENSIONS
+from src.utils.logger import logger
+
+MAX_CACHED_RANGES = 8   # 最多缓存多少个日期区间的列存
+
+
+class AnalyticsController:
+    """
+    销售分析：药品排行、分类构成、收银员业绩、客户消费
+    - 每个日期区间的明细只全量拉取一次，结果列存缓存在内存中
+    - 区间包含当前时刻时，再次查询只增量拉取水位之后的新销售单
+    """
+    def __init__(self):
+        self.dao = AnalyticsDAO()
+        self._cache = OrderedDict()   # (start, end) -> SalesColumns
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(start_date, end_date):
+        """日期（含首尾）-> 半开区间 [start, end) 的 datetime"""
+        if isinstance(start_date, str):
+            start_date = datetime.date.fromisoformat(start_date)
+        if isinstance(end_date, str):
+            end_date = datetime.date.fromisoformat(end_date)
+        start = datetime.datetime.combine(start_date, datetime.time.min)
+        end = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+        return start, end
+
+    def _load(self, facts, since=None):
+        # 增量读取从水位（含）开始，水位那一刻已加载的单号需要跳过
+        loaded = set(facts.edge_orders) if since is not None else ()
+        for chunk in self.dao.iter_sales_lines(facts.start, facts.end, since=since):
+            facts.append_chunk(chunk, skip_orders=loaded)
+
+    def _facts(self, start, end, refresh=True):
+        """取得区间列存：首次全量加载，之后对仍在增长的区间做增量刷新"""
+        key = (start, end)
+        with self._lock:
+            facts = self._cache.get(key)
+            if facts is None:
+                facts = SalesColumns(start, end)
+                self._load(facts)
+                logger.info(f"分析数据加载完成 | 区间: {start:%Y-%m-%d} ~ {end:%Y-%m-%d} | 明细行: {facts.rows}")
+                self._cache[key] = facts
+                while len(self._cache) > MAX_CACHED_RANGES:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(key)
+                if refresh and end > datetime.datetime.now() - datetime.timedelta(minutes=5):
+                    before = facts.rows
+                    # 水位当刻可能还有同一秒内写入的单据，所以从水位（含）开始读
+                    self._load(facts, since=facts.watermark)
+                    if facts.rows > before:
+                        logger.debug("分析数据增量刷新 | 新增明细行: %s", facts.rows - before)
+            return facts
+
+    def invalidate(self):
+        """清空全部区间缓存（例如删除/修改了历史单据后）"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_dashboard(self, start_date, end_date, top_n=10, refresh=True):
+        """
+        一次取齐分析页所需的全部数据
+        返回 {"totals": {...}, "medicine": [...], "category": [...], "employee": [...], "customer": [...]}
+        每个分组列表项: key, name, amount, quantity, orders, share
+        """
+        try:
+            start, end = self._normalize(start_date, end_date)
+            if start >= end:
+                return False, "开始日期不能晚于结束日期"
+            facts = self._facts(start, end, refresh)
+            with self._lock:
+                data = {"totals": facts.totals()}
+                for dim in DIMENSIONS:
+                    # 分类数量有限，全部返回；其余维度取前 top_n
+                    data[dim] = facts.group(dim, None if dim == "category" else top_n)
+            return True, data
+        except Exception as e:
+            logger.error(f"生成销售分析失败 | 区间: {start_date} ~ {end_date} | 错误: {e}")
+            return False, str(e)
+
+    def get_ranking(self, dim, start_date, end_date, top_n=10):
+        """单个维度的排行（dim: medicine / category / customer / employee）"""
+        if dim not in DIMENSIONS:
+            return False, f"不支持的分析维度: {dim}"
+        try:
+            facts = self._facts(*self._normalize(start_date, end_date))
+            with self._lock:
+                return True, facts.group(dim, top_n)
+        except Exception as e:
+            logger.error(f"生成 {dim} 排行失败 | 错误: {e}")
+            return False, str(e)
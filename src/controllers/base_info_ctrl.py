@@ -1,14 +1,107 @@
 # src/controllers/base_info_ctrl.py
+import threading
+import time
 from src.database.dao import MedicineDAO, EmployeeDAO, CustomerDAO, SupplierDAO
+from src.database.cache import get_master_cache
+from src.utils.search_index import SearchIndex, pinyin_initials
 from src.utils.logger import logger  
 from pymysql import MySQLError
 
+
+def _medicine_keys(m):
+    """药品前缀检索键：编号、名称、名称拼音首字母、厂家、分类"""
+    return [m['medicine_id'], m['medicine_name'], pinyin_initials(m['medicine_name']),
+            m.get('manufacturer'), m.get('category')]
+
+
+def _medicine_texts(m):
+    """药品子串检索文本：名称、厂家、规格（编号只按前缀匹配）"""
+    return [m['medicine_name'], m.get('manufacturer'), m.get('specification')]
+
+
+# 药品检索索引的最短重建间隔（秒）：药品缓存 ttl 很短或关闭缓存时，避免每次按键都整体重建
+INDEX_MIN_AGE = 30
+
+
+class _MedicineIndex:
+    """
+    进程内共享的药品检索索引
+    - 本进程的药品缓存失效时只打脏标记，下一次检索（或预热）时再整体重建，避免连续增删改反复重建
+    - 索引与药品缓存同样按 ttl 过期（不短于 INDEX_MIN_AGE），其他收银机/进程新增或改名的药品过期后即可检索到
+    """
+    def __init__(self):
+        self.index = SearchIndex()
+        self.dirty = True
+        self.built_at = None
+        self._lock = threading.Lock()
+        get_master_cache().add_listener(self._on_invalidate)
+
+    def _on_invalidate(self, entity):
+        if entity == "medicine":
+            self.dirty = True
+
+    def _stale(self):
+        if self.dirty or self.built_at is None:
+            return True
+        ttl = get_master_cache().caches["medicine"].ttl
+        return time.monotonic() - self.built_at >= max(ttl, INDEX_MIN_AGE)
+
+    def ensure(self, loader):
+        if not self._stale():
+            return
+        with self._lock:
+            if not self._stale():
+                return
+            self.dirty = False   # 先清标记：重建期间再发生的失效会让下一次检索重建
+            started = time.monotonic()
+            try:
+                self.index.build(loader(), _medicine_keys, lambda m: m['medicine_id'],
+                                 lambda m: (len(m['medicine_name']), m['medicine_id']), _medicine_texts)
+            except Exception:
+                self.dirty = True
+                raise
+            self.built_at = started
+            logger.debug("药品检索索引已重建 | 条目: %s", len(self.index))
+
+
+_medicine_index = None
+_medicine_index_lock = threading.Lock()
+
+
+def _get_medicine_index():
+    global _medicine_index
+    if _medicine_index is None:
+        with _medicine_index_lock:
+            if _medicine_index is None:
+                _medicine_index = _MedicineIndex()
+    return _medicine_index
+
+
 class BaseInfoController:
     def __init__(self):
         self.medicine_dao = MedicineDAO()
         self.employee_dao = EmployeeDAO()
         self.customer_dao = CustomerDAO()
         self.supplier_dao = SupplierDAO()
+        # 基础资料读缓存：查询走缓存，本控制器的增删改成功后使对应实体失效
+        self.cache = get_master_cache()
+
+    def cache_stats(self):
+        """各实体缓存的命中/未命中计数"""
+        return self.cache.stats()
+
+    def _query(self, title, dao, keyword, filters, sort, descending, limit, offset):
+        """
+        服务端条件查询（不经过整表缓存，只取回一页）
+        返回 (success, {"rows": [...], "has_more": bool})
+        """
+        try:
+            return True, dao.search(keyword, filters or (), sort, descending, limit, offset)
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            logger.error(f"条件查询{title}失败 | 关键字: {keyword} | 条件: {filters} | 错误: {e}")
+            return False, f"查询失败: {str(e)}"
 
     # ==========================
     # 1. 药品管理 (Medicine)
@@ -19,6 +112,7 @@ class BaseInfoController:
             return False, "药品编号和名称不能为空！"
         try:
             self.medicine_dao.add(*data)
+            self.cache.invalidate("medicine")
             # 记录成功日志 (INFO)
             logger.info(f"添加药品成功 | ID: {data[0]} | 名称: {data[1]}")
             return True, "药品添加成功"
@@ -35,6 +129,7 @@ class BaseInfoController:
     def update_medicine(self, m_id, data_dict):
         try:
             self.medicine_dao.update(m_id, data_dict)
+            self.cache.invalidate("medicine")
             logger.info(f"修改药品成功 | ID: {m_id} | 修改项: {list(data_dict.keys())}")
             return True, "药品修改成功"
         except Exception as e:
@@ -44,6 +139,7 @@ class BaseInfoController:
     def delete_medicine(self, m_id):
         try:
             self.medicine_dao.delete(m_id)
+            self.cache.invalidate("medicine")
             # 删除属于敏感操作，记录为 WARNING
             logger.warning(f"数据删除 | 管理员删除了药品: {m_id}")
             return True, "删除成功"
@@ -56,7 +152,7 @@ class BaseInfoController:
 
     def fetch_all_medicines(self):
         try:
-            data = self.medicine_dao.get_all()
+            data = self.cache.fetch_all("medicine", self.medicine_dao.get_all)
             return True, data
         except Exception as e:
             logger.error(f"获取药品列表失败 | 错误: {e}")
@@ -64,7 +160,7 @@ class BaseInfoController:
 
     def fetch_medicine_by_id(self, m_id):
         try:
-            res = self.medicine_dao.get_by_id(m_id)
+            res = self.cache.fetch_one("medicine", m_id, lambda: self.medicine_dao.get_by_id(m_id))
             if not res: 
                 return False, "未找到该药品信息"
             return True, res
@@ -72,6 +168,27 @@ class BaseInfoController:
             logger.error(f"查询单个药品失败 | ID: {m_id} | 错误: {e}")
             return False, f"查询失败: {str(e)}"
 
+    def search_medicines(self, query, limit=20, allowed_ids=None):
+        """
+        药品模糊检索（收银台选药）：编号/名称前缀 > 子串 > 拼音首字母，例如 "amxl" 可命中 阿莫西林
+        allowed_ids: 只在这些药品中检索（如有库存的药品）；返回药品记录列表
+        """
+        try:
+            idx = _get_medicine_index()
+            idx.ensure(lambda: self.cache.fetch_all("medicine", self.medicine_dao.get_all))
+            ids = idx.index.search(query, limit, allowed_ids)
+            return True, [idx.index.get(m_id) for m_id in ids]
+        except Exception as e:
+            logger.error(f"药品检索失败 | 关键字: {query} | 错误: {e}")
+            return False, str(e)
+
+    def warm_medicine_index(self):
+        """预先建立药品检索索引，使收银台第一次输入就能即时响应"""
+        return self.search_medicines("")
+
+    def query_medicines(self, keyword=None, filters=None, sort=None, descending=False, limit=100, offset=0):
+        return self._query("药品", self.medicine_dao, keyword, filters, sort, descending, limit, offset)
+
     # ==========================
     # 2. 员工管理 (Employee)
     # ==========================
@@ -81,6 +198,7 @@ class BaseInfoController:
             return False, "员工编号和姓名不能为空！"
         try:
             self.employee_dao.add(*data)
+            self.cache.invalidate("employee")
             logger.info(f"录入员工成功 | 工号: {data[0]} | 姓名: {data[1]}")
             return True, "员工录入成功"
         except Exception as e:
@@ -90,6 +208,7 @@ class BaseInfoController:
     def update_employee(self, e_id, data_dict):
         try:
             self.employee_dao.update(e_id, data_dict)
+            self.cache.invalidate("employee")
             logger.info(f"修改员工信息成功 | 工号: {e_id}")
             return True, "员工信息修改成功"
         except Exception as e:
@@ -99,6 +218,7 @@ class BaseInfoController:
     def delete_employee(self, e_id):
         try:
             self.employee_dao.delete(e_id)
+            self.cache.invalidate("employee")
             logger.warning(f"数据删除 | 管理员删除了员工: {e_id}")
             return True, "员工删除成功"
         except Exception as e:
@@ -107,7 +227,7 @@ class BaseInfoController:
 
     def fetch_all_employees(self):
         try:
-            data = self.employee_dao.get_all()
+            data = self.cache.fetch_all("employee", self.employee_dao.get_all)
             return True, data
         except Exception as e:
             logger.error(f"获取员工列表失败 | 错误: {e}")
@@ -115,13 +235,16 @@ class BaseInfoController:
 
     def fetch_employee_by_id(self, e_id):
         try:
-            res = self.employee_dao.get_by_id(e_id)
+            res = self.cache.fetch_one("employee", e_id, lambda: self.employee_dao.get_by_id(e_id))
             if not res: return False, "员工不存在"
             return True, res
         except Exception as e:
             logger.error(f"查询单个员工失败 | 工号: {e_id} | 错误: {e}")
             return False, str(e)
 
+    def query_employees(self, keyword=None, filters=None, sort=None, descending=False, limit=100, offset=0):
+        return self._query("员工", self.employee_dao, keyword, filters, sort, descending, limit, offset)
+
     # ==========================
     # 3. 客户管理 (Customer)
     # ==========================
@@ -131,6 +254,7 @@ class BaseInfoController:
             return False, "客户编号和名称不能为空！"
         try:
             self.customer_dao.add(*data)
+            self.cache.invalidate("customer")
             logger.info(f"创建客户档案成功 | ID: {data[0]} | 姓名: {data[1]}")
             return True, "客户档案创建成功"
         except Exception as e:
@@ -140,6 +264,7 @@ class BaseInfoController:
     def update_customer(self, c_id, data_dict):
         try:
             self.customer_dao.update(c_id, data_dict)
+            self.cache.invalidate("customer")
             logger.info(f"更新客户信息成功 | ID: {c_id}")
             return True, "客户信息更新成功"
         except Exception as e:
@@ -149,6 +274,7 @@ class BaseInfoController:
     def delete_customer(self, c_id):
         try:
             self.customer_dao.delete(c_id)
+            self.cache.invalidate("customer")
             logger.warning(f"数据删除 | 管理员删除了客户: {c_id}")
             return True, "客户记录已删除"
         except Exception as e:
@@ -157,7 +283,7 @@ class BaseInfoController:
 
     def fetch_all_customers(self):
         try:
-            data = self.customer_dao.get_all()
+            data = self.cache.fetch_all("customer", self.customer_dao.get_all)
             return True, data
         except Exception as e:
             logger.error(f"获取客户列表失败 | 错误: {e}")
@@ -165,13 +291,16 @@ class BaseInfoController:
 
     def fetch_customer_by_id(self, c_id):
         try:
-            res = self.customer_dao.get_by_id(c_id)
+            res = self.cache.fetch_one("customer", c_id, lambda: self.customer_dao.get_by_id(c_id))
             if not res: return False, "客户不存在"
             return True, res
         except Exception as e:
             logger.error(f"查询单个客户失败 | ID: {c_id} | 错误: {e}")
             return False, str(e)
 
+    def query_customers(self, keyword=None, filters=None, sort=None, descending=False, limit=100, offset=0):
+        return self._query("客户", self.customer_dao, keyword, filters, sort, descending, limit, offset)
+
     # ==========================
     # 4. 供应商管理 (Supplier)
     # ==========================
@@ -181,6 +310,7 @@ class BaseInfoController:
             return False, "供应商编号和名称不能为空！"
         try:
             self.supplier_dao.add(*data)
+            self.cache.invalidate("supplier")
             logger.info(f"登记供应商成功 | ID: {data[0]} | 名称: {data[1]}")
             return True, "供应商登记成功"
         except Exception as e:
@@ -190,6 +320,7 @@ class BaseInfoController:
     def update_supplier(self, s_id, data_dict):
         try:
             self.supplier_dao.update(s_id, data_dict)
+            self.cache.invalidate("supplier")
             logger.info(f"修改供应商信息成功 | ID: {s_id}")
             return True, "供应商信息已修改"
         except Exception as e:
@@ -199,6 +330,7 @@ class BaseInfoController:
     def delete_supplier(self, s_id):
         try:
             self.supplier_dao.delete(s_id)
+            self.cache.invalidate("supplier")
             logger.warning(f"数据删除 | 管理员删除了供应商: {s_id}")
             return True, "供应商已从名录中移除"
         except Exception as e:
@@ -207,7 +339,7 @@ class BaseInfoController:
 
     def fetch_all_suppliers(self):
         try:
-            data = self.supplier_dao.get_all()
+            data = self.cache.fetch_all("supplier", self.supplier_dao.get_all)
             return True, data
         except Exception as e:
             logger.error(f"获取供应商列表失败 | 错误: {e}")
@@ -215,9 +347,12 @@ class BaseInfoController:
 
     def fetch_supplier_by_id(self, s_id):
         try:
-            res = self.supplier_dao.get_by_id(s_id)
+            res = self.cache.fetch_one("supplier", s_id, lambda: self.supplier_dao.get_by_id(s_id))
             if not res: return False, "供应商不存在"
             return True, res
         except Exception as e:
             logger.error(f"查询单个供应商失败 | ID: {s_id} | 错误: {e}")
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+    def query_suppliers(self, keyword=None, filters=None, sort=None, descending=False, limit=100, offset=0):
+        return self._query("供应商", self.supplier_dao, keyword, filters, sort, descending, limit, offset)
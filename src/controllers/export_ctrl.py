@@ -0,0 +1,116 @@
+# src/controllers/export_ctrl.py
+import csv
+import datetime
+import importlib.util
+import os
+from contextlib import closing
+from decimal import Decimal
+from src.database.dao import ExportDAO
+from src.utils.logger import logger
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+
+def xlsx_available():
+    """XLSX 导出依赖可选的 openpyxl，未安装时只提供 CSV"""
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+class ExportCancelled(Exception):
+    """用户取消了导出"""
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        # utf-8-sig：带 BOM，Excel 直接打开中文不乱码
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        # write_only 模式逐行写出到临时文件，内存占用与总行数无关
+        self.book = Workbook(write_only=True)
+        self.sheet = self.book.create_sheet()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append([float(v) if isinstance(v, Decimal) else v for v in row])
+
+    def close(self):
+        self.book.save(self.path)
+
+
+class ExportController:
+    """
+    数据导出：销售/进货/退货历史、库存、日结汇总
+    数据经无缓冲游标按块读取、按块写入文件，内存占用恒定
+    """
+    def __init__(self):
+        self.dao = ExportDAO()
+
+    @staticmethod
+    def datasets():
+        return list(ExportDAO.DATASETS)
+
+    @staticmethod
+    def default_filename(name, fmt="csv"):
+        return f"{name}_{datetime.datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+
+    def export(self, name, path, fmt=None, progress=None, cancel_event=None, chunk_size=2000):
+        """
+        导出数据集 name 到 path
+        fmt: csv / xlsx，缺省按扩展名判断
+        progress(done, total): 每写完一块回调一次（在执行导出的线程中调用）
+        cancel_event: threading.Event，置位后在下一块之前停止，并删除未完成的文件
+        """
+        if name not in ExportDAO.DATASETS:
+            return False, f"不支持的导出数据: {name}"
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+        if fmt not in EXPORT_FORMATS:
+            return False, f"不支持的导出格式: {fmt}"
+        if fmt == "xlsx" and not xlsx_available():
+            return False, "导出 Excel 需要安装 openpyxl（pip install openpyxl），或改用 CSV 格式"
+
+        writer = None
+        done = 0
+        try:
+            total = self.dao.count_rows(name)
+            writer = _XlsxWriter(path) if fmt == "xlsx" else _CsvWriter(path)
+            writer.write_rows([ExportDAO.DATASETS[name][0]])
+            if progress: progress(0, total)
+            # 取消或写文件失败时立即关闭生成器，放弃未读完的流式结果
+            with closing(self.dao.iter_rows(name, chunk_size)) as chunks:
+                for chunk in chunks:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ExportCancelled()
+                    writer.write_rows(chunk)
+                    done += len(chunk)
+                    if progress: progress(done, max(total, done))
+            writer.close()
+            writer = None
+            logger.info(f"数据导出完成 | 数据集: {name} | 格式: {fmt} | 行数: {done} | 文件: {path}")
+            return True, f"已导出 {done} 行到 {path}"
+        except ExportCancelled:
+            logger.info(f"数据导出已取消 | 数据集: {name} | 已写入: {done} 行")
+            return False, "导出已取消"
+        except Exception as e:
+            logger.error(f"数据导出失败 | 数据集: {name} | 错误: {e}")
+            return False, f"导出失败: {str(e)}"
+        finally:
+            # 未正常完成的导出不保留半截文件
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+                if os.path.exists(path):
+                    os.remove(path)
@@ -1,4 +1,5 @@
 # src/controllers/finance_ctrl.py
+import datetime
 from src.database.dao import FinanceDAO
 from src.utils.logger import logger  
 
@@ -11,7 +12,7 @@ class FinanceController:
         logger.debug("正在请求日销售统计流水数据...")
         try:
             data = self.dao.get_daily_summaries()
-            logger.info(f"成功获取日统计数据，共 {len(data)} 条记录")
+            logger.info("成功获取日统计数据，共 %s 条记录", len(data))
             return True, data
         except Exception as e:
             logger.error(f"获取日统计流水失败: {e}")
@@ -41,4 +42,77 @@ class FinanceController:
             return True, data
         except Exception as e:
             logger.error(f"生成 {year}-{month} 月度报表时发生异常: {e}")
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+    @staticmethod
+    def _or_zero(data, prefix):
+        """汇总查询无数据时 SUM 返回 NULL，统一换成 0"""
+        keys = [f"{prefix}_{k}" for k in ("sales", "return", "net", "orders")]
+        if not data or data.get(keys[0]) is None:
+            return {k: 0 for k in keys}
+        return data
+
+    def get_quarterly_summary(self, year, quarter):
+        """获取季度统计数据（quarter: 1~4）"""
+        if int(quarter) not in (1, 2, 3, 4):
+            return False, "季度必须为 1~4"
+        try:
+            data = self._or_zero(self.dao.get_quarterly_report(year, quarter), "quarter")
+            logger.info(f"季度报表生成成功: {year}年第{quarter}季度 | 销售额: {data['quarter_sales']}")
+            return True, data
+        except Exception as e:
+            logger.error(f"生成 {year}-Q{quarter} 季度报表时发生异常: {e}")
+            return False, str(e)
+
+    def get_yearly_summary(self, year):
+        """获取年度统计数据"""
+        try:
+            data = self._or_zero(self.dao.get_yearly_report(year), "year")
+            logger.info(f"年度报表生成成功: {year}年 | 销售额: {data['year_sales']}")
+            return True, data
+        except Exception as e:
+            logger.error(f"生成 {year} 年度报表时发生异常: {e}")
+            return False, str(e)
+
+    def get_range_summary(self, start_date, end_date):
+        """获取任意日期区间（含首尾）的统计数据；日期可为 date 或 'YYYY-MM-DD' 字符串"""
+        try:
+            if isinstance(start_date, str):
+                start_date = datetime.date.fromisoformat(start_date)
+            if isinstance(end_date, str):
+                end_date = datetime.date.fromisoformat(end_date)
+            if start_date > end_date:
+                return False, "开始日期不能晚于结束日期"
+            data = self._or_zero(self.dao.get_range_report(start_date, end_date), "period")
+            return True, data
+        except Exception as e:
+            logger.error(f"生成区间报表 {start_date} ~ {end_date} 时发生异常: {e}")
+            return False, str(e)
+
+    def get_monthly_trend(self, start_year, end_year):
+        """多年逐月趋势（来自月汇总表，每月一行）"""
+        try:
+            data = self.dao.get_monthly_trend(start_year, end_year)
+            logger.debug("月度趋势加载成功 | %s~%s | 月份数: %s", start_year, end_year, len(data))
+            return True, data
+        except Exception as e:
+            logger.error(f"获取月度趋势失败: {e}")
+            return False, str(e)
+
+    def get_yearly_trend(self, start_year, end_year):
+        """多年逐年趋势（来自年汇总表）"""
+        try:
+            return True, self.dao.get_yearly_trend(start_year, end_year)
+        except Exception as e:
+            logger.error(f"获取年度趋势失败: {e}")
+            return False, str(e)
+
+    def rebuild_rollups(self):
+        """按日汇总表重建月/年汇总表"""
+        try:
+            months, years = self.dao.rebuild_rollups()
+            logger.info(f"月/年汇总表重建完成 | 月份: {months} | 年份: {years}")
+            return True, f"汇总表已重建（{months} 个月，{years} 个年度）"
+        except Exception as e:
+            logger.error(f"重建月/年汇总表失败: {e}")
+            return False, str(e)
@@ -0,0 +1,255 @@
+# src/controllers/import_ctrl.py
+import csv
+import datetime
+import os
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from pymysql import MySQLError
+from src.database.dao import ImportDAO
+from src.database.cache import get_master_cache
+from src.utils.logger import logger
+
+CHUNK_SIZE = 2000   # 每批校验、写入的行数
+
+# 导入字段：
+#   column   : 数据库列名（CSV 表头可以用列名，也可以用 label）
+#   label    : 中文表头
+#   kind     : text / date / money / int
+#   max_len  : text 的最大长度
+#   required : 是否必填
+Field = namedtuple("Field", ["column", "label", "kind", "max_len", "required"], defaults=(None, True))
+
+# 导入规格：目标表、主键列、字段、需要预先存在的外键（表, 列）、对应的基础资料缓存实体
+ImportSpec = namedtuple("ImportSpec", ["title", "table", "keys", "fields", "foreign_key", "cache_entity"])
+
+IMPORT_SPECS = {
+    "medicine": ImportSpec("药品目录", "medicine", ("medicine_id",), [
+        Field("medicine_id", "药品ID", "text", 10),
+        Field("medicine_name", "药品名称", "text", 50),
+        Field("category", "分类", "text", 50),
+        Field("specification", "规格", "text", 50),
+        Field("manufacturer", "生产厂家", "text", 50),
+        Field("production_date", "生产日期", "date"),
+        Field("expiry_date", "有效期至", "date"),
+        Field("retail_price", "零售价", "money"),
+        Field("description", "药品说明", "text", 200, False),
+    ], None, "medicine"),
+    "customer": ImportSpec("客户", "customer", ("cust_id",), [
+        Field("cust_id", "客户ID", "text", 10),
+        Field("cust_name", "客户姓名", "text", 10),
+        Field("phone", "联系电话", "text", 11),
+        Field("address", "地址", "text", 50),
+    ], None, "customer"),
+    "opening_stock": ImportSpec("期初库存", "inventory", ("medicine_id",), [
+        Field("medicine_id", "药品ID", "text", 10),
+        Field("stock_quantity", "库存总量", "int"),
+        Field("low_stock_threshold", "预警阈值", "int", None, False),
+    ], ("medicine", "medicine_id"), None),
+}
+
+
+def _convert(field, raw):
+    """把 CSV 文本转换为列值；不合法时抛出 ValueError（消息即错误原因）"""
+    value = (raw or "").strip()
+    if not value:
+        if field.required:
+            raise ValueError(f"{field.label}不能为空")
+        return None
+    if field.kind == "text":
+        if field.max_len and len(value) > field.max_len:
+            raise ValueError(f"{field.label}超过 {field.max_len} 个字符")
+        return value
+    if field.kind == "date":
+        try:
+            return datetime.date.fromisoformat(value.replace("/", "-"))
+        except ValueError:
+            raise ValueError(f"{field.label}不是有效日期（YYYY-MM-DD）: {value}")
+    if field.kind == "money":
+        try:
+            amount = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"{field.label}不是有效金额: {value}")
+        if amount < 0:
+            raise ValueError(f"{field.label}不能为负数")
+        return amount
+    if field.kind == "int":
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"{field.label}不是整数: {value}")
+        if number < 0:
+            raise ValueError(f"{field.label}不能为负数")
+        return number
+    return value
+
+
+class ImportController:
+    """
+    CSV 批量导入：药品目录、客户、期初库存
+    - 按 CHUNK_SIZE 分块读取并校验，合法行用多行 upsert 一次写入（已存在的主键被覆盖更新）
+    - 每块一个事务；块写入失败时退回逐行写入，定位出具体的出错行
+    - 所有不合法行写入错误报告 CSV（原始内容 + 行号 + 原因）
+    """
+    def __init__(self):
+        self.dao = ImportDAO()
+
+    @staticmethod
+    def entities():
+        return {name: spec.title for name, spec in IMPORT_SPECS.items()}
+
+    @staticmethod
+    def template_header(entity):
+        """导入模板表头（中文）"""
+        return [f.label for f in IMPORT_SPECS[entity].fields]
+
+    @staticmethod
+    def _map_header(spec, header):
+        """
+        CSV 表头 -> 字段下标；表头既可用数据库列名也可用中文名
+        文件中没有的非必填列不参与写入（已有记录的该列保持原值，新记录取列的默认值）
+        """
+        lookup = {}
+        for f in spec.fields:
+            lookup[f.column.lower()] = f
+            lookup[f.label] = f
+        mapping = {}
+        for i, name in enumerate(header):
+            name = name.strip()
+            f = lookup.get(name.lower()) or lookup.get(name)
+            if f is not None:
+                mapping[f.column] = i
+        missing = [f.label for f in spec.fields if f.required and f.column not in mapping]
+        if missing:
+            raise ValueError(f"CSV 缺少必需的列: {', '.join(missing)}")
+        return mapping
+
+    @staticmethod
+    def _present_fields(spec, mapping):
+        """CSV 中出现的字段（按规格顺序），即本次写入的列"""
+        return [f for f in spec.fields if f.column in mapping]
+
+    def _validate_chunk(self, spec, mapping, chunk):
+        """校验一块原始行，返回 (合法行 [(行号, 值元组)], 错误 [(行号, 原始行, 原因)])，值按 _present_fields 顺序"""
+        fields = self._present_fields(spec, mapping)
+        good, errors = [], []
+        for line_no, raw in chunk:
+            try:
+                values = []
+                for f in fields:
+                    idx = mapping[f.column]
+                    values.append(_convert(f, raw[idx] if idx < len(raw) else ""))
+                row = dict(zip((f.column for f in fields), values))
+                if spec.table == "medicine" and row["expiry_date"] < row["production_date"]:
+                    raise ValueError("有效期不能早于生产日期")
+                good.append((line_no, tuple(values)))
+            except ValueError as e:
+                errors.append((line_no, raw, str(e)))
+
+        if spec.foreign_key and good:
+            # 外键预检：整块一次查询，避免触发外键错误后再逐行重试
+            table, column = spec.foreign_key
+            pos = [f.column for f in fields].index(column)
+            known = self.dao.existing_keys(table, column, [v[pos] for _, v in good])
+            still_good = []
+            for line_no, values in good:
+                if values[pos] in known:
+                    still_good.append((line_no, values))
+                else:
+                    errors.append((line_no, None, f"{table} 中不存在 {values[pos]}"))
+            good = still_good
+        return good, errors
+
+    def _write_chunk(self, spec, columns, good):
+        """写入一块合法行（只写 columns 这些列）；返回写入失败的 [(行号, 原因)]"""
+        try:
+            with self.dao.db.transaction() as cursor:
+                self.dao.upsert(cursor, spec.table, columns, spec.keys, [v for _, v in good])
+            return []
+        except MySQLError as e:
+            logger.warning(f"批量写入失败，改为逐行写入定位错误 | 表: {spec.table} | 原因: {e}")
+        failed = []
+        for line_no, values in good:
+            try:
+                with self.dao.db.session() as cursor:
+                    self.dao.upsert(cursor, spec.table, columns, spec.keys, [values])
+            except MySQLError as e:
+                failed.append((line_no, str(e.args[1] if len(e.args) > 1 else e)))
+        return failed
+
+    @staticmethod
+    def _read_chunks(reader, start_line=2):
+        chunk = []
+        for line_no, raw in enumerate(reader, start=start_line):
+            if not any(cell.strip() for cell in raw):
+                continue  # 跳过空行
+            chunk.append((line_no, raw))
+            if len(chunk) >= CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _write_error_report(self, path, header, errors):
+        base, _ = os.path.splitext(path)
+        report = f"{base}_errors_{datetime.datetime.now():%Y%m%d_%H%M%S}.csv"
+        with open(report, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["行号", "错误原因"] + header)
+            for line_no, raw, reason in sorted(errors, key=lambda e: e[0]):
+                writer.writerow([line_no, reason] + (raw or []))
+        return report
+
+    def import_csv(self, entity, path, progress=None, cancel_event=None):
+        """
+        导入 CSV 文件
+        progress(done_rows): 每处理完一块回调一次；cancel_event 置位后在下一块之前停止（已提交的块保留）
+        返回 (success, 结果字典)：total / imported / failed / seconds / rows_per_sec / error_report / cancelled
+        """
+        spec = IMPORT_SPECS.get(entity)
+        if spec is None:
+            return False, f"不支持的导入类型: {entity}"
+        start = time.perf_counter()
+        total = imported = 0
+        errors = []
+        cancelled = False
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if not header:
+                    return False, "CSV 文件为空"
+                mapping = self._map_header(spec, header)
+                columns = [f.column for f in self._present_fields(spec, mapping)]
+                for chunk in self._read_chunks(reader):
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+                    total += len(chunk)
+                    good, bad = self._validate_chunk(spec, mapping, chunk)
+                    if good:
+                        failed = self._write_chunk(spec, columns, good)
+                        imported += len(good) - len(failed)
+                        bad += [(line_no, None, reason) for line_no, reason in failed]
+                    if bad:
+                        raws = dict(chunk)
+                        errors += [(line_no, raw if raw is not None else raws.get(line_no), reason)
+                                   for line_no, raw, reason in bad]
+                    if progress: progress(total)
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            logger.error(f"批量导入发生异常 | 类型: {entity} | 文件: {path} | 错误: {e}")
+            return False, f"导入失败: {str(e)}"
+        finally:
+            if imported and spec.cache_entity:
+                get_master_cache().invalidate(spec.cache_entity)
+
+        seconds = time.perf_counter() - start
+        result = {"total": total, "imported": imported, "failed": len(errors), "seconds": round(seconds, 3),
+                  "rows_per_sec": round(total / seconds) if seconds > 0 else 0,
+                  "error_report": self._write_error_report(path, header, errors) if errors else None,
+                  "cancelled": cancelled}
+        logger.info(f"批量导入完成 | 类型: {spec.title} | 总行数: {total} | 成功: {imported} | "
+                    f"失败: {len(errors)} | 速度: {result['rows_per_sec']} 行/秒")
+        return True, result
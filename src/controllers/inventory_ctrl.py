@@ -1,19 +1,43 @@
 # src/controllers/inventory_ctrl.py
 from src.database.dao import InventoryDAO
+from src.database.db_manager import is_connection_error
+from src.database.offline_queue import get_offline_queue
 from src.utils.logger import logger  
 from pymysql import MySQLError
 
+DEFAULT_LOW_STOCK_THRESHOLD = 10  # 未单独设置阈值的药品使用的低库存预警值
+CHANGE_LOG_RETENTION = 3600       # 库存变动日志保留秒数：多台收银机各自监控同一张日志表，只清理都已处理过的旧记录
+CHANGE_LOG_SETTLE_LAG = 10        # 变动日志写入超过该秒数后才推进监控水位（更早分配的流水号可能晚提交）
+
 class InventoryController:
     def __init__(self):
         self.dao = InventoryDAO()
+        self.offline = get_offline_queue()
+
+    def _offline_fallback(self, e=None):
+        """离线收银期间（或刚发生连接失败）改用本地库存快照；快照已扣除待同步的离线销售"""
+        if self.offline is None:
+            return False
+        if e is not None:
+            if not is_connection_error(e):
+                return False
+            self.offline.mark_offline()
+        return self.offline.active()
 
     def get_full_report(self):
-        """获取全量库存列表"""
+        """获取全量库存列表（离线时返回本地库存快照）"""
         logger.debug("正在请求全量库存报表数据...")
+        if self._offline_fallback():
+            return True, [row for row in self.offline.snapshot_rows() if row['stock_quantity'] > 0]
         try:
             data = self.dao.get_inventory_report()
-            logger.info(f"全量库存报表加载成功 | 药品种类: {len(data)}")
+            logger.info("全量库存报表加载成功 | 药品种类: %s", len(data))
             return True, data
+        except MySQLError as e:
+            if self._offline_fallback(e):
+                return True, [row for row in self.offline.snapshot_rows() if row['stock_quantity'] > 0]
+            logger.error(f"获取库存报表发生异常: {e}")
+            return False, f"获取库存报表失败: {str(e)}"
         except Exception as e:
             logger.error(f"获取库存报表发生异常: {e}")
             return False, f"获取库存报表失败: {str(e)}"
@@ -24,14 +48,14 @@ class InventoryController:
             logger.warning("查询单个库存失败：未提供药品ID")
             return False, "药品ID不能为空"
             
-        logger.debug(f"正在查询特定药品库存 | ID: {m_id}")
+        logger.debug("正在查询特定药品库存 | ID: %s", m_id)
         try:
             res = self.dao.get_by_id(m_id)
             if not res:
-                logger.info(f"查询结果为空 | 药品ID: {m_id} 尚未入库或不存在")
+                logger.info("查询结果为空 | 药品ID: %s 尚未入库或不存在", m_id)
                 return False, "该药品目前暂无库存记录（或尚未入库）"
             
-            logger.info(f"查询库存成功 | ID: {m_id} | 当前数量: {res['stock_quantity']}")
+            logger.info("查询库存成功 | ID: %s | 当前数量: %s", m_id, res['stock_quantity'])
             return True, res
         except MySQLError as e:
             logger.error(f"查询药品库存数据库报错 | ID: {m_id} | 错误: {e}")
@@ -40,23 +64,137 @@ class InventoryController:
             logger.error(f"查询药品库存系统异常 | ID: {m_id} | 错误: {e}")
             return False, f"系统异常: {str(e)}"
 
-    def check_low_stock(self, threshold=10):
+    def _snapshot_lookup(self, m_id):
+        rows = self.offline.snapshot_rows([m_id])
+        return (True, rows[0]) if rows else (False, "本地库存快照中没有该药品")
+
+    def pos_lookup(self, m_id):
+        """收银台选药：一次查询返回售价、库存、规格与效期（离线时查本地库存快照）"""
+        if not m_id:
+            return False, "药品ID不能为空"
+        if self._offline_fallback():
+            return self._snapshot_lookup(m_id)
+        try:
+            res = self.dao.pos_lookup(m_id)
+            if not res:
+                return False, "未找到该药品信息"
+            return True, res
+        except MySQLError as e:
+            if self._offline_fallback(e):
+                return self._snapshot_lookup(m_id)
+            logger.error(f"收银台药品查询数据库报错 | ID: {m_id} | 错误: {e}")
+            return False, f"查询数据库失败: {str(e)}"
+        except Exception as e:
+            logger.error(f"收银台药品查询系统异常 | ID: {m_id} | 错误: {e}")
+            return False, f"系统异常: {str(e)}"
+
+    def pos_lookup_batch(self, m_ids):
+        """批量选药（如扫码整篮）：返回 {medicine_id: 记录}，一次往返完成；m_ids 可以是任意可迭代对象"""
+        m_ids = list(m_ids)
+        try:
+            res = self.dao.pos_lookup_batch(m_ids)
+            missing = [m for m in m_ids if m not in res]
+            if missing:
+                logger.warning(f"批量查询中有未登记的药品 | ID: {missing}")
+            return True, res
+        except MySQLError as e:
+            logger.error(f"批量药品查询数据库报错 | 数量: {len(m_ids)} | 错误: {e}")
+            return False, f"查询数据库失败: {str(e)}"
+        except Exception as e:
+            logger.error(f"批量药品查询系统异常 | 数量: {len(m_ids)} | 错误: {e}")
+            return False, f"系统异常: {str(e)}"
+
+    def check_low_stock(self, threshold=DEFAULT_LOW_STOCK_THRESHOLD):
         """
-        逻辑处理：从全量数据中过滤出低于预警值的药品
+        低库存扫描：过滤在数据库端完成（按药品各自阈值，未设置的用 threshold），只返回低库存药品
         """
-        logger.info(f"启动低库存自动扫描 | 预警阈值: {threshold}")
+        logger.info(f"启动低库存扫描 | 默认阈值: {threshold}")
         try:
-            all_data = self.dao.get_inventory_report()
-            low_stock_list = [item for item in all_data if item['stock_quantity'] < threshold]
-            
+            low_stock_list = self.dao.get_low_stock(threshold)
             if low_stock_list:
-                logger.warning(f"库存预警！发现 {len(low_stock_list)} 种药品库存低于 {threshold}")
-                for item in low_stock_list:
-                    logger.debug(f"低库存详情 | 名称: {item['medicine_name']} | 剩余: {item['stock_quantity']}")
+                logger.warning(f"库存预警！发现 {len(low_stock_list)} 种药品库存低于预警值")
             else:
                 logger.info("库存状态良好，未发现低库存药品")
-                
             return True, low_stock_list
         except Exception as e:
             logger.error(f"执行低库存扫描时发生异常: {e}")
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+    def set_low_stock_threshold(self, m_id, threshold):
+        """设置单个药品的预警阈值；None 表示恢复默认值"""
+        if threshold is not None and threshold < 0:
+            return False, "预警阈值不能为负数"
+        try:
+            if not self.dao.set_low_stock_threshold(m_id, threshold):
+                return False, "该药品目前暂无库存记录（或尚未入库）"
+            logger.info(f"设置低库存阈值 | ID: {m_id} | 阈值: {threshold}")
+            return True, "预警阈值已更新"
+        except Exception as e:
+            logger.error(f"设置低库存阈值失败 | ID: {m_id} | 错误: {e}")
+            return False, str(e)
+
+
+class LowStockMonitor:
+    """
+    增量低库存监控
+    - start() 做一次下推扫描，记下当前低库存集合和变动日志水位
+    - poll() 只读取水位之后变动过的药品（inventory_change_log 由库存触发器写入），
+      与已知状态比较后返回事件：{"event": "low" | "recovered", ...药品信息}
+    - 自增流水号不按提交顺序可见：水位只推进到写入已超过 settle_lag 秒的流水号，
+      之后的区间每轮重新扫描（与已知状态比较，重复扫描不会产生重复事件）
+    - 处理完后清理水位以内、早于 retention 秒的日志（按数据库时钟），日志表不会无限增长
+    """
+    def __init__(self, threshold=DEFAULT_LOW_STOCK_THRESHOLD, retention=CHANGE_LOG_RETENTION,
+                 settle_lag=CHANGE_LOG_SETTLE_LAG):
+        self.dao = InventoryDAO()
+        self.threshold = threshold
+        self.retention = retention
+        self.settle_lag = settle_lag
+        self.last_id = None
+        self.low = {}   # medicine_id -> 记录（当前处于低库存状态的药品）
+
+    def start(self):
+        self.last_id = self.dao.get_settled_change_id(0, self.settle_lag)
+        self.low = {row['medicine_id']: row for row in self.dao.get_low_stock(self.threshold)}
+        logger.info(f"低库存监控已启动 | 当前低库存: {len(self.low)} 种 | 日志水位: {self.last_id}")
+        return [dict(row, event="low") for row in self.low.values()]
+
+    def poll(self):
+        """检查上次水位之后的库存变动，返回状态发生变化的药品事件列表"""
+        if self.last_id is None:
+            return self.start()
+        latest = self.dao.get_latest_change_id()
+        if latest <= self.last_id:
+            return []
+        changed = self.dao.get_changed_stock(self.last_id, latest, self.threshold)
+        # 只推进到已扫描过的区间内
+        settled = min(self.dao.get_settled_change_id(self.last_id, self.settle_lag), latest)
+        self.last_id = max(self.last_id, settled)
+        self._purge_log()
+
+        events = []
+        for row in changed:
+            m_id = row['medicine_id']
+            is_low = row['stock_quantity'] < row['threshold']
+            if is_low and m_id not in self.low:
+                events.append(dict(row, event="low"))
+            elif not is_low and m_id in self.low:
+                events.append(dict(row, event="recovered"))
+            if is_low:
+                self.low[m_id] = row
+            else:
+                self.low.pop(m_id, None)
+        if events:
+            n_low = sum(1 for e in events if e['event'] == "low")
+            logger.warning(f"库存预警变化 | 新增低库存: {n_low} 种 | 恢复: {len(events) - n_low} 种 | 检查药品: {len(changed)} 种")
+        return events
+
+    def _purge_log(self):
+        """清理已处理的旧日志；失败只记录警告，不影响本次检查结果"""
+        try:
+            purged = self.dao.purge_change_log(self.last_id, self.retention)
+        except Exception as e:
+            logger.warning(f"清理库存变动日志失败 | 水位: {self.last_id} | 错误: {e}")
+            return
+        if purged:
+            logger.debug("已清理库存变动日志 | 条数: %s | 水位: %s", purged, self.last_id)
@@ -19,7 +19,7 @@ class PurchaseController:
         
         try:
             # 执行 DAO 操作，这会触发数据库的库存增加和总价计算触发器
-            self.dao.register_purchase(order_id, supp_id, emp_id, invoice, remark, items)
+            self.dao.register_purchase(order_id, supp_id, emp_id, invoice, remark, items, bulk=True)
             
             logger.info(f"入库登记成功 | 单号: {order_id} | 品种数: {len(items)}")
             return True, "入库登记成功！"
@@ -41,25 +41,38 @@ class PurchaseController:
         logger.debug("正在请求进货历史列表...")
         try:
             data = self.dao.get_all_orders()
-            logger.info(f"成功加载进货历史 | 记录数: {len(data)}")
+            logger.info("成功加载进货历史 | 记录数: %s", len(data))
             return True, data
         except Exception as e:
             logger.error(f"加载进货历史失败 | 错误: {e}")
             return False, str(e)
 
+    def get_purchase_history_page(self, cursor=None, page_size=50, direction="next"):
+        """
+        分页获取进货主单（键集分页）
+        cursor: 上一页返回的 last（向后翻）或 first（向前翻）；None 表示最新一页
+        """
+        logger.debug("请求进货历史分页 | 游标: %s | 方向: %s | 每页: %s", cursor, direction, page_size)
+        try:
+            page = self.dao.get_orders_page(page_size, cursor, direction)
+            return True, page
+        except Exception as e:
+            logger.error(f"进货历史分页加载失败 | 错误: {e}")
+            return False, str(e)
+
     def get_order_details(self, order_id):
         """查看具体某一笔进货单的药品明细"""
         if not order_id:
             return False, "进货单号不能为空"
 
-        logger.debug(f"正在查询进货明细详情 | 单号: {order_id}")
+        logger.debug("正在查询进货明细详情 | 单号: %s", order_id)
         try:
             details = self.dao.get_order_details(order_id)
             if not details:
                 logger.warning(f"明细查询结果为空 | 单号: {order_id}")
                 return False, "未找到该进货单明细"
                 
-            logger.info(f"明细查询成功 | 单号: {order_id} | 项目数: {len(details)}")
+            logger.info("明细查询成功 | 单号: %s | 项目数: %s", order_id, len(details))
             return True, details
         except Exception as e:
             logger.error(f"查询单据 {order_id} 明细时发生系统错误: {e}")
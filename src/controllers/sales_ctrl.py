@@ -1,28 +1,42 @@
 # src/controllers/sales_ctrl.py
-from src.database.dao import SalesDAO
+import time
+from src.database.dao import SalesDAO, InventoryDAO
+from src.database.db_manager import PoolTimeoutError, is_connection_error
+from src.database.offline_queue import OfflineReturnError, OfflineStockError, get_offline_queue
+from src.utils.config_loader import add_settings_listener, get_settings
 from src.utils.logger import logger 
 from pymysql import MySQLError
 
 class SalesController:
     def __init__(self):
         self.dao = SalesDAO()
+        self.offline = get_offline_queue()
 
     # --- 提交销售逻辑 ---
     def submit_sale(self, sales_id, cust_id, emp_id, remark, items):
-        """提交新销售订单"""
+        """提交新销售订单；中心库不可达（或仍有离线单据待同步）时写入本地离线队列"""
         if not items:
             logger.warning(f"销售尝试失败 | 单号: {sales_id} | 原因: 未选择药品")
             return False, "未选择任何药品！"
+
+        # 离线期间以及积压单据同步完之前，新单据也排在队列后面，保证按收银顺序写入中心库
+        if self.offline is not None and self.offline.active():
+            return self._submit_offline(sales_id, cust_id, emp_id, remark, items)
         
         logger.info(f"正在提交销售结账 | 单号: {sales_id} | 客户: {cust_id} | 经办人: {emp_id}")
         try:
             # 这里的 register_sale 内部会触发：扣减库存、计算总价、更新财务日结
-            self.dao.register_sale(sales_id, cust_id, emp_id, remark, items)
+            self.dao.register_sale(sales_id, cust_id, emp_id, remark, items, bulk=True)
+            self._copy_locally(self.offline and self.offline.record_sale, sales_id, items)
             
             logger.info(f"销售结账成功 | 单号: {sales_id} | 项目数: {len(items)}")
             return True, "销售结账成功！"
             
         except MySQLError as e:
+            if self.offline is not None and is_connection_error(e):
+                # 连接失败时单据可能已提交，也可能没有；重放按单号幂等，两种情况都不会重复记账
+                self.offline.mark_offline()
+                return self._submit_offline(sales_id, cust_id, emp_id, remark, items)
             # 重点捕获：tri_sales_reduce_stock 抛出的“库存不足”
             err_msg = e.args[1] if len(e.args) > 1 else str(e)
             logger.warning(f"销售被业务逻辑拦截 | 单号: {sales_id} | 原因: {err_msg}")
@@ -32,18 +46,50 @@ class SalesController:
             logger.error(f"销售系统异常 | 单号: {sales_id} | 错误: {e}")
             return False, f"系统错误: {str(e)}"
 
+    def _submit_offline(self, sales_id, cust_id, emp_id, remark, items):
+        """离线受理：按本地库存快照校验后写入离线队列"""
+        try:
+            if not self.offline.enqueue_sale(sales_id, cust_id, emp_id, remark, items):
+                return False, f"单号 {sales_id} 已在离线队列中，请勿重复提交"
+        except OfflineStockError as e:
+            logger.warning(f"离线销售被拦截 | 单号: {sales_id} | 原因: {e}")
+            return False, f"销售拦截：{e}"
+        except Exception as e:
+            logger.error(f"离线销售写入本地队列失败 | 单号: {sales_id} | 错误: {e}")
+            return False, f"系统错误: {str(e)}"
+        logger.info("销售已离线受理 | 单号: %s | 项目数: %s | 待同步: %s", sales_id, len(items),
+                    self.offline.pending_count)
+        return True, f"销售结账成功（离线受理，待同步 {self.offline.pending_count} 笔）"
+
+    def _copy_locally(self, record, sales_id, items):
+        """在线单据写入后同步更新本地销售副本；失败只影响之后的离线退货，不影响本次结果"""
+        if not record:
+            return
+        try:
+            record(sales_id, items)
+        except Exception as e:
+            logger.warning(f"本地销售副本更新失败 | 单号: {sales_id} | 错误: {e}")
+
     # --- 处理退货逻辑 ---
     def process_return(self, return_id, sales_id, emp_id, cust_id, amount, reason, items):
-        """处理退货请求"""
+        """处理退货请求；中心库不可达（或仍有离线单据待同步）时按本地销售副本校验后写入离线队列"""
+        if self.offline is not None and self.offline.active():
+            return self._return_offline(return_id, sales_id, emp_id, cust_id, amount, reason, items)
+
         logger.info(f"正在处理退货申请 | 退货单: {return_id} | 原单号: {sales_id}")
         try:
             # 这里的 register_return 内部会触发：回升库存、冲减财务日结
-            self.dao.register_return(return_id, sales_id, emp_id, cust_id, amount, reason, items)
+            self.dao.register_return(return_id, sales_id, emp_id, cust_id, amount, reason, items, bulk=True)
+            self._copy_locally(self.offline and self.offline.record_return, sales_id, items)
             
             logger.info(f"退货处理完成 | 退货单: {return_id} | 金额: {amount}")
             return True, "退货处理完成。"
             
         except MySQLError as e:
+            if self.offline is not None and is_connection_error(e):
+                # 同销售：重放按退货单号幂等
+                self.offline.mark_offline()
+                return self._return_offline(return_id, sales_id, emp_id, cust_id, amount, reason, items)
             err_msg = e.args[1] if len(e.args) > 1 else str(e)
             logger.warning(f"退货被拦截 | 退货单: {return_id} | 原因: {err_msg}")
             return False, f"退货失败: {err_msg}"
@@ -52,26 +98,57 @@ class SalesController:
             logger.error(f"退货过程发生非预期异常 | 退货单: {return_id} | 错误: {e}")
             return False, str(e)
 
+    def _return_offline(self, return_id, sales_id, emp_id, cust_id, amount, reason, items):
+        """离线受理退货：按本地销售副本校验可退数量后写入离线队列"""
+        try:
+            if not self.offline.enqueue_return(return_id, sales_id, emp_id, cust_id, amount, reason, items):
+                return False, f"退货单 {return_id} 已在离线队列中，请勿重复提交"
+        except OfflineReturnError as e:
+            logger.warning(f"离线退货被拦截 | 退货单: {return_id} | 原因: {e}")
+            return False, f"退货失败: {e}"
+        except Exception as e:
+            logger.error(f"离线退货写入本地队列失败 | 退货单: {return_id} | 错误: {e}")
+            return False, str(e)
+        logger.info("退货已离线受理 | 退货单: %s | 原单号: %s | 待同步: %s", return_id, sales_id,
+                    self.offline.pending_count)
+        return True, f"退货处理完成（离线受理，待同步 {self.offline.pending_count} 笔）。"
+
     # --- 查询相关函数 ---
     def get_history(self):
         """获取所有历史销售主单列表"""
         logger.debug("请求销售历史列表...")
         try:
             data = self.dao.get_sales_history()
-            logger.info(f"销售历史加载成功 | 记录数: {len(data)}")
+            logger.info("销售历史加载成功 | 记录数: %s", len(data))
             return True, data
         except Exception as e:
             logger.error(f"销售历史加载失败: {e}")
             return False, str(e)
 
+    def get_history_page(self, cursor=None, page_size=50, direction="next"):
+        """
+        分页获取销售主单（键集分页）
+        cursor: 上一页返回的 last（向后翻）或 first（向前翻）；None 表示最新一页
+        """
+        logger.debug("请求销售历史分页 | 游标: %s | 方向: %s | 每页: %s", cursor, direction, page_size)
+        try:
+            page = self.dao.get_sales_history_page(page_size, cursor, direction)
+            return True, page
+        except Exception as e:
+            logger.error(f"销售历史分页加载失败: {e}")
+            return False, str(e)
+
     def get_order_details(self, sales_id):
         """查看具体某一笔销售单的药品明细"""
         if not sales_id:
             return False, "销售单号不能为空"
             
-        logger.debug(f"查询销售明细 | 单号: {sales_id}")
+        logger.debug("查询销售明细 | 单号: %s", sales_id)
         try:
-            details = self.dao.get_sale_details(sales_id)
+            if self.offline is not None and self.offline.is_offline():
+                details = self.offline.sale_items(sales_id)
+            else:
+                details = self._sale_details_online(sales_id)
             if not details:
                 logger.warning(f"未找到单号 {sales_id} 的明细记录")
                 return False, "未找到该订单的药品明细"
@@ -80,23 +157,43 @@ class SalesController:
             logger.error(f"查询单号 {sales_id} 明细失败: {e}")
             return False, f"查询明细失败: {str(e)}"
         
+    def _sale_details_online(self, sales_id):
+        try:
+            return self.dao.get_sale_details(sales_id)
+        except MySQLError as e:
+            if self.offline is None or not is_connection_error(e):
+                raise
+            # 中心库不可达：改用本地销售副本，离线期间仍可查看明细并办理退货
+            self.offline.mark_offline()
+            return self.offline.sale_items(sales_id)
+
     def get_return_history(self):
         """获取所有退货记录"""
         logger.debug("请求退货历史列表...")
         try:
             data = self.dao.get_return_history()
-            logger.info(f"退货历史加载成功 | 记录数: {len(data)}")
+            logger.info("退货历史加载成功 | 记录数: %s", len(data))
             return True, data
         except Exception as e:
             logger.error(f"退货历史加载失败: {e}")
             return False, str(e)
         
+    def get_return_history_page(self, cursor=None, page_size=50, direction="next"):
+        """分页获取退货记录（键集分页），参数含义同 get_history_page"""
+        logger.debug("请求退货历史分页 | 游标: %s | 方向: %s | 每页: %s", cursor, direction, page_size)
+        try:
+            page = self.dao.get_return_history_page(page_size, cursor, direction)
+            return True, page
+        except Exception as e:
+            logger.error(f"退货历史分页加载失败: {e}")
+            return False, str(e)
+
     def get_return_details(self, return_id):
         """获取某一退货单的明细数据"""
         if not return_id:
             return False, "退货单号不能为空"
 
-        logger.debug(f"查询退货明细 | 退货单: {return_id}")
+        logger.debug("查询退货明细 | 退货单: %s", return_id)
         try:
             data = self.dao.get_return_details(return_id)
             if not data:
@@ -105,4 +202,98 @@ class SalesController:
             return True, data
         except Exception as e:
             logger.error(f"查询退货明细 {return_id} 失败: {e}")
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+
+class OfflineSync:
+    """
+    离线单据同步：由主窗口定时调用 sync()
+    - 处于离线重试间隔内时直接跳过；否则按入队顺序逐单重放（销售与退货），单号已存在的单据视为已同步
+    - 中心库拒绝的单据（业务规则拦截）转入失败状态；连接再次失败则标记离线、保留剩余单据
+    - 队列清空后若库存快照已过期（或本次启动后尚未刷新过），从中心库刷新快照；
+      快照保存在队列文件中，下次离线启动时直接使用
+    """
+    def __init__(self, queue=None):
+        config = get_settings().offline
+        self.queue = queue or get_offline_queue()
+        self.dao = SalesDAO()
+        self.inventory_dao = InventoryDAO()
+        self.batch = config.sync_batch
+        self.snapshot_ttl = config.snapshot_ttl
+        self._snapshot_fresh = False   # 本次启动后是否已从中心库刷新过快照
+        add_settings_listener(self._apply_settings)
+
+    def _apply_settings(self, old, new):
+        """配置热加载：同步批量、快照刷新间隔与离线重试间隔即时生效（队列文件位置需重启后生效）"""
+        if old.offline == new.offline:
+            return
+        self.batch = new.offline.sync_batch
+        self.snapshot_ttl = new.offline.snapshot_ttl
+        if self.queue is not None:
+            self.queue.retry_interval = new.offline.retry_interval
+        logger.info("离线收银配置已更新 | %s", new.offline)
+
+    def sync(self):
+        """同步一轮，返回队列统计（见 OfflineQueue.snapshot）"""
+        queue = self.queue
+        if queue is None:
+            return None
+        if queue.is_offline():
+            return queue.snapshot()
+        try:
+            if queue.pending_count:
+                self._replay()
+            if not queue.pending_count:
+                age = queue.snapshot_age()
+                if not self._snapshot_fresh or age is None or age >= self.snapshot_ttl:
+                    queue.replace_snapshot(self.inventory_dao.get_pos_snapshot())
+                    queue.prune_sale_copies()
+                    self._snapshot_fresh = True
+            queue.mark_online()
+        except PoolTimeoutError as e:
+            logger.warning(f"离线单据同步暂停：{e}")
+        except MySQLError as e:
+            if not is_connection_error(e):
+                raise
+            queue.mark_offline()
+        return queue.snapshot()
+
+    def _replay(self):
+        queue = self.queue
+        start = time.perf_counter()
+        done = 0
+        try:
+            for seq, kind, op in queue.pending(self.batch):
+                op_id = op["return_id"] if kind == "return" else op["sales_id"]
+                try:
+                    applied = self._apply(kind, op)
+                except MySQLError as e:
+                    if is_connection_error(e):
+                        raise
+                    err_msg = str(e.args[1] if len(e.args) > 1 else e)
+                    logger.warning(f"离线单据同步被拦截 | 单号: {op_id} | 原因: {err_msg}")
+                    queue.fail(seq, err_msg)
+                    continue
+                except PoolTimeoutError:
+                    raise
+                except Exception as e:
+                    # 非预期异常：单据留在队列中，本轮停止，下一轮按原顺序重试
+                    logger.error(f"离线单据同步异常 | 单号: {op_id} | 错误: {e}")
+                    queue.note_error(seq, str(e))
+                    break
+                queue.ack(seq, duplicate=not applied)
+                done += 1
+        finally:
+            if done:
+                elapsed = time.perf_counter() - start
+                queue.record_sync(done, elapsed)
+                logger.info("离线单据同步 | 本轮: %s 笔 | 耗时: %.2fs | 剩余: %s", done, elapsed, queue.pending_count)
+
+    def _apply(self, kind, op):
+        """把一条离线单据写入中心库；返回 False 表示中心库中已存在"""
+        if kind == "return":
+            return self.dao.register_return_once(op["return_id"], op["sales_id"], op["emp_id"], op["cust_id"],
+                                                 op["total_amount"], op["reason"], op["items"],
+                                                 return_date=op["return_date"])
+        return self.dao.register_sale_once(op["sales_id"], op["cust_id"], op["emp_id"], op["remark"], op["items"],
+                                           sales_date=op["sales_date"])
@@ -0,0 +1,44 @@
+# src/controllers/system_ctrl.py
+from src.database.db_manager import DBManager
+from src.database.cache import get_master_cache
+from src.database.offline_queue import get_offline_queue
+from src.utils.logger import logger
+
+
+class SystemController:
+    """系统维护：查询统计、连接池与缓存状态的查看、清零与导出"""
+    def __init__(self):
+        self.db = DBManager()
+        self.offline = get_offline_queue()
+
+    def get_diagnostics(self):
+        """汇总查询统计、连接池状态、基础资料缓存命中率与离线队列积压"""
+        try:
+            data = {"queries": self.db.query_stats(), "pool": self.db.pool_stats(),
+                    "cache": get_master_cache().stats(),
+                    "offline": self.offline.snapshot() if self.offline is not None else None}
+            return True, data
+        except Exception as e:
+            logger.error(f"获取诊断数据异常: {e}")
+            return False, f"获取诊断数据失败: {str(e)}"
+
+    def set_profiling(self, enabled):
+        self.db.profiler.enabled = bool(enabled)
+        logger.info(f"查询性能采集已{'开启' if enabled else '关闭'}")
+        return True, None
+
+    def reset_query_stats(self):
+        self.db.profiler.reset()
+        return True, None
+
+    def dump_diagnostics(self, path=None):
+        """把查询统计连同连接池、缓存状态写入 JSON 文件（默认 logs 目录）"""
+        try:
+            extra = {"pool": self.db.pool_stats(), "cache": get_master_cache().stats()}
+            if self.offline is not None:
+                extra["offline"] = dict(self.offline.snapshot(), failed_ops=self.offline.failed_ops())
+            path = self.db.profiler.dump(path, extra=extra)
+            return True, path
+        except Exception as e:
+            logger.error(f"导出诊断数据异常: {e}")
+            return False, f"导出诊断数据失败: {str(e)}"
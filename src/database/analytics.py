@@ -0,0 +1,120 @@
+# src/database/analytics.py
+"""
+销售分析引擎：列式内存存储 + NumPy 向量化聚合
+- 一个日期区间的销售明细只从数据库流式读取一次，按块追加到列数组中
+- 维度列（药品/分类/客户/员工/单号）字典编码为整数，度量列为 float64/int64
+- 各类排行与占比都在内存中用 bincount 一次算出，不再为每个图表单独发 GROUP BY
+"""
+import numpy as np
+
+# 支持分组的维度：维度名 -> (编码列, 展示名称列)
+DIMENSIONS = {
+    "medicine": ("medicine_id", "medicine_name"),
+    "category": ("category", "category"),
+    "customer": ("cust_id", "cust_name"),
+    "employee": ("emp_id", "emp_name"),
+}
+
+
+class _Dictionary:
+    """字符串 -> 连续整数编码，同时记录展示名称"""
+    def __init__(self):
+        self.codes = {}
+        self.keys = []
+        self.names = []
+
+    def encode(self, key, name):
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.keys)
+            self.keys.append(key)
+            self.names.append(name if name is not None else key)
+        return code
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class SalesColumns:
+    """
+    某一日期区间 [start, end) 的销售明细列存
+    append_chunk() 追加一块行数据；同一销售单不会重复加入（增量刷新时按单号去重）
+    """
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+        self.dicts = {dim: _Dictionary() for dim in DIMENSIONS}
+        self.orders = _Dictionary()
+        self._pending = {name: [] for name in ("medicine", "category", "customer", "employee",
+                                              "order", "quantity", "amount")}
+        self._arrays = None        # 合并后的 NumPy 列（懒合并）
+        self.watermark = None      # 已加载的最大 sales_date
+        self.edge_orders = set()   # sales_date 恰好等于水位的单号（增量刷新从水位含起读取，用它去重）
+        self.rows = 0
+
+    # ---------- 装载 ----------
+
+    def append_chunk(self, chunk, skip_orders=()):
+        """
+        把一块字典行编码后追加到待合并缓冲
+        skip_orders: 上次加载时已在水位上的单号（增量刷新前取 set(edge_orders) 快照传入）
+        """
+        p = self._pending
+        for row in chunk:
+            if row['sales_id'] in skip_orders:
+                continue
+            for dim, (key_col, name_col) in DIMENSIONS.items():
+                p[dim].append(self.dicts[dim].encode(row[key_col], row[name_col]))
+            p["order"].append(self.orders.encode(row['sales_id'], row['sales_id']))
+            p["quantity"].append(row['quantity'])
+            p["amount"].append(float(row['amount']))
+            if self.watermark is None or row['sales_date'] > self.watermark:
+                self.watermark = row['sales_date']
+                self.edge_orders = {row['sales_id']}
+            elif row['sales_date'] == self.watermark:
+                self.edge_orders.add(row['sales_id'])
+            self.rows += 1
+
+    def _columns(self):
+        """把缓冲区的 Python 列表合并进 NumPy 数组"""
+        if self._arrays is None or self._pending["order"]:
+            dtypes = {"quantity": np.int64, "amount": np.float64}
+            fresh = {k: np.asarray(v, dtype=dtypes.get(k, np.int32)) for k, v in self._pending.items()}
+            if self._arrays is None:
+                self._arrays = fresh
+            else:
+                self._arrays = {k: np.concatenate((self._arrays[k], fresh[k])) for k in fresh}
+            self._pending = {k: [] for k in self._pending}
+        return self._arrays
+
+    # ---------- 聚合 ----------
+
+    def totals(self):
+        cols = self._columns()
+        return {"amount": float(cols["amount"].sum()), "quantity": int(cols["quantity"].sum()),
+                "orders": len(self.orders), "lines": self.rows}
+
+    def group(self, dim, top_n=None):
+        """
+        按维度分组：销售额、销量、单数、销售额占比，按销售额降序
+        单数 = 每组内不同销售单的个数（对 (组, 单号) 对去重后计数）
+        """
+        cols = self._columns()
+        dictionary = self.dicts[dim]
+        n_groups = len(dictionary)
+        if n_groups == 0:
+            return []
+        codes = cols[dim]
+        amount = np.bincount(codes, weights=cols["amount"], minlength=n_groups)
+        quantity = np.bincount(codes, weights=cols["quantity"], minlength=n_groups).astype(np.int64)
+        pairs = np.unique(codes.astype(np.int64) * max(len(self.orders), 1) + cols["order"])
+        orders = np.bincount(pairs // max(len(self.orders), 1), minlength=n_groups)
+
+        order = np.argsort(-amount, kind="stable")
+        if top_n:
+            order = order[:top_n]
+        total = amount.sum()
+        return [{"key": dictionary.keys[i], "name": dictionary.names[i],
+                 "amount": round(float(amount[i]), 2), "quantity": int(quantity[i]),
+                 "orders": int(orders[i]),
+                 "share": round(float(amount[i] / total), 4) if total else 0.0}
+                for i in order]
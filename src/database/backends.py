@@ -0,0 +1,392 @@
+# src/database/backends.py
+"""
+存储后端（Storage Backend）：DBManager 通过后端对象建立连接、创建游标，DAO 不再直接依赖 pymysql
+- MySQLBackend : 中心库（默认），沿用 pymysql 与 create_table.sql / create_trigger.sql
+- SQLiteBackend: 嵌入式后端，供没有 MySQL 服务器的小门店/离线门店与进程内测试使用
+    * WAL 日志模式 + synchronous=NORMAL：读写互不阻塞，单店收银写入量下每单只需一次顺序写
+    * 业务规则由 sql/sqlite_schema.sql 中逐条对应的触发器实现，首次连接时按 user_version 自动建库
+    * DAO 中的 MySQL 方言（%s 占位符、ON DUPLICATE KEY UPDATE、INSERT IGNORE、FOR UPDATE、
+      LIKE 转义、@set_based_write 会话变量）在游标层改写，改写结果按语句文本缓存
+    * 写事务以 BEGIN IMMEDIATE 开始，一开始就持有写锁，相当于 MySQL 的 SELECT ... FOR UPDATE
+    * sqlite3 异常映射为与 MySQL 相同的 pymysql 异常（触发器拦截为 1644），控制层无需区分后端
+    * ":memory:" 内存库（测试用）按线程串行访问：共享缓存模式下锁冲突不会等待 busy_timeout
+游标类型统一用本模块的 DICT / TUPLE / STREAM_DICT / STREAM_TUPLE 表示
+"""
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+import pymysql
+import pymysql.cursors
+
+# 游标类型：字典行 / 元组行；STREAM_* 为流式读取（MySQL 服务端游标，须在会话内读完）
+DICT, TUPLE, STREAM_DICT, STREAM_TUPLE = "dict", "tuple", "stream_dict", "stream_tuple"
+
+BACKENDS = ("mysql", "sqlite")
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  "sql", "sqlite_schema.sql")
+SQLITE_SCHEMA_VERSION = 1   # sqlite_schema.sql 有变化时加一，已有数据库在下次连接时重新执行脚本
+
+
+class MySQLBackend:
+    name = "mysql"
+    _CURSOR_CLASSES = {DICT: pymysql.cursors.DictCursor, TUPLE: pymysql.cursors.Cursor,
+                       STREAM_DICT: pymysql.cursors.SSDictCursor, STREAM_TUPLE: pymysql.cursors.SSCursor}
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+
+    def connect(self):
+        return pymysql.connect(
+            host=self.db_config['host'],
+            port=self.db_config['port'],
+            user=self.db_config['user'],
+            password=self.db_config['password'],
+            database=self.db_config['database'],
+            charset=self.db_config['charset'],
+            autocommit=True,
+            connect_timeout=5
+        )
+
+    def cursor(self, conn, kind=None):
+        return conn.cursor(self._CURSOR_CLASSES[kind or DICT])
+
+    @staticmethod
+    def abandon(conn, cursor):
+        """
+        放弃未读完的流式结果：无缓冲游标关闭时会先把剩余结果全部读完，
+        改为直接断开连接（服务端随之终止查询），连接归还时被连接池丢弃
+        """
+        conn.close()
+
+    def has_set_based_triggers(self, cursor, names):
+        """库中指定的触发器是否都是带 @set_based_write 判断的新版本"""
+        sql = f"""
+            SELECT COUNT(*) AS cnt FROM information_schema.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND ACTION_STATEMENT LIKE %s
+              AND TRIGGER_NAME IN ({", ".join(["%s"] * len(names))})
+        """
+        cursor.execute(sql, ("%@set_based_write%",) + tuple(names))
+        return cursor.fetchone()['cnt'] >= len(names)
+
+    @staticmethod
+    def month_start_sql(column):
+        return f"DATE_SUB({column}, INTERVAL DAYOFMONTH({column}) - 1 DAY)"
+
+    @staticmethod
+    def year_sql(column):
+        return f"YEAR({column})"
+
+    @staticmethod
+    def seconds_ago_sql():
+        """数据库当前时间减去 %s 秒（按数据库服务器时钟计算，不受客户端时钟影响）"""
+        return "NOW() - INTERVAL %s SECOND"
+
+    def describe(self):
+        return f"MySQL {self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}"
+
+
+# ---------- SQLite ----------
+
+def _to_money(value):
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+# 参数与结果的类型转换：与 pymysql 一致，DECIMAL 列返回 Decimal，DATE/DATETIME 列返回 date/datetime
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda d: d.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_converter("DECIMAL", lambda b: _to_money(b.decode()))
+sqlite3.register_converter("DATE", lambda b: datetime.date.fromisoformat(b.decode()[:10]))
+sqlite3.register_converter("DATETIME", lambda b: datetime.datetime.fromisoformat(b.decode()))
+
+# MySQL 方言 -> SQLite（按顺序应用）
+_SQLITE_REWRITES = (
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.I), ""),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)", re.I), r"excluded.\1"),
+    (re.compile(r"\bLIKE\s+%s", re.I), r"LIKE ? ESCAPE '\\'"),
+    (re.compile(r"%s"), "?"),
+)
+_SET_SESSION_VAR = re.compile(r"^\s*SET\s+@(\w+)\s*=\s*(\S+)\s*$", re.I)
+
+
+@functools.lru_cache(maxsize=1024)
+def translate_sql(sql):
+    """把 DAO 使用的 MySQL 方言改写为 SQLite 语法（结果缓存，语句文本多为常量）"""
+    for pattern, repl in _SQLITE_REWRITES:
+        sql = pattern.sub(repl, sql)
+    return sql
+
+
+def _sqlite_error(e):
+    """把 sqlite3 异常映射为 pymysql 异常（错误码取 MySQL 中含义相同的错误）"""
+    name = getattr(e, "sqlite_errorname", "")
+    msg = str(e)
+    if name == "SQLITE_CONSTRAINT_TRIGGER":
+        return pymysql.err.OperationalError(1644, msg)       # 触发器拦截（SIGNAL 45000）
+    if name in ("SQLITE_CONSTRAINT_PRIMARYKEY", "SQLITE_CONSTRAINT_UNIQUE"):
+        return pymysql.err.IntegrityError(1062, f"Duplicate entry: {msg}")
+    if name == "SQLITE_CONSTRAINT_FOREIGNKEY":
+        return pymysql.err.IntegrityError(1452, f"Foreign key constraint fails: {msg}")
+    if name == "SQLITE_CONSTRAINT_NOTNULL":
+        return pymysql.err.IntegrityError(1048, msg)
+    if name == "SQLITE_CONSTRAINT_CHECK":
+        return pymysql.err.IntegrityError(3819, f"Check constraint violated: {msg}")
+    if name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED")):
+        return pymysql.err.OperationalError(1205, f"Lock wait timeout exceeded: {msg}")
+    if isinstance(e, sqlite3.ProgrammingError) and "closed" in msg:
+        return pymysql.err.InterfaceError(0, msg)            # 连接已关闭，归还时丢弃
+    if isinstance(e, (sqlite3.OperationalError, sqlite3.ProgrammingError)):
+        return pymysql.err.ProgrammingError(1064, msg)
+    return pymysql.err.InternalError(1105, msg)
+
+
+def _dict_row(cursor, row):
+    # 表达式（SUM、乘积等）没有声明类型，金额以浮点返回，统一转成两位小数的 Decimal
+    return {col[0]: (_to_money(v) if isinstance(v, float) else v) for col, v in zip(cursor.description, row)}
+
+
+def _tuple_row(cursor, row):
+    return tuple(_to_money(v) if isinstance(v, float) else v for v in row)
+
+
+class _AccessGate:
+    """
+    内存库的访问闸门：共享缓存模式下表锁冲突立即返回 SQLITE_LOCKED，busy_timeout 不起作用，
+    因此同一时间只允许一个线程使用内存库（事务或游标存续期间持有），其余线程最多等待 timeout 秒
+    可重入：事务中的游标、嵌套会话不会自己阻塞自己
+    """
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._lock = threading.RLock()
+
+    def acquire(self):
+        if not self._lock.acquire(timeout=self.timeout):
+            raise pymysql.err.OperationalError(1205, f"Lock wait timeout exceeded: 内存库等待超过 {self.timeout}s")
+
+    def release(self):
+        self._lock.release()
+
+
+class SQLiteCursor:
+    """提供 DAO 用到的 pymysql 游标接口：execute / executemany / fetch* / rowcount / description"""
+    def __init__(self, connection, kind):
+        self.connection = connection
+        self._gated = connection.gate is not None
+        if self._gated:
+            connection.gate.acquire()
+        try:
+            self._cursor = connection.raw.cursor()
+        except Exception:
+            self.close_gate()
+            raise
+        self._cursor.row_factory = _dict_row if kind in (None, DICT, STREAM_DICT) else _tuple_row
+
+    def _run(self, method, sql, args):
+        match = _SET_SESSION_VAR.match(sql)
+        if match:
+            value = match.group(2)
+            self.connection.session_vars[match.group(1)] = None if value.upper() == "NULL" else value
+            return 0
+        try:
+            method(translate_sql(sql), () if args is None else args)
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+        return self._cursor.rowcount
+
+    def execute(self, sql, args=None):
+        return self._run(self._cursor.execute, sql, args)
+
+    def executemany(self, sql, args):
+        return self._run(self._cursor.executemany, sql, list(args))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        try:
+            self._cursor.close()
+        finally:
+            self.close_gate()
+
+    def close_gate(self):
+        if self._gated:
+            self._gated = False
+            self.connection.gate.release()
+
+
+class SQLiteConnection:
+    """
+    包装 sqlite3 连接，提供连接池用到的 begin / commit / rollback / ping / open / close
+    gate: 内存库的访问闸门（见 _AccessGate），文件库为 None
+    """
+    def __init__(self, raw, gate=None):
+        self.raw = raw
+        self.gate = gate
+        self.session_vars = {}   # 对应 MySQL 的会话变量（@name），由触发器通过 session_var() 读取
+        self.open = True
+        self._in_tx = False
+        raw.create_function("session_var", 1, self.session_vars.get)
+
+    def cursor(self, kind=None):
+        return SQLiteCursor(self, kind)
+
+    def begin(self):
+        if self.gate is not None:
+            self.gate.acquire()
+        try:
+            # IMMEDIATE：事务开始即取得写锁，后续的读-改-写不会因锁升级失败
+            self.raw.execute("BEGIN IMMEDIATE")
+        except Exception:
+            if self.gate is not None:
+                self.gate.release()
+            raise
+        self._in_tx = True
+
+    def _end_tx(self, finish):
+        try:
+            finish()
+        finally:
+            if self._in_tx and self.gate is not None:
+                self.gate.release()
+            self._in_tx = False
+
+    def commit(self):
+        self._end_tx(self.raw.commit)
+
+    def rollback(self):
+        self._end_tx(self.raw.rollback)
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise pymysql.err.InterfaceError(0, "SQLite 连接已关闭")
+
+    def close(self):
+        self.open = False
+        self.raw.close()
+
+
+class SQLiteBackend:
+    """
+    path        : 数据库文件；":memory:" 为进程内共享的内存库（测试用，所有连接看到同一份数据，访问按线程串行）
+    busy_timeout: 等待其他连接释放写锁的毫秒数
+    cache_size_kb: 每个连接的页缓存大小
+    """
+    name = "sqlite"
+    _MEMORY_URI = "file:pharmacy_memdb_{}?mode=memory&cache=shared"
+    _memory_ids = iter(range(1 << 30))
+
+    def __init__(self, path, busy_timeout=5000, cache_size_kb=16384):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cache_size_kb = cache_size_kb
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._keeper = None
+        self._gate = None
+        if path == ":memory:":
+            # 共享缓存的内存库在最后一个连接关闭时销毁，保留一个连接让数据与连接池中连接的回收无关
+            self._uri = self._MEMORY_URI.format(next(self._memory_ids))
+            self._gate = _AccessGate(busy_timeout / 1000)
+            self._keeper = self._open()
+            self._ensure_schema(self._keeper)
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._uri = None
+
+    def _open(self):
+        raw = sqlite3.connect(self._uri or self.path, uri=self._uri is not None, timeout=self.busy_timeout / 1000,
+                              detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None, check_same_thread=False)
+        raw.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        raw.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        raw.execute("PRAGMA temp_store = MEMORY")
+        return raw
+
+    def _ensure_schema(self, raw):
+        """
+        首次连接时建库或升级（journal_mode=WAL 持久保存在数据库文件中，只需设置一次）
+        升级时先删除全部触发器再执行脚本：脚本用 CREATE TRIGGER IF NOT EXISTS，不删除的话修改过的触发器不会生效
+        """
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            if raw.execute("PRAGMA user_version").fetchone()[0] < SQLITE_SCHEMA_VERSION:
+                if self._uri is None:
+                    raw.execute("PRAGMA journal_mode = WAL")
+                with open(SQLITE_SCHEMA_PATH, encoding="utf-8") as f:
+                    script = f.read()
+                triggers = [name for (name,) in raw.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]
+                drops = "".join(f'DROP TRIGGER IF EXISTS "{name}";\n' for name in triggers)
+                raw.executescript(f"BEGIN;\n{drops}{script}\nPRAGMA user_version = {SQLITE_SCHEMA_VERSION};\nCOMMIT;")
+            self._schema_ready = True
+
+    def connect(self):
+        conn = SQLiteConnection(self._open(), self._gate)
+        self._ensure_schema(conn.raw)
+        return conn
+
+    def cursor(self, conn, kind=None):
+        return conn.cursor(kind)
+
+    @staticmethod
+    def abandon(conn, cursor):
+        """SQLite 游标关闭时不读取剩余结果，连接可以继续使用"""
+        cursor.close()
+
+    def has_set_based_triggers(self, cursor, names):
+        # 内置建库脚本中的触发器均支持集合式写入
+        return True
+
+    @staticmethod
+    def month_start_sql(column):
+        return f"date({column}, 'start of month')"
+
+    @staticmethod
+    def year_sql(column):
+        return f"CAST(strftime('%Y', {column}) AS INTEGER)"
+
+    @staticmethod
+    def seconds_ago_sql():
+        return "datetime('now', 'localtime', '-' || %s || ' seconds')"
+
+    def describe(self):
+        return f"SQLite {self.path}"
+
+
+def create_backend(db_config, sqlite_config=None):
+    """按 [database] backend 配置创建后端"""
+    backend = db_config.get("backend", "mysql")
+    if backend == "mysql":
+        return MySQLBackend(db_config)
+    if backend == "sqlite":
+        return SQLiteBackend(**(sqlite_config or {}))
+    raise ValueError(f"未知的存储后端: {backend}，可选: {BACKENDS}")
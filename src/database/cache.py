@@ -0,0 +1,179 @@
+# src/database/cache.py
+"""
+基础资料读缓存（Read-through Cache）
+- 位于 BaseInfoController 与 DAO 之间，药品/员工/客户/供应商各自一个 TTLCache
+- 读：命中直接返回内存副本，未命中时调用 DAO 加载并写入缓存
+- 写：控制器的增删改成功后整实体失效（列表与单条记录一起清除）
+- 进程内全局共享，多个页面的控制器实例看到同一份缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+from src.utils.config_loader import CACHE_ENTITIES, add_settings_listener, get_settings
+from src.utils.logger import logger
+
+_MISSING = object()
+
+
+def _copy_rows(value):
+    """返回行数据的浅层副本，调用方修改结果不会污染缓存（字段值均为不可变类型）"""
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class TTLCache:
+    """
+    线程安全的 LRU + TTL 缓存
+    - 超过 ttl 秒的条目视为过期；ttl <= 0 时不缓存任何内容
+    - 条目数超过 max_size 时淘汰最久未使用的条目
+    """
+    def __init__(self, ttl=300, max_size=1000, name=""):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.name = name
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._generation = 0         # 每次失效加一，防止失效前发起的加载把旧数据写回缓存
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.stats["misses"] += 1
+                return default
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """写入缓存；generation 与当前代不一致说明期间发生过失效，放弃写入"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def configure(self, ttl, max_size):
+        """运行时调整 ttl 与容量（配置热加载）；容量调低时立即淘汰多出的条目，ttl 变化只影响之后写入的条目"""
+        with self._lock:
+            self.ttl = ttl
+            self.max_size = max_size
+            if not self.enabled:
+                self._data.clear()
+            while len(self._data) > max(self.max_size, 0):
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_or_load(self, key, loader):
+        """读穿透：命中返回缓存副本，否则调用 loader() 加载；None 结果不缓存"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return _copy_rows(value)
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        if value is not None:
+            self.put(key, _copy_rows(value), generation)
+        return value
+
+    def invalidate(self, key=None):
+        """清除指定条目；key 为 None 时清空整个缓存"""
+        with self._lock:
+            self._generation += 1
+            self.stats["invalidations"] += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            total = data["hits"] + data["misses"]
+            data.update({"size": len(self._data), "max_size": self.max_size, "ttl": self.ttl,
+                         "hit_rate": round(data["hits"] / total, 4) if total else 0.0})
+            return data
+
+
+class MasterDataCache:
+    """按实体划分的基础资料缓存集合"""
+    ALL = "__all__"   # 存放整表列表的键
+
+    def __init__(self, config=None):
+        """config: {实体: {"ttl": 秒, "max_size": 条目数}}，缺省时取 [cache] 配置并跟随配置热加载"""
+        follow_settings = config is None
+        if follow_settings:
+            cache = get_settings().cache
+            config = {entity: getattr(cache, entity)._asdict() for entity in CACHE_ENTITIES}
+        self.caches = {entity: TTLCache(name=entity, **opts) for entity, opts in config.items()}
+        self._listeners = []
+        if follow_settings:
+            add_settings_listener(self._apply_settings)
+
+    def _apply_settings(self, old, new):
+        for entity, cache in self.caches.items():
+            opts = getattr(new.cache, entity)
+            if opts != getattr(old.cache, entity):
+                cache.configure(opts.ttl, opts.max_size)
+                logger.info("基础资料缓存配置已更新 | 实体: %s | ttl: %ss | 容量: %s", entity, opts.ttl, opts.max_size)
+
+    def fetch_all(self, entity, loader):
+        return self.caches[entity].get_or_load(self.ALL, loader)
+
+    def fetch_one(self, entity, key, loader):
+        return self.caches[entity].get_or_load(key, loader)
+
+    def invalidate(self, entity):
+        """某实体发生增删改：列表与单条记录一并失效，并通知监听者"""
+        self.caches[entity].invalidate()
+        logger.debug("基础资料缓存失效 | 实体: %s", entity)
+        for listener in list(self._listeners):
+            try:
+                listener(entity)
+            except Exception as e:
+                logger.error(f"缓存失效回调异常 | 实体: {entity} | 错误: {e}")
+
+    def invalidate_all(self):
+        for entity in self.caches:
+            self.invalidate(entity)
+
+    def add_listener(self, callback):
+        """注册失效回调 callback(entity)，供依赖基础资料的派生数据同步刷新"""
+        self._listeners.append(callback)
+
+    def stats(self):
+        """各实体的命中/未命中计数与当前条目数"""
+        return {entity: cache.snapshot() for entity, cache in self.caches.items()}
+
+
+_master_cache = None
+_master_lock = threading.Lock()
+
+
+def get_master_cache():
+    """进程内共享的基础资料缓存（首次调用时按配置创建）"""
+    global _master_cache
+    if _master_cache is None:
+        with _master_lock:
+            if _master_cache is None:
+                _master_cache = MasterDataCache()
+    return _master_cache
@@ -1,15 +1,242 @@
 # src/database/dao.py
+import datetime
+import functools
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+import pymysql
+from .backends import STREAM_DICT, STREAM_TUPLE, TUPLE
 from .db_manager import DBManager
 
+# 单据写入引擎：
+#   trigger   —— 逐行插入明细，由触发器逐行维护库存、主单总价与日结（默认）
+#   set_based —— 整张单据一次性计算总价与库存增减，逐行触发器通过 @set_based_write 跳过
+WRITE_ENGINES = ("trigger", "set_based")
+
+# set_based 引擎依赖的新版触发器（均带 @set_based_write 判断）
+SET_BASED_TRIGGERS = ("tri_check_medicine_exists_purchase", "tri_purchase_add_stock", "tri_sales_reduce_stock",
+                      "tri_return_add_stock", "tri_calc_purchase_total", "tri_calc_sales_total")
+
+
+def _placeholders(n):
+    return ", ".join(["%s"] * n)
+
+
+def _money(value):
+    """按 DECIMAL(10,2) 的方式四舍五入到分"""
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _sum_by_medicine(items, qty_key):
+    """把明细按药品合并为 {medicine_id: 数量}"""
+    deltas = {}
+    for item in items:
+        deltas[item['medicine_id']] = deltas.get(item['medicine_id'], 0) + int(item[qty_key])
+    return deltas
+
+
+def _month_start(year, month):
+    """某年某月的 1 日（UI 传入的年月可能是字符串）"""
+    return datetime.date(int(year), int(month), 1)
+
+
+def _add_months(day, n):
+    """月初日期加 n 个月"""
+    total = day.year * 12 + day.month - 1 + n
+    return datetime.date(total // 12, total % 12 + 1, 1)
+
+
+def _like_escape(text):
+    """转义 LIKE 通配符"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# 条件查询支持的运算符 -> SQL 运算符；prefix 为前缀匹配（可走索引），contains 为任意位置匹配（全表扫描）
+FILTER_OPS = {"=": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+              "prefix": "LIKE", "contains": "LIKE", "in": "IN"}
+
+
+def _business_error(msg):
+    """构造与触发器 SIGNAL 相同形态的异常（错误码 1644），控制层无需区分写入引擎"""
+    return pymysql.err.OperationalError(1644, msg)
+
+
 class BaseDAO:
+    write_engine = "trigger"     # 默认写入引擎，可在子类或实例上改为 "set_based"
+    _set_based_ready = False     # 已确认数据库安装了新版触发器
+
     def __init__(self):
         self.db = DBManager()
 
+    @staticmethod
+    def _insert_details(cursor, sql, rows, bulk):
+        """
+        插入明细行
+        bulk=False: 逐行 execute（每行一次往返）
+        bulk=True : executemany，pymysql 会将其改写为一条多行 INSERT ... VALUES (...), (...)
+        """
+        if bulk:
+            cursor.executemany(sql, rows)
+        else:
+            for row in rows:
+                cursor.execute(sql, row)
+
+    def _keyset_page(self, base_sql, date_col, id_col, page_size=50, cursor=None, direction="next", params=()):
+        """
+        键集（seek）分页：按 (日期, 单号) 倒序，从 cursor 位置向前或向后取一页
+        base_sql : 不含 WHERE 之后排序/分页部分的查询（可包含 JOIN）
+        cursor   : 上一页返回的 first/last 键 (日期, 单号)；None 表示从最新一页开始
+        direction: "next" 取更早的记录，"prev" 取更新的记录
+        返回 {"rows": [...], "has_more": bool, "first": key, "last": key}
+        """
+        if direction not in ("next", "prev"):
+            raise ValueError(f"未知的翻页方向: {direction}")
+        page_size = max(1, int(page_size))
+        sql, args = base_sql, list(params)
+        if cursor is not None:
+            op = "<" if direction == "next" else ">"
+            sql += f" WHERE ({date_col} {op} %s OR ({date_col} = %s AND {id_col} {op} %s))"
+            args += [cursor[0], cursor[0], cursor[1]]
+        order = "DESC" if direction == "next" else "ASC"
+        sql += f" ORDER BY {date_col} {order}, {id_col} {order} LIMIT %s"
+        args.append(page_size + 1)  # 多取一行用于判断是否还有下一页
+
+        with self.db.session() as cur:
+            cur.execute(sql, args)
+            rows = list(cur.fetchall())
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if direction == "prev":
+            rows.reverse()
+        date_key, id_key = date_col.split(".")[-1], id_col.split(".")[-1]
+        keys = [(r[date_key], r[id_key]) for r in rows]
+        return {"rows": rows, "has_more": has_more,
+                "first": keys[0] if keys else None, "last": keys[-1] if keys else None}
+
+    # ---------- 条件查询（基础资料） ----------
+    # 子类声明：表名、主键、可用于筛选/排序的列（白名单）、关键字检索的列（主键、名称与电话列，均有索引，按前缀匹配）
+    TABLE = None
+    PK = None
+    FILTER_COLUMNS = ()
+    KEYWORD_COLUMNS = ()
+
+    def search(self, keyword=None, filters=(), sort=None, descending=False, limit=100, offset=0):
+        """
+        服务端条件查询，只返回一页数据
+        keyword : 关键字，在 KEYWORD_COLUMNS 中做前缀匹配（任一列命中即可）；
+                  每列都是索引范围条件，MySQL 用 index_merge 合并各索引的范围扫描，只对命中的行排序
+        filters : [(列, 运算符, 值), ...]，运算符见 FILTER_OPS；in 的值为序列
+        sort    : 排序列（缺省按主键），始终追加主键保证分页稳定
+        返回 {"rows": [...], "has_more": bool}
+        """
+        where, args = [], []
+        keyword = (keyword or "").strip()
+        if keyword:
+            pattern = _like_escape(keyword) + "%"
+            where.append("(" + " OR ".join(f"{col} LIKE %s" for col in self.KEYWORD_COLUMNS) + ")")
+            args += [pattern] * len(self.KEYWORD_COLUMNS)
+        for column, op, value in filters:
+            if column not in self.FILTER_COLUMNS:
+                raise ValueError(f"{self.TABLE} 不支持按 {column} 筛选")
+            if op not in FILTER_OPS:
+                raise ValueError(f"未知的筛选运算符: {op}")
+            if op == "in":
+                values = list(value)
+                if not values:
+                    return {"rows": [], "has_more": False}
+                where.append(f"{column} IN ({_placeholders(len(values))})")
+                args += values
+            elif op in ("prefix", "contains"):
+                pattern = _like_escape(str(value)) + "%"
+                where.append(f"{column} LIKE %s")
+                args.append(pattern if op == "prefix" else "%" + pattern)
+            else:
+                where.append(f"{column} {FILTER_OPS[op]} %s")
+                args.append(value)
+
+        sort = sort or self.PK
+        if sort not in self.FILTER_COLUMNS:
+            raise ValueError(f"{self.TABLE} 不支持按 {sort} 排序")
+        order = "DESC" if descending else "ASC"
+        sql = f"SELECT * FROM {self.TABLE}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort} {order}" + (f", {self.PK} {order}" if sort != self.PK else "")
+        sql += " LIMIT %s OFFSET %s"
+        limit = max(1, int(limit))
+        args += [limit + 1, max(0, int(offset))]  # 多取一行用于判断是否还有下一页
+
+        with self.db.session() as cursor:
+            cursor.execute(sql, args)
+            rows = list(cursor.fetchall())
+        return {"rows": rows[:limit], "has_more": len(rows) > limit}
+
+    # ---------- 集合式写入（set_based 引擎） ----------
+
+    def _resolve_engine(self, engine):
+        engine = engine or self.write_engine
+        if engine not in WRITE_ENGINES:
+            raise ValueError(f"未知的写入引擎: {engine}，可选: {WRITE_ENGINES}")
+        if engine == "set_based" and not BaseDAO._set_based_ready:
+            # 旧版触发器不会跳过逐行维护，混用会导致库存被重复增减
+            with self.db.session() as cursor:
+                if not self.db.backend.has_set_based_triggers(cursor, SET_BASED_TRIGGERS):
+                    raise RuntimeError("数据库触发器版本过旧，请重新执行 sql/create_trigger.sql 后再使用 set_based 写入引擎")
+            BaseDAO._set_based_ready = True
+        return engine
+
+    @contextmanager
+    def _set_based_write(self):
+        """在一个事务内开启集合式写入，结束时无论成败都清除会话变量"""
+        with self.db.transaction() as cursor:
+            cursor.execute("SET @set_based_write = 1")
+            try:
+                yield cursor
+            finally:
+                try:
+                    cursor.execute("SET @set_based_write = NULL")
+                except Exception:
+                    # 变量未能清除的连接不能回到连接池，否则后续逐行写入会跳过触发器
+                    cursor.connection.close()
+                    raise
+
+    @staticmethod
+    def _lock_stock(cursor, medicine_ids):
+        """锁定并读取相关药品的当前库存 {medicine_id: stock_quantity}"""
+        if not medicine_ids:
+            return {}
+        sql = f"SELECT medicine_id, stock_quantity FROM inventory WHERE medicine_id IN ({_placeholders(len(medicine_ids))}) FOR UPDATE"
+        cursor.execute(sql, list(medicine_ids))
+        return {row['medicine_id']: row['stock_quantity'] for row in cursor.fetchall()}
+
+    @staticmethod
+    def _apply_stock_deltas(cursor, deltas, sign):
+        """用一条多行 upsert 把整单的库存增减写入 inventory（sign: +1 入库 / -1 出库），没有库存记录的药品新建记录"""
+        if not deltas:
+            return
+        op = "+" if sign > 0 else "-"
+        sql = ("INSERT INTO inventory (medicine_id, stock_quantity) VALUES (%s, %s) "
+               f"ON DUPLICATE KEY UPDATE stock_quantity = stock_quantity {op} VALUES(stock_quantity)")
+        cursor.executemany(sql, list(deltas.items()))
+
+    @staticmethod
+    def _add_existing_stock(cursor, deltas):
+        """只增加已有库存记录的数量，没有库存记录的药品不新建（与 tri_return_add_stock 一致）"""
+        if not deltas:
+            return
+        cursor.executemany("UPDATE inventory SET stock_quantity = stock_quantity + %s WHERE medicine_id = %s",
+                           [(qty, m_id) for m_id, qty in deltas.items()])
+
 # ==========================================
 # 1. 基础信息管理模块 (Medicine, Employee, Customer, Supplier)
 # ==========================================
 
 class MedicineDAO(BaseDAO):
+    TABLE, PK = "medicine", "medicine_id"
+    FILTER_COLUMNS = ("medicine_id", "medicine_name", "category", "specification", "manufacturer",
+                      "production_date", "expiry_date", "retail_price")
+    KEYWORD_COLUMNS = ("medicine_id", "medicine_name")
+
     def get_all(self):
         with self.db.session() as cursor:
             cursor.execute("SELECT * FROM medicine")
@@ -39,6 +266,10 @@ class MedicineDAO(BaseDAO):
             cursor.execute("DELETE FROM medicine WHERE medicine_id = %s", (m_id,))
 
 class EmployeeDAO(BaseDAO):
+    TABLE, PK = "employee", "emp_id"
+    FILTER_COLUMNS = ("emp_id", "emp_name", "gender", "phone", "position")
+    KEYWORD_COLUMNS = ("emp_id", "emp_name", "phone")
+
     def get_all(self):
         with self.db.session() as cursor:
             cursor.execute("SELECT * FROM employee")
@@ -65,6 +296,10 @@ class EmployeeDAO(BaseDAO):
             cursor.execute("DELETE FROM employee WHERE emp_id = %s", (emp_id,))
 
 class CustomerDAO(BaseDAO):
+    TABLE, PK = "customer", "cust_id"
+    FILTER_COLUMNS = ("cust_id", "cust_name", "phone", "address")
+    KEYWORD_COLUMNS = ("cust_id", "cust_name", "phone")
+
     def get_all(self):
         with self.db.session() as cursor:
             cursor.execute("SELECT * FROM customer")
@@ -91,6 +326,10 @@ class CustomerDAO(BaseDAO):
             cursor.execute("DELETE FROM customer WHERE cust_id = %s", (cust_id,))
 
 class SupplierDAO(BaseDAO):
+    TABLE, PK = "supplier", "supp_id"
+    FILTER_COLUMNS = ("supp_id", "supp_name", "contact_person", "phone", "address")
+    KEYWORD_COLUMNS = ("supp_id", "supp_name", "phone")
+
     def get_all(self):
         with self.db.session() as cursor:
             cursor.execute("SELECT * FROM supplier")
@@ -135,6 +374,16 @@ class PurchaseDAO(BaseDAO):
             cursor.execute(sql)
             return cursor.fetchall()
 
+    def get_orders_page(self, page_size=50, cursor=None, direction="next"):
+        """按 (order_date, order_id) 键集分页查询进货主单"""
+        sql = """
+            SELECT p.*, s.supp_name, e.emp_name 
+            FROM purchase_order p
+            JOIN supplier s ON p.supp_id = s.supp_id
+            JOIN employee e ON p.emp_id = e.emp_id
+        """
+        return self._keyset_page(sql, "p.order_date", "p.order_id", page_size, cursor, direction)
+
     def get_order_details(self, order_id):
         """查询某一进货单的详细药品列表"""
         sql = """
@@ -147,19 +396,42 @@ class PurchaseDAO(BaseDAO):
             cursor.execute(sql, (order_id,))
             return cursor.fetchall()
 
-    def register_purchase(self, order_id, supp_id, emp_id, invoice, remark, items):
+    def register_purchase(self, order_id, supp_id, emp_id, invoice, remark, items, bulk=False, engine=None):
         """
         items: [{'medicine_id': 'M01', 'quantity': 10, 'unit_price': 5.0}, ...]
         触发器会自动处理: 供应商校验、总金额计算、库存增加
+        主单与明细在同一个事务中提交，任一明细失败整单回滚
+        bulk=True: 明细以一条多行 INSERT 发送
+        engine: 写入引擎（见 WRITE_ENGINES），缺省取 self.write_engine
         """
-        with self.db.session() as cursor:
-            sql_main = """INSERT INTO purchase_order (order_id, supp_id, emp_id, total_amount, invoice_number, remark) 
-                          VALUES (%s, %s, %s, 0, %s, %s)"""
+        sql_main = """INSERT INTO purchase_order (order_id, supp_id, emp_id, total_amount, invoice_number, remark) 
+                      VALUES (%s, %s, %s, 0, %s, %s)"""
+        sql_detail = "INSERT INTO purchase_detail (order_id, medicine_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"
+        rows = [(order_id, item['medicine_id'], item['quantity'], item['unit_price']) for item in items]
+
+        if self._resolve_engine(engine) == "set_based":
+            return self._register_purchase_set_based(order_id, supp_id, emp_id, invoice, remark, items, sql_detail, rows)
+
+        with self.db.transaction() as cursor:
             cursor.execute(sql_main, (order_id, supp_id, emp_id, invoice, remark))
+            self._insert_details(cursor, sql_detail, rows, bulk)
 
-            sql_detail = "INSERT INTO purchase_detail (order_id, medicine_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"
-            for item in items:
-                cursor.execute(sql_detail, (order_id, item['medicine_id'], item['quantity'], item['unit_price']))
+    def _register_purchase_set_based(self, order_id, supp_id, emp_id, invoice, remark, items, sql_detail, rows):
+        """集合式入库：一次校验药品、主单直接写入总价、一条 upsert 增加库存"""
+        deltas = _sum_by_medicine(items, 'quantity')
+        total = sum((_money(it['unit_price']) * int(it['quantity']) for it in items), Decimal("0.00"))
+        sql_main = """INSERT INTO purchase_order (order_id, supp_id, emp_id, total_amount, invoice_number, remark) 
+                      VALUES (%s, %s, %s, %s, %s, %s)"""
+
+        with self._set_based_write() as cursor:
+            if deltas:
+                cursor.execute(f"SELECT COUNT(*) AS cnt FROM medicine WHERE medicine_id IN ({_placeholders(len(deltas))})",
+                               list(deltas))
+                if cursor.fetchone()['cnt'] < len(deltas):
+                    raise _business_error("错误：药品ID不存在，请先在药品信息模块录入该药品！")
+            cursor.execute(sql_main, (order_id, supp_id, emp_id, total, invoice, remark))
+            cursor.executemany(sql_detail, rows)
+            self._apply_stock_deltas(cursor, deltas, +1)
 
 
 # ==========================================
@@ -195,6 +467,126 @@ class InventoryDAO(BaseDAO):
             cursor.execute(sql, (m_id,))
             return cursor.fetchone() # 返回单条记录字典
 
+    # 收银台热路径：药品为主表 LEFT JOIN 库存，两边都按主键命中，一次往返取齐售价、库存、规格、效期
+    POS_LOOKUP_SQL = """
+        SELECT m.medicine_id, m.medicine_name, m.specification, m.retail_price, m.expiry_date,
+               IFNULL(i.stock_quantity, 0) AS stock_quantity
+        FROM medicine m
+        LEFT JOIN inventory i ON i.medicine_id = m.medicine_id
+        WHERE m.medicine_id {cond}
+    """
+
+    def get_pos_snapshot(self):
+        """全部药品的售价与库存（离线收银的本地库存快照）"""
+        sql = """
+            SELECT m.medicine_id, m.medicine_name, m.specification, m.manufacturer, m.retail_price,
+                   m.expiry_date, IFNULL(i.stock_quantity, 0) AS stock_quantity
+            FROM medicine m
+            LEFT JOIN inventory i ON i.medicine_id = m.medicine_id
+        """
+        with self.db.session() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _pos_lookup_sql(n):
+        """按 ID 个数缓存 SQL 模板（PyMySQL 没有服务端预处理语句，复用的是客户端拼好的语句文本）"""
+        cond = "= %s" if n == 1 else f"IN ({_placeholders(n)})"
+        return InventoryDAO.POS_LOOKUP_SQL.format(cond=cond)
+
+    def pos_lookup(self, m_id):
+        """收银台单个药品查询：售价 + 库存 + 规格 + 效期（未入库的药品库存记为 0）"""
+        with self.db.session() as cursor:
+            cursor.execute(self._pos_lookup_sql(1), (m_id,))
+            return cursor.fetchone()
+
+    def pos_lookup_batch(self, m_ids):
+        """批量查询（如扫码整篮），一次往返返回 {medicine_id: 记录}；不存在的 ID 不出现在结果中"""
+        ids = list(dict.fromkeys(m_ids))
+        if not ids:
+            return {}
+        with self.db.session() as cursor:
+            cursor.execute(self._pos_lookup_sql(len(ids)), ids)
+            return {row["medicine_id"]: row for row in cursor.fetchall()}
+
+    # ---------- 低库存预警 ----------
+
+    def get_low_stock(self, default_threshold):
+        """
+        低库存查询下推到数据库：库存 < 各药品阈值（未设置时用 default_threshold）
+        先取最大阈值作为上界，stock_quantity < 上界 可走 idx_inventory_stock 范围扫描，只读取候选行
+        （索引含 low_stock_threshold，阈值比较在索引上完成，只有命中的行才回表关联药品）
+        """
+        with self.db.session() as cursor:
+            cursor.execute("SELECT MAX(low_stock_threshold) AS max_threshold FROM inventory")
+            max_threshold = cursor.fetchone()["max_threshold"]
+            upper = max(default_threshold, max_threshold or 0)
+            sql = """
+                SELECT m.medicine_id, m.medicine_name, m.specification, i.stock_quantity,
+                       IFNULL(i.low_stock_threshold, %s) AS threshold
+                FROM inventory i
+                JOIN medicine m ON i.medicine_id = m.medicine_id
+                WHERE i.stock_quantity < %s
+                  AND i.stock_quantity < IFNULL(i.low_stock_threshold, %s)
+                ORDER BY i.stock_quantity ASC
+            """
+            cursor.execute(sql, (default_threshold, upper, default_threshold))
+            return cursor.fetchall()
+
+    def get_latest_change_id(self):
+        """库存变动日志的当前最大流水号（监控每轮扫描的上界）"""
+        with self.db.session() as cursor:
+            cursor.execute("SELECT IFNULL(MAX(log_id), 0) AS last_id FROM inventory_change_log")
+            return cursor.fetchone()["last_id"]
+
+    def get_settled_change_id(self, after_id, lag):
+        """
+        流水号 after_id 之后、写入已超过 lag 秒的变动日志中的最大流水号（没有时返回 0）
+        自增流水号按分配顺序而非提交顺序可见，只有足够旧的流水号之前不会再出现新提交的日志
+        """
+        sql = (f"SELECT IFNULL(MAX(log_id), 0) AS last_id FROM inventory_change_log "
+               f"WHERE log_id > %s AND changed_at <= {self.db.backend.seconds_ago_sql()}")
+        with self.db.session() as cursor:
+            cursor.execute(sql, (after_id, lag))
+            return cursor.fetchone()["last_id"]
+
+    def get_changed_stock(self, after_id, up_to_id, default_threshold):
+        """流水号 (after_id, up_to_id] 之间变动过的药品及其当前库存与阈值，每个药品一行"""
+        sql = """
+            SELECT c.medicine_id, m.medicine_name, m.specification, i.stock_quantity,
+                   IFNULL(i.low_stock_threshold, %s) AS threshold
+            FROM (SELECT DISTINCT medicine_id FROM inventory_change_log
+                  WHERE log_id > %s AND log_id <= %s) c
+            JOIN inventory i ON i.medicine_id = c.medicine_id
+            JOIN medicine m ON m.medicine_id = c.medicine_id
+        """
+        with self.db.session() as cursor:
+            cursor.execute(sql, (default_threshold, after_id, up_to_id))
+            return cursor.fetchall()
+
+    def set_low_stock_threshold(self, m_id, threshold):
+        """
+        设置单个药品的预警阈值；threshold 为 None 时恢复系统默认值
+        返回该药品是否有库存记录（MySQL 的影响行数不含取值未变的行，不能据此判断记录是否存在）
+        """
+        with self.db.session() as cursor:
+            cursor.execute("UPDATE inventory SET low_stock_threshold = %s WHERE medicine_id = %s", (threshold, m_id))
+            if cursor.rowcount:
+                return True
+            cursor.execute("SELECT 1 FROM inventory WHERE medicine_id = %s", (m_id,))
+            return cursor.fetchone() is not None
+
+    def purge_change_log(self, up_to_id, older_than=None):
+        """清理流水号不超过 up_to_id 的变动日志；older_than 为秒数时只清理按数据库时钟已写入超过该时长的记录"""
+        sql, args = "DELETE FROM inventory_change_log WHERE log_id <= %s", [up_to_id]
+        if older_than is not None:
+            sql += f" AND changed_at <= {self.db.backend.seconds_ago_sql()}"
+            args.append(older_than)
+        with self.db.session() as cursor:
+            cursor.execute(sql, args)
+            return cursor.rowcount
+
 
 # ==========================================
 # 4. 销售管理模块 (Sales & Return)
@@ -214,6 +606,16 @@ class SalesDAO(BaseDAO):
             cursor.execute(sql)
             return cursor.fetchall()
 
+    def get_sales_history_page(self, page_size=50, cursor=None, direction="next"):
+        """按 (sales_date, sales_id) 键集分页查询销售主单"""
+        sql = """
+            SELECT s.*, c.cust_name, e.emp_name 
+            FROM sales_order s
+            JOIN customer c ON s.cust_id = c.cust_id
+            JOIN employee e ON s.emp_id = e.emp_id
+        """
+        return self._keyset_page(sql, "s.sales_date", "s.sales_id", page_size, cursor, direction)
+
     def get_sale_details(self, sales_id):
         """查询某一销售单的药品明细"""
         sql = """
@@ -239,6 +641,16 @@ class SalesDAO(BaseDAO):
             cursor.execute(sql)
             return cursor.fetchall()
 
+    def get_return_history_page(self, page_size=50, cursor=None, direction="next"):
+        """按 (return_date, return_id) 键集分页查询退货记录"""
+        sql = """
+            SELECT r.*, c.cust_name, e.emp_name 
+            FROM sales_return r
+            JOIN customer c ON r.cust_id = c.cust_id
+            JOIN employee e ON r.emp_id = e.emp_id
+        """
+        return self._keyset_page(sql, "r.return_date", "r.return_id", page_size, cursor, direction)
+
     def get_return_details(self, return_id):
         """查询某一退货单的药品明细"""
         sql = """
@@ -251,26 +663,112 @@ class SalesDAO(BaseDAO):
             cursor.execute(sql, (return_id,))
             return cursor.fetchall()
 
-    def register_sale(self, sales_id, cust_id, emp_id, remark, items):
+    def register_sale(self, sales_id, cust_id, emp_id, remark, items, bulk=False, engine=None, sales_date=None):
         """
         触发器 tri_sales_reduce_stock 会自动拦截库存不足的插入
+        主单与明细在同一个事务中提交，任一行库存不足则整单回滚
+        bulk=True: 明细以一条多行 INSERT 发送
+        engine: 写入引擎（见 WRITE_ENGINES），缺省取 self.write_engine
+        sales_date: 销售时间，缺省取数据库当前时间（离线单据重放时传入收银时的时间，日结记入当天）
         """
-        with self.db.session() as cursor:
-            sql_main = "INSERT INTO sales_order (sales_id, cust_id, emp_id, total_amount, remark) VALUES (%s, %s, %s, 0, %s)"
-            cursor.execute(sql_main, (sales_id, cust_id, emp_id, remark))
+        date_col, date_args = ("", ()) if sales_date is None else (", sales_date", (sales_date,))
+        sql_main = (f"INSERT INTO sales_order (sales_id, cust_id, emp_id, total_amount, remark{date_col}) "
+                    f"VALUES ({_placeholders(5 + len(date_args))})")
+        sql_detail = "INSERT INTO sales_detail (sales_id, medicine_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"
+        rows = [(sales_id, item['medicine_id'], item['quantity'], item['unit_price']) for item in items]
 
-            sql_detail = "INSERT INTO sales_detail (sales_id, medicine_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"
-            for item in items:
-                cursor.execute(sql_detail, (sales_id, item['medicine_id'], item['quantity'], item['unit_price']))
+        if self._resolve_engine(engine) == "set_based":
+            return self._register_sale_set_based(sales_id, cust_id, emp_id, remark, items, sql_main, date_args,
+                                                 sql_detail, rows)
 
-    def register_return(self, return_id, sales_id, emp_id, cust_id, total_amount, reason, items):
-        with self.db.session() as cursor:
-            sql_main = "INSERT INTO sales_return (return_id, sales_id, emp_id, cust_id, total_amount, reason) VALUES (%s, %s, %s, %s, %s, %s)"
-            cursor.execute(sql_main, (return_id, sales_id, emp_id, cust_id, total_amount, reason))
+        with self.db.transaction() as cursor:
+            cursor.execute(sql_main, (sales_id, cust_id, emp_id, 0, remark) + date_args)
+            self._insert_details(cursor, sql_detail, rows, bulk)
+
+    def _register_sale_set_based(self, sales_id, cust_id, emp_id, remark, items, sql_main, date_args, sql_detail, rows):
+        """集合式销售：锁定库存一次性校验、主单直接写入总价（日结只更新一次）、一条 upsert 扣减库存"""
+        deltas = _sum_by_medicine(items, 'quantity')
+        total = sum((_money(it['unit_price']) * int(it['quantity']) for it in items), Decimal("0.00"))
+
+        with self._set_based_write() as cursor:
+            stock = self._lock_stock(cursor, deltas)
+            for m_id, qty in deltas.items():
+                if stock.get(m_id) is None or stock[m_id] < qty:
+                    raise _business_error(f"库存不足：药品 {m_id} 当前库存无法满足本次销售数量！")
+            cursor.execute(sql_main, (sales_id, cust_id, emp_id, total, remark) + date_args)
+            cursor.executemany(sql_detail, rows)
+            self._apply_stock_deltas(cursor, deltas, -1)
+
+    def register_sale_once(self, sales_id, cust_id, emp_id, remark, items, sales_date=None, engine=None):
+        """
+        幂等写入（离线单据重放）：单号已存在时不再写入并返回 False
+        上一次重放可能已在中心库提交、但本地尚未来得及确认，重试时不会重复扣减库存与记账
+        预检查不加锁：其他连接在检查之后写入同一单号时主键冲突（1062），确认主单已存在后同样视为已写入
+        """
+        sql_exists = "SELECT 1 FROM sales_order WHERE sales_id = %s"
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(sql_exists, (sales_id,))
+                if cursor.fetchone():
+                    return False
+                self.register_sale(sales_id, cust_id, emp_id, remark, items, bulk=True, engine=engine,
+                                   sales_date=sales_date)
+        except pymysql.err.IntegrityError as e:
+            if e.args[0] != 1062:
+                raise
+            # 明细重复同样是 1062，只有主单确实已由其他连接写入时才算已写入
+            with self.db.session() as cursor:
+                cursor.execute(sql_exists, (sales_id,))
+                if not cursor.fetchone():
+                    raise
+            return False
+        return True
+
+    def register_return(self, return_id, sales_id, emp_id, cust_id, total_amount, reason, items, bulk=False, engine=None,
+                        return_date=None):
+        """
+        退货主单与明细在同一个事务中提交；bulk=True 时明细以一条多行 INSERT 发送
+        engine: 写入引擎（见 WRITE_ENGINES），缺省取 self.write_engine
+        return_date: 退货时间，缺省取数据库当前时间（离线退货重放时传入受理时的时间）
+        """
+        date_col, date_args = ("", ()) if return_date is None else (", return_date", (return_date,))
+        sql_main = (f"INSERT INTO sales_return (return_id, sales_id, emp_id, cust_id, total_amount, reason{date_col}) "
+                    f"VALUES ({_placeholders(6 + len(date_args))})")
+        sql_detail = "INSERT INTO sales_return_detail (return_id, medicine_id, return_quantity) VALUES (%s, %s, %s)"
+        rows = [(return_id, item['medicine_id'], item['return_quantity']) for item in items]
+        main_args = (return_id, sales_id, emp_id, cust_id, total_amount, reason) + date_args
+
+        if self._resolve_engine(engine) == "set_based":
+            with self._set_based_write() as cursor:
+                cursor.execute(sql_main, main_args)
+                cursor.executemany(sql_detail, rows)
+                self._add_existing_stock(cursor, _sum_by_medicine(items, 'return_quantity'))
+            return
+
+        with self.db.transaction() as cursor:
+            cursor.execute(sql_main, main_args)
+            self._insert_details(cursor, sql_detail, rows, bulk)
 
-            sql_detail = "INSERT INTO sales_return_detail (return_id, medicine_id, return_quantity) VALUES (%s, %s, %s)"
-            for item in items:
-                cursor.execute(sql_detail, (return_id, item['medicine_id'], item['return_quantity']))
+    def register_return_once(self, return_id, sales_id, emp_id, cust_id, total_amount, reason, items,
+                             return_date=None, engine=None):
+        """幂等写入离线退货（幂等键为退货单号），规则同 register_sale_once：退货单已存在时返回 False"""
+        sql_exists = "SELECT 1 FROM sales_return WHERE return_id = %s"
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(sql_exists, (return_id,))
+                if cursor.fetchone():
+                    return False
+                self.register_return(return_id, sales_id, emp_id, cust_id, total_amount, reason, items, bulk=True,
+                                     engine=engine, return_date=return_date)
+        except pymysql.err.IntegrityError as e:
+            if e.args[0] != 1062:
+                raise
+            with self.db.session() as cursor:
+                cursor.execute(sql_exists, (return_id,))
+                if not cursor.fetchone():
+                    raise
+            return False
+        return True
 
 
 # ==========================================
@@ -283,16 +781,250 @@ class FinanceDAO(BaseDAO):
             cursor.execute("SELECT * FROM sales_daily_summary ORDER BY summary_date DESC")
             return cursor.fetchall()
 
+    # 汇总列在各类报表中的统一取法，prefix 决定返回字段名（month_sales / year_sales ...）
+    @staticmethod
+    def _sum_columns(prefix):
+        return f"""
+            SUM(total_sales_amount) as {prefix}_sales,
+            SUM(total_return_amount) as {prefix}_return,
+            SUM(net_amount) as {prefix}_net,
+            SUM(order_count) as {prefix}_orders
+        """
+
     def get_monthly_report(self, year, month):
+        """月度报表：直接按主键读取月汇总行"""
+        with self.db.session() as cursor:
+            sql = f"SELECT {self._sum_columns('month')} FROM sales_monthly_summary WHERE summary_month = %s"
+            cursor.execute(sql, (_month_start(year, month),))
+            return cursor.fetchone()
+
+    def get_quarterly_report(self, year, quarter):
+        """季度报表：月汇总表上的主键范围（3 行）"""
+        start = _month_start(year, (int(quarter) - 1) * 3 + 1)
+        with self.db.session() as cursor:
+            sql = f"""
+                SELECT {self._sum_columns('quarter')} FROM sales_monthly_summary
+                WHERE summary_month >= %s AND summary_month < %s
+            """
+            cursor.execute(sql, (start, _add_months(start, 3)))
+            return cursor.fetchone()
+
+    def get_yearly_report(self, year):
+        """年度报表：直接按主键读取年汇总行"""
+        with self.db.session() as cursor:
+            sql = f"SELECT {self._sum_columns('year')} FROM sales_yearly_summary WHERE summary_year = %s"
+            cursor.execute(sql, (int(year),))
+            return cursor.fetchone()
+
+    def get_range_report(self, start_date, end_date):
+        """任意日期区间 [start_date, end_date]：日汇总表主键范围扫描（不对列套函数）"""
+        with self.db.session() as cursor:
+            sql = f"""
+                SELECT {self._sum_columns('period')} FROM sales_daily_summary
+                WHERE summary_date >= %s AND summary_date < %s
+            """
+            cursor.execute(sql, (start_date, end_date + datetime.timedelta(days=1)))
+            return cursor.fetchone()
+
+    def get_monthly_trend(self, start_year, end_year):
+        """多年逐月趋势：每月一行，行数只与月份数有关"""
         with self.db.session() as cursor:
             sql = """
-                SELECT 
-                    SUM(total_sales_amount) as month_sales,
-                    SUM(total_return_amount) as month_return,
-                    SUM(net_amount) as month_net,
-                    SUM(order_count) as month_orders
-                FROM sales_daily_summary 
-                WHERE YEAR(summary_date) = %s AND MONTH(summary_date) = %s
+                SELECT summary_month, total_sales_amount, total_return_amount, net_amount, order_count
+                FROM sales_monthly_summary
+                WHERE summary_month >= %s AND summary_month < %s
+                ORDER BY summary_month
             """
-            cursor.execute(sql, (year, month))
-            return cursor.fetchone()
\ No newline at end of file
+            cursor.execute(sql, (_month_start(start_year, 1), _month_start(int(end_year) + 1, 1)))
+            return cursor.fetchall()
+
+    def get_yearly_trend(self, start_year, end_year):
+        with self.db.session() as cursor:
+            sql = """
+                SELECT summary_year, total_sales_amount, total_return_amount, net_amount, order_count
+                FROM sales_yearly_summary
+                WHERE summary_year BETWEEN %s AND %s
+                ORDER BY summary_year
+            """
+            cursor.execute(sql, (int(start_year), int(end_year)))
+            return cursor.fetchall()
+
+    def rebuild_rollups(self):
+        """按日汇总表重算月/年汇总（数据修复或批量导入后使用），在一个事务内完成"""
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM sales_monthly_summary")
+            cursor.execute("DELETE FROM sales_yearly_summary")
+            backend = self.db.backend
+            cursor.execute(f"""
+                INSERT INTO sales_monthly_summary
+                    (summary_month, total_sales_amount, total_return_amount, net_amount, order_count)
+                SELECT {backend.month_start_sql("summary_date")},
+                       SUM(total_sales_amount), SUM(total_return_amount), SUM(net_amount), SUM(order_count)
+                FROM sales_daily_summary
+                GROUP BY 1
+            """)
+            months = cursor.rowcount
+            cursor.execute(f"""
+                INSERT INTO sales_yearly_summary
+                    (summary_year, total_sales_amount, total_return_amount, net_amount, order_count)
+                SELECT {backend.year_sql("summary_month")}, SUM(total_sales_amount), SUM(total_return_amount),
+                       SUM(net_amount), SUM(order_count)
+                FROM sales_monthly_summary
+                GROUP BY 1
+            """)
+            return months, cursor.rowcount
+
+
+# ==========================================
+# 6. 销售分析模块 (Analytics)
+# ==========================================
+
+class AnalyticsDAO(BaseDAO):
+    def iter_sales_lines(self, start, end, since=None, chunk_size=5000):
+        """
+        流式读取 [start, end) 区间内的销售明细（服务端游标，按块产出，不在客户端缓存整个结果集）
+        since: 只读取 sales_date >= since 的部分，用于增量刷新
+        每块为字典列表：sales_id, sales_date, medicine_id, medicine_name, category,
+                        cust_id, cust_name, emp_id, emp_name, quantity, amount
+        """
+        sql = """
+            SELECT s.sales_id, s.sales_date, d.medicine_id, m.medicine_name, m.category,
+                   s.cust_id, c.cust_name, s.emp_id, e.emp_name,
+                   d.quantity, d.quantity * d.unit_price AS amount
+            FROM sales_order s
+            JOIN sales_detail d ON d.sales_id = s.sales_id
+            JOIN medicine m ON m.medicine_id = d.medicine_id
+            LEFT JOIN customer c ON c.cust_id = s.cust_id
+            LEFT JOIN employee e ON e.emp_id = s.emp_id
+            WHERE s.sales_date >= %s AND s.sales_date < %s
+            ORDER BY s.sales_date
+        """
+        params = [since if since is not None and since > start else start, end]
+        with self.db.session(STREAM_DICT) as cursor:
+            cursor.execute(sql, params)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+# ==========================================
+# 7. 数据导出模块 (Export)
+# ==========================================
+
+class ExportDAO(BaseDAO):
+    # 导出数据集：名称 -> (表头, 查询语句, 计数语句)
+    # 历史类数据集按明细行导出，行数可能达到百万级，只能流式读取
+    # 排序方向与日期索引一致（日期、单号同为 DESC），可倒序扫描索引而不必文件排序
+    DATASETS = {
+        "sales_history": (
+            ["销售单号", "销售时间", "客户", "收银员", "药品ID", "药品名称", "数量", "单价", "小计", "整单金额", "备注"],
+            """
+            SELECT s.sales_id, s.sales_date, c.cust_name, e.emp_name, d.medicine_id, m.medicine_name,
+                   d.quantity, d.unit_price, d.quantity * d.unit_price, s.total_amount, s.remark
+            FROM sales_order s
+            JOIN sales_detail d ON d.sales_id = s.sales_id
+            JOIN medicine m ON m.medicine_id = d.medicine_id
+            LEFT JOIN customer c ON c.cust_id = s.cust_id
+            LEFT JOIN employee e ON e.emp_id = s.emp_id
+            ORDER BY s.sales_date DESC, s.sales_id DESC
+            """,
+            "SELECT COUNT(*) FROM sales_detail",
+        ),
+        "purchase_history": (
+            ["入库单号", "入库时间", "供应商", "经办人", "发票号", "药品ID", "药品名称", "数量", "进价", "小计", "整单金额", "备注"],
+            """
+            SELECT p.order_id, p.order_date, s.supp_name, e.emp_name, p.invoice_number, d.medicine_id,
+                   m.medicine_name, d.quantity, d.unit_price, d.quantity * d.unit_price, p.total_amount, p.remark
+            FROM purchase_order p
+            JOIN purchase_detail d ON d.order_id = p.order_id
+            JOIN medicine m ON m.medicine_id = d.medicine_id
+            LEFT JOIN supplier s ON s.supp_id = p.supp_id
+            LEFT JOIN employee e ON e.emp_id = p.emp_id
+            ORDER BY p.order_date DESC, p.order_id DESC
+            """,
+            "SELECT COUNT(*) FROM purchase_detail",
+        ),
+        "return_history": (
+            ["退货单号", "原销售单号", "退货时间", "客户", "经办人", "药品ID", "药品名称", "退货数量", "整单退款", "退货原因"],
+            """
+            SELECT r.return_id, r.sales_id, r.return_date, c.cust_name, e.emp_name, rd.medicine_id,
+                   m.medicine_name, rd.return_quantity, r.total_amount, r.reason
+            FROM sales_return r
+            JOIN sales_return_detail rd ON rd.return_id = r.return_id
+            JOIN medicine m ON m.medicine_id = rd.medicine_id
+            LEFT JOIN customer c ON c.cust_id = r.cust_id
+            LEFT JOIN employee e ON e.emp_id = r.emp_id
+            ORDER BY r.return_date DESC, r.return_id DESC
+            """,
+            "SELECT COUNT(*) FROM sales_return_detail",
+        ),
+        "inventory": (
+            ["药品ID", "药品名称", "分类", "规格", "生产厂家", "库存总量", "预警阈值", "零售价", "有效期至"],
+            """
+            SELECT m.medicine_id, m.medicine_name, m.category, m.specification, m.manufacturer,
+                   i.stock_quantity, i.low_stock_threshold, m.retail_price, m.expiry_date
+            FROM inventory i
+            JOIN medicine m ON i.medicine_id = m.medicine_id
+            ORDER BY i.stock_quantity ASC
+            """,
+            "SELECT COUNT(*) FROM inventory",
+        ),
+        "daily_summary": (
+            ["统计日期", "销售额", "退货额", "净额", "销售单数"],
+            """
+            SELECT summary_date, total_sales_amount, total_return_amount, net_amount, order_count
+            FROM sales_daily_summary
+            ORDER BY summary_date DESC
+            """,
+            "SELECT COUNT(*) FROM sales_daily_summary",
+        ),
+    }
+
+    def count_rows(self, name):
+        """数据集的总行数（用于进度显示）"""
+        with self.db.session(TUPLE) as cursor:
+            cursor.execute(self.DATASETS[name][2])
+            return cursor.fetchone()[0]
+
+    def iter_rows(self, name, chunk_size=2000):
+        """
+        用流式游标（MySQL 为无缓冲的 SSCursor）逐块读取数据集，每块为元组列表
+        客户端任何时刻只持有一块数据；调用方中途停止迭代（关闭生成器）时不再读取剩余结果：
+        MySQL 连接直接断开并从连接池丢弃，SQLite 只关闭游标
+        """
+        sql = self.DATASETS[name][1]
+        with self.db.session(STREAM_TUPLE) as cursor:
+            cursor.execute(sql)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+# ==========================================
+# 8. 批量导入模块 (Import)
+# ==========================================
+
+class ImportDAO(BaseDAO):
+    def upsert(self, cursor, table, columns, key_columns, rows):
+        """
+        多行 upsert：INSERT ... VALUES (...), (...) ON DUPLICATE KEY UPDATE
+        PyMySQL 的 executemany 会把 INSERT ... VALUES 语句合并成多行语句按包大小分批发送
+        """
+        updates = ", ".join(f"{c} = VALUES({c})" for c in columns if c not in key_columns)
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(len(columns))}) "
+               f"ON DUPLICATE KEY UPDATE {updates}")
+        cursor.executemany(sql, rows)
+
+    def existing_keys(self, table, key_column, values):
+        """values 中已在 table 里存在的主键集合"""
+        values = list(set(values))
+        if not values:
+            return set()
+        with self.db.session(TUPLE) as cursor:
+            cursor.execute(f"SELECT {key_column} FROM {table} WHERE {key_column} IN ({_placeholders(len(values))})",
+                           values)
+            return {row[0] for row in cursor.fetchall()}
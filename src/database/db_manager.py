@@ -1,54 +1,362 @@
+import threading
+import time
+from collections import deque
 import pymysql
-import pymysql.cursors
-from src.utils.config_loader import get_db_config 
+from src.utils.config_loader import add_settings_listener, get_settings
 from src.utils.logger import logger
+from src.database.backends import DICT, STREAM_DICT, STREAM_TUPLE, create_backend
+from src.database.profiler import QueryProfiler
 from contextlib import contextmanager
 
+def is_connection_error(e):
+    """判断异常是否意味着连接本身已失效（客户端错误码 2000+，如 2006/2013）"""
+    if isinstance(e, pymysql.err.InterfaceError):
+        return True
+    if isinstance(e, pymysql.err.OperationalError) and e.args:
+        return isinstance(e.args[0], int) and e.args[0] >= 2000
+    return False
+
+
+class PoolTimeoutError(Exception):
+    """连接池已满且在等待时间内没有连接被归还"""
+
+
+class ConnectionPool:
+    """
+    有界、线程安全的数据库连接池
+    - 空闲连接按 LIFO 复用，最近归还的连接最可能仍然存活
+    - 连接存活超过 recycle 秒后关闭重建；空闲超过 ping_interval 秒的连接借出前先 ping 探活
+    - stats 记录命中(hits)、等待(waits)、新建(creates)等计数
+    """
+    def __init__(self, creator, min_size=1, max_size=8, timeout=5.0, recycle=3600, ping_interval=30):
+        if max_size < 1:
+            raise ValueError("max_size 必须大于 0")
+        self._creator = creator
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()   # 元素: [conn, created_at, last_used]
+        self._created_at = {}  # id(conn) -> 创建时间
+        self._size = 0         # 已创建且尚未关闭的连接总数（含借出中的）
+        self.stats = {"hits": 0, "waits": 0, "creates": 0, "recycles": 0,
+                      "ping_failures": 0, "timeouts": 0, "discards": 0}
+
+    def _new_connection(self):
+        conn = self._creator()
+        with self._cond:
+            self.stats["creates"] += 1
+            self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _close_quietly(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def warm_up(self):
+        """预先建立 min_size 个连接"""
+        with self._cond:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for i in range(max(missing, 0)):
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._size -= missing - i
+                    self._cond.notify_all()
+                raise
+            self._release_idle(conn)
+
+    def _release_idle(self, conn):
+        with self._cond:
+            self._idle.append([conn, self._created_at.get(id(conn), time.monotonic()), time.monotonic()])
+            self._cond.notify()
+
+    def acquire(self):
+        """借出一个可用连接；池满时最多等待 timeout 秒"""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        entry = self._idle.pop()
+                        self.stats["hits"] += 1
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise PoolTimeoutError(f"等待数据库连接超时（{self.timeout}s，上限 {self.max_size}）")
+                    if not waited:
+                        self.stats["waits"] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    return self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            conn, created_at, last_used = entry
+            now = time.monotonic()
+            if self.recycle and now - created_at > self.recycle:
+                with self._cond:
+                    self.stats["recycles"] += 1
+                self._replace(conn)
+                continue
+            if self.ping_interval is not None and now - last_used > self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self.stats["ping_failures"] += 1
+                    self._replace(conn)
+                    continue
+            return conn
+
+    def _replace(self, conn):
+        """关闭失效连接并让出名额，由下一轮循环重新借出或新建"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def release(self, conn, discard=False):
+        """归还连接；discard=True 或连接已断开时直接关闭，连接总数超过上限（上限被调低）时也直接关闭"""
+        if discard or not getattr(conn, "open", True):
+            with self._cond:
+                self.stats["discards"] += 1
+            self._replace(conn)
+            return
+        with self._cond:
+            over_limit = self._size > self.max_size
+        if over_limit:
+            self._replace(conn)
+            return
+        self._release_idle(conn)
+
+    def configure(self, min_size, max_size, timeout, recycle, ping_interval):
+        """
+        运行时调整池参数（配置热加载）：上限调高立即唤醒等待者；
+        调低时多余的空闲连接立即关闭，借出中的连接归还时再关闭
+        """
+        if max_size < 1:
+            raise ValueError("max_size 必须大于 0")
+        with self._cond:
+            self.min_size = max(0, min(min_size, max_size))
+            self.max_size = max_size
+            self.timeout = timeout
+            self.recycle = recycle
+            self.ping_interval = ping_interval
+            excess = []
+            while self._idle and self._size > self.max_size:
+                excess.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._cond.notify_all()
+        for conn in excess:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接（借出中的连接归还后照常入池）"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def snapshot(self):
+        """返回当前连接池状态与统计计数"""
+        with self._cond:
+            data = dict(self.stats)
+            data.update({"size": self._size, "idle": len(self._idle),
+                         "in_use": self._size - len(self._idle),
+                         "min_size": self.min_size, "max_size": self.max_size})
+            return data
+
+
 class DBManager:
     _instance = None  # 用于存放单例
+    _instance_lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
         """单例模式：确保全局只有一个 DBManager 实例"""
         if not cls._instance:
-            cls._instance = super(DBManager, cls).__new__(cls)
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = super(DBManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, backend=None):
         # 增加一个标识，确保 __init__ 里的逻辑（如读配置、打日志）只执行一次
         if not hasattr(self, '_initialized'):
             try:
-                self.db_config = get_db_config()
-                logger.debug("数据库连接配置读取成功（全局初始化）")
+                self.settings = get_settings()
+                self.db_config = self.settings.database._asdict()
+                self.backend = backend or create_backend(self.db_config, self.settings.sqlite._asdict())
+                self.pool = ConnectionPool(self._connect, **self.settings.pool._asdict())
+                self.profiler = QueryProfiler(**self.settings.profiler._asdict())
+                self._warmed = False
+                self._local = threading.local()  # 记录各线程当前所处的事务
+                add_settings_listener(self._apply_settings)
+                logger.debug("数据库连接配置读取成功（全局初始化）| 后端: %s", self.backend.describe())
                 self._initialized = True
             except Exception as e:
                 logger.error(f"初始化DBManager失败: {e}")
                 raise e
 
+    @classmethod
+    def configure(cls, backend):
+        """在首次使用前指定存储后端（如测试与基准使用 SQLiteBackend(":memory:")），替换已有实例"""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.close()
+            cls._instance = None
+        return cls(backend)
+
+    def _apply_settings(self, old, new):
+        """
+        配置热加载：连接池与查询采集参数即时生效
+        连接信息与存储后端变更涉及已建立的连接和未提交的事务，需重启后生效
+        """
+        self.settings = new
+        if old.pool != new.pool:
+            self.pool.configure(**new.pool._asdict())
+            logger.info("连接池配置已更新 | %s", new.pool)
+        if old.profiler != new.profiler:
+            self.profiler.configure(**new.profiler._asdict())
+            logger.info("查询采集配置已更新 | %s", new.profiler)
+        if old.database != new.database or old.sqlite != new.sqlite:
+            logger.warning("数据库连接配置已变更，重启程序后生效 | 当前后端: %s", self.backend.describe())
+
+    def _connect(self):
+        """建立一条新的物理连接（仅由连接池调用）"""
+        return self.backend.connect()
+
+    def _warm_up_once(self):
+        """首次使用时按 min_size 预热连接池，失败不影响本次借用"""
+        if self._warmed:
+            return
+        self._warmed = True
+        try:
+            self.pool.warm_up()
+        except Exception as e:
+            logger.warning(f"连接池预热失败: {e}")
+
+    def _acquire(self):
+        """从连接池借出连接；采集开启时记录等待耗时"""
+        if not self.profiler.enabled:
+            return self.pool.acquire()
+        start = time.perf_counter()
+        conn = self.pool.acquire()
+        self.profiler.record_acquire((time.perf_counter() - start) * 1000)
+        return conn
+
     @contextmanager
-    def session(self):
-        """上下文管理器"""
+    def session(self, cursor_kind=None):
+        """
+        上下文管理器：从连接池借出连接，用完归还（自动提交模式，每条语句独立生效）
+        cursor_kind: backends 中的游标类型，默认 DICT；大结果集可传 STREAM_DICT 流式读取（须在块内读完）
+        """
+        # 当前线程处于 transaction() 中时，复用事务游标，使读写都落在同一个工作单元里
+        tx_cursor = getattr(self._local, "tx_cursor", None)
+        if tx_cursor is not None:
+            yield tx_cursor
+            return
+
+        self._warm_up_once()
         conn = None
+        cursor = None
+        broken = False
+        abandoned = False
         try:
-            conn = pymysql.connect(
-                host=self.db_config['host'],
-                port=self.db_config['port'],
-                user=self.db_config['user'],
-                password=self.db_config['password'],
-                database=self.db_config['database'],
-                charset=self.db_config['charset'],
-                autocommit=True,
-                connect_timeout=5
-            )
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            yield cursor
+            conn = self._acquire()
+            cursor = self.backend.cursor(conn, cursor_kind)
+            yield self.profiler.wrap(cursor)
+        except GeneratorExit:
+            # 在生成器中流式读取、调用方中途停止迭代：剩余结果交给后端放弃，而不是由游标关闭时读完
+            abandoned = cursor_kind in (STREAM_DICT, STREAM_TUPLE)
+            raise
         except Exception as e:
             logger.error(f"数据库会话异常: {e}")
-            if conn: conn.rollback()
+            # 网络/协议层错误说明连接已不可用，归还时直接丢弃
+            broken = is_connection_error(e)
             raise e
         finally:
             if conn:
-                cursor.close()
-                conn.close()
+                if abandoned:
+                    self.backend.abandon(conn, cursor)
+                elif cursor:
+                    cursor.close()
+                self.pool.release(conn, discard=broken)
+
+    @contextmanager
+    def transaction(self):
+        """
+        工作单元（Unit of Work）：块内所有语句属于同一个事务
+        - 进入时 START TRANSACTION，自动提交在事务期间暂停
+        - 正常退出时只 COMMIT 一次；发生任何异常则 ROLLBACK 后原样抛出
+        - 同一线程内嵌套调用 transaction()/session() 会加入外层事务，由最外层负责提交
+        """
+        tx_cursor = getattr(self._local, "tx_cursor", None)
+        if tx_cursor is not None:
+            yield tx_cursor
+            return
+
+        self._warm_up_once()
+        conn = None
+        cursor = None
+        broken = False
+        try:
+            conn = self._acquire()
+            conn.begin()
+            cursor = self.backend.cursor(conn, DICT)
+            tx_cursor = self._local.tx_cursor = self.profiler.wrap(cursor)
+            try:
+                yield tx_cursor
+            finally:
+                self._local.tx_cursor = None
+            conn.commit()
+        except Exception as e:
+            logger.error(f"数据库事务异常，已回滚: {e}")
+            broken = is_connection_error(e)
+            if conn and not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            raise e
+        finally:
+            if conn:
+                if cursor: cursor.close()
+                self.pool.release(conn, discard=broken)
+
+    def pool_stats(self):
+        """连接池统计：hits / waits / creates 等"""
+        return self.pool.snapshot()
+
+    def query_stats(self):
+        """查询统计：按归一化 SQL 聚合的次数、耗时分布、行数与最近的慢查询"""
+        return self.profiler.snapshot()
+
+    def close(self):
+        """关闭连接池中的空闲连接（程序退出时调用）"""
+        self.pool.close_all()
 
     def execute_with_error_handle(self, func, *args, **kwargs):
         """异常处理的通用函数"""
@@ -0,0 +1,392 @@
+# src/database/offline_queue.py
+"""
+离线收银写队列（Offline-first）
+- 中心库不可达时，销售单写入本地嵌入式 SQLite 文件（WAL + synchronous=FULL，提交即落盘），收银不中断
+- 离线期间按本地库存快照校验并扣减库存，快照在在线时定期从中心库整体刷新；
+  快照与队列保存在同一个文件中，程序在中心库不可达时启动也使用上次保存的快照
+- 本机受理的销售（在线与离线）在本地保留一份明细副本，离线退货按副本校验可退数量并回补快照库存
+- 单据按入队顺序重放；幂等键为单据号（中心库主键），重放时已存在的单据直接确认，不会重复记账
+- 连接失败后 retry_interval 秒内不再尝试连接中心库，避免每笔销售都等待 connect_timeout
+- 中心库拒绝的单据（如其他收银台已售出导致库存不足）转入失败状态并保留原因，不阻塞后续单据
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from src.utils.config_loader import get_settings
+from src.utils.logger import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_ops (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_key     TEXT NOT NULL UNIQUE,
+    kind       TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'pending',
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pending_status ON pending_ops (status, seq);
+CREATE TABLE IF NOT EXISTS stock_snapshot (
+    medicine_id    TEXT PRIMARY KEY,
+    medicine_name  TEXT,
+    specification  TEXT,
+    manufacturer   TEXT,
+    retail_price   TEXT,
+    expiry_date    TEXT,
+    stock_quantity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sale_copy (
+    sales_id    TEXT NOT NULL,
+    medicine_id TEXT NOT NULL,
+    quantity    INTEGER NOT NULL,
+    returnable  INTEGER NOT NULL,
+    unit_price  TEXT,
+    created_at  REAL NOT NULL,
+    PRIMARY KEY (sales_id, medicine_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+SNAPSHOT_COLUMNS = ("medicine_id", "medicine_name", "specification", "manufacturer",
+                    "retail_price", "expiry_date", "stock_quantity")
+
+SALE_COPY_RETENTION = 30 * 86400   # 本地销售副本保留时长（秒），超过后该单只能在线退货
+
+# 重放前仍在队列中的单据对快照库存的影响：销售扣减、退货回补
+_STOCK_SIGN = {"sale": (-1, "quantity"), "return": (1, "return_quantity")}
+
+
+class OfflineStockError(Exception):
+    """离线模式下按本地库存快照校验失败（快照中没有该药品或库存不足）"""
+
+
+class OfflineReturnError(Exception):
+    """离线模式下按本地销售副本校验退货失败（本机没有原单副本或退货数量超过可退数量）"""
+
+
+def _sum_quantities(items, field):
+    totals = {}
+    for item in items:
+        totals[item['medicine_id']] = totals.get(item['medicine_id'], 0) + int(item[field])
+    return totals
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class OfflineQueue:
+    """
+    path          : 队列文件（":memory:" 用于测试）
+    retry_interval: 连接失败后多少秒内视为离线，不再尝试连接中心库
+    """
+    def __init__(self, path, retry_interval=30):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.retry_interval = retry_interval
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = FULL")   # 已受理的销售必须在断电后仍然存在
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._offline_until = 0.0
+        self.pending_count = self._count("pending")
+        self.stats = {"enqueued": 0, "synced": 0, "duplicates": 0, "failed": 0,
+                      "last_sync_ops": 0, "last_sync_seconds": 0.0, "last_sync_at": None}
+        self._log_saved_snapshot()
+
+    def _log_saved_snapshot(self):
+        """启动时报告上次保存的库存快照；从未刷新过快照时离线收银无法受理销售"""
+        age = self.snapshot_age()
+        if age is None:
+            logger.warning("离线收银尚无本地库存快照 | 首次连上中心库后生成，此前离线时无法受理销售")
+            return
+        count = self._conn.execute("SELECT COUNT(*) FROM stock_snapshot").fetchone()[0]
+        logger.info("已加载本地库存快照 | 药品: %s 种 | 快照时间: %.0fs 前 | 待同步单据: %s",
+                    count, age, self.pending_count)
+
+    def _count(self, status):
+        return self._conn.execute("SELECT COUNT(*) FROM pending_ops WHERE status = ?", (status,)).fetchone()[0]
+
+    # ---------- 在线状态 ----------
+
+    def is_offline(self):
+        """最近一次连接失败后仍在重试间隔内"""
+        return time.monotonic() < self._offline_until
+
+    def active(self):
+        """离线受理中：仍处于离线状态，或还有待同步的单据（新单据须排在其后）"""
+        return self.is_offline() or self.pending_count > 0
+
+    def mark_offline(self):
+        if not self.is_offline():
+            logger.warning(f"中心数据库不可达，切换到离线收银 | {self.retry_interval}s 后重试连接")
+        self._offline_until = time.monotonic() + self.retry_interval
+
+    def mark_online(self):
+        if self._offline_until:
+            logger.info("中心数据库已恢复连接 | 待同步单据: %s", self.pending_count)
+        self._offline_until = 0.0
+
+    # ---------- 入队 / 出队 ----------
+
+    def enqueue_sale(self, sales_id, cust_id, emp_id, remark, items):
+        """
+        受理一笔离线销售：按快照校验并扣减库存、写入队列，两者在同一个本地事务中提交
+        返回 False 表示该单号已在队列中（重复提交）
+        """
+        payload = {"sales_id": sales_id, "cust_id": cust_id, "emp_id": emp_id, "remark": remark,
+                   "items": [dict(item) for item in items],
+                   "sales_date": datetime.datetime.now().replace(microsecond=0)}
+        needs = _sum_quantities(items, 'quantity')
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("SELECT 1 FROM pending_ops WHERE op_key = ?", (f"sale:{sales_id}",))
+                if cur.fetchone():
+                    cur.execute("ROLLBACK")
+                    return False
+                for m_id, qty in needs.items():
+                    row = cur.execute("SELECT stock_quantity FROM stock_snapshot WHERE medicine_id = ?",
+                                      (m_id,)).fetchone()
+                    if row is None or row[0] < qty:
+                        raise OfflineStockError(f"离线库存不足：药品 {m_id} 本地库存快照无法满足本次销售数量！")
+                cur.executemany("UPDATE stock_snapshot SET stock_quantity = stock_quantity - ? WHERE medicine_id = ?",
+                                [(qty, m_id) for m_id, qty in needs.items()])
+                self._insert_sale_copy(cur, sales_id, items)
+                self._insert_op(cur, f"sale:{sales_id}", "sale", payload)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            self.pending_count += 1
+            self.stats["enqueued"] += 1
+        return True
+
+    def enqueue_return(self, return_id, sales_id, emp_id, cust_id, total_amount, reason, items):
+        """
+        受理一笔离线退货：按本地销售副本校验可退数量，扣减可退数量、回补快照库存并写入队列（同一个本地事务）
+        返回 False 表示该退货单号已在队列中（重复提交）
+        """
+        payload = {"return_id": return_id, "sales_id": sales_id, "emp_id": emp_id, "cust_id": cust_id,
+                   "total_amount": total_amount, "reason": reason, "items": [dict(item) for item in items],
+                   "return_date": datetime.datetime.now().replace(microsecond=0)}
+        backs = _sum_quantities(items, 'return_quantity')
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("SELECT 1 FROM pending_ops WHERE op_key = ?", (f"return:{return_id}",))
+                if cur.fetchone():
+                    cur.execute("ROLLBACK")
+                    return False
+                returnable = dict(cur.execute("SELECT medicine_id, returnable FROM sale_copy WHERE sales_id = ?",
+                                              (sales_id,)).fetchall())
+                if not returnable:
+                    raise OfflineReturnError(f"本机没有销售单 {sales_id} 的明细副本，需连上中心库后办理退货！")
+                for m_id, qty in backs.items():
+                    if returnable.get(m_id, 0) < qty:
+                        raise OfflineReturnError(f"药品 {m_id} 的退货数量超过原单可退数量！")
+                self._take_returnable(cur, sales_id, backs)
+                cur.executemany("UPDATE stock_snapshot SET stock_quantity = stock_quantity + ? WHERE medicine_id = ?",
+                                [(qty, m_id) for m_id, qty in backs.items()])
+                self._insert_op(cur, f"return:{return_id}", "return", payload)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            self.pending_count += 1
+            self.stats["enqueued"] += 1
+        return True
+
+    @staticmethod
+    def _insert_op(cur, op_key, kind, payload):
+        cur.execute("INSERT INTO pending_ops (op_key, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (op_key, kind, json.dumps(payload, default=_json_default, ensure_ascii=False), time.time()))
+
+    def pending(self, limit=200):
+        """按入队顺序返回待同步的单据 [(seq, kind, payload)]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, kind, payload FROM pending_ops WHERE status = 'pending' ORDER BY seq LIMIT ?",
+                (limit,)).fetchall()
+        return [(seq, kind, json.loads(payload)) for seq, kind, payload in rows]
+
+    def ack(self, seq, duplicate=False):
+        """单据已写入中心库（duplicate=True 表示中心库中已存在，本次未重复写入）"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pending_ops WHERE seq = ?", (seq,))
+            self.pending_count -= 1
+            self.stats["duplicates" if duplicate else "synced"] += 1
+
+    def fail(self, seq, error):
+        """中心库拒绝该单据：转入失败状态，保留原因供人工处理"""
+        with self._lock:
+            self._conn.execute("UPDATE pending_ops SET status = 'failed', attempts = attempts + 1, last_error = ? "
+                               "WHERE seq = ?", (error, seq))
+            self.pending_count -= 1
+            self.stats["failed"] += 1
+
+    def note_error(self, seq, error):
+        """暂时性错误：单据留在队列中，记录尝试次数与原因"""
+        with self._lock:
+            self._conn.execute("UPDATE pending_ops SET attempts = attempts + 1, last_error = ? WHERE seq = ?",
+                               (error, seq))
+
+    def failed_ops(self, limit=100):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, op_key, created_at, attempts, last_error FROM pending_ops WHERE status = 'failed' "
+                "ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [{"seq": seq, "op_key": key, "created_at": created, "attempts": attempts, "error": error}
+                for seq, key, created, attempts, error in rows]
+
+    def record_sync(self, ops, seconds):
+        with self._lock:
+            self.stats["last_sync_ops"] = ops
+            self.stats["last_sync_seconds"] = seconds
+            self.stats["last_sync_at"] = time.time()
+
+    # ---------- 本地销售副本 ----------
+
+    @staticmethod
+    def _insert_sale_copy(cur, sales_id, items):
+        prices = {item['medicine_id']: item.get('unit_price') for item in items}
+        now = time.time()
+        cur.executemany("INSERT OR REPLACE INTO sale_copy VALUES (?, ?, ?, ?, ?, ?)",
+                        [(sales_id, m_id, qty, qty, None if prices[m_id] is None else str(prices[m_id]), now)
+                         for m_id, qty in _sum_quantities(items, 'quantity').items()])
+
+    @staticmethod
+    def _take_returnable(cur, sales_id, backs):
+        cur.executemany("UPDATE sale_copy SET returnable = MAX(returnable - ?, 0) WHERE sales_id = ? AND medicine_id = ?",
+                        [(qty, sales_id, m_id) for m_id, qty in backs.items()])
+
+    def record_sale(self, sales_id, items):
+        """在线销售成功后保留明细副本，供之后离线退货校验"""
+        with self._lock:
+            self._insert_sale_copy(self._conn, sales_id, items)
+
+    def record_return(self, sales_id, items):
+        """在线退货成功后扣减副本中的可退数量"""
+        with self._lock:
+            self._take_returnable(self._conn, sales_id, _sum_quantities(items, 'return_quantity'))
+
+    def sale_items(self, sales_id):
+        """本地副本中的销售明细（字段与 SalesDAO.get_sale_details 一致），离线查看与退货使用"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.medicine_id, s.medicine_name, c.quantity, c.unit_price FROM sale_copy c "
+                "LEFT JOIN stock_snapshot s ON s.medicine_id = c.medicine_id WHERE c.sales_id = ? "
+                "ORDER BY c.medicine_id", (sales_id,)).fetchall()
+        return [{"sales_id": sales_id, "medicine_id": m_id, "medicine_name": name or m_id, "quantity": qty,
+                 "unit_price": None if price is None else Decimal(price)} for m_id, name, qty, price in rows]
+
+    def prune_sale_copies(self, retention=SALE_COPY_RETENTION):
+        """删除超过保留时长的销售副本，返回删除的明细行数"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM sale_copy WHERE created_at < ?",
+                                      (time.time() - retention,)).rowcount
+
+    # ---------- 库存快照 ----------
+
+    def replace_snapshot(self, rows):
+        """
+        用中心库的最新库存整体替换本地快照
+        读取中心库期间新受理的离线单据尚未同步，替换后重新计入快照（销售扣减、退货回补）
+        """
+        values = [tuple(_json_default(v) if isinstance(v, (Decimal, datetime.date)) else v
+                        for v in (row[c] for c in SNAPSHOT_COLUMNS)) for row in rows]
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("DELETE FROM stock_snapshot")
+                cur.executemany(f"INSERT INTO stock_snapshot VALUES ({', '.join(['?'] * len(SNAPSHOT_COLUMNS))})",
+                                values)
+                pending = cur.execute("SELECT kind, payload FROM pending_ops WHERE status = 'pending'").fetchall()
+                for kind, payload in pending:
+                    sign, field = _STOCK_SIGN[kind]
+                    cur.executemany(
+                        "UPDATE stock_snapshot SET stock_quantity = stock_quantity + ? WHERE medicine_id = ?",
+                        [(sign * int(item[field]), item['medicine_id']) for item in json.loads(payload)["items"]])
+                cur.execute("INSERT OR REPLACE INTO meta VALUES ('snapshot_at', ?)", (time.time(),))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def snapshot_age(self):
+        """快照距今秒数；从未刷新过时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'snapshot_at'").fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def snapshot_rows(self, m_ids=None):
+        """快照中的药品记录（字段与收银台查询一致），m_ids 为空时返回全部"""
+        sql = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM stock_snapshot"
+        with self._lock:
+            if m_ids:
+                rows = self._conn.execute(f"{sql} WHERE medicine_id IN ({', '.join(['?'] * len(m_ids))})",
+                                          list(m_ids)).fetchall()
+            else:
+                rows = self._conn.execute(f"{sql} ORDER BY stock_quantity").fetchall()
+        result = []
+        for row in rows:
+            record = dict(zip(SNAPSHOT_COLUMNS, row))
+            record["retail_price"] = Decimal(record["retail_price"]) if record["retail_price"] is not None else None
+            if record["expiry_date"]:
+                record["expiry_date"] = datetime.date.fromisoformat(record["expiry_date"])
+            result.append(record)
+        return result
+
+    # ---------- 统计 ----------
+
+    def snapshot(self):
+        """队列深度、最早待同步单据的等待时间与同步吞吐"""
+        with self._lock:
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM pending_ops WHERE status = 'pending'").fetchone()[0]
+            failed = self._count("failed")
+            data = dict(self.stats)
+        seconds = data["last_sync_seconds"]
+        data.update({"offline": self.is_offline(), "depth": self.pending_count, "failed_depth": failed,
+                     "oldest_age": round(time.time() - oldest, 1) if oldest else 0.0,
+                     "last_sync_rate": round(data["last_sync_ops"] / seconds, 1) if seconds else 0.0})
+        age = self.snapshot_age()
+        data["snapshot_age"] = None if age is None else round(age, 1)
+        return data
+
+    def close(self):
+        self._conn.close()
+
+
+_offline_queue = None
+_offline_lock = threading.Lock()
+
+
+def get_offline_queue():
+    """进程内共享的离线写队列；[offline] enabled = false 时返回 None"""
+    global _offline_queue
+    if _offline_queue is None:
+        with _offline_lock:
+            if _offline_queue is None:
+                config = get_settings().offline
+                if not config.enabled:
+                    return None
+                _offline_queue = OfflineQueue(config.path, config.retry_interval)
+    return _offline_queue
@@ -0,0 +1,268 @@
+# src/database/profiler.py
+"""
+查询性能采集（Query Profiler）
+- DBManager 借出的游标被包一层 _ProfiledCursor，计时 execute / executemany 与 fetch*，并统计返回行数
+- 按“归一化 SQL”（字面量与占位符替换为 ?，IN 列表折叠）聚合：次数、错误、总/最大耗时、行数、耗时直方图
+- 从连接池借连接的等待时间单独记一个直方图
+- 执行耗时超过 slow_query_ms 的语句写 WARNING 日志，并保留最近若干条供诊断面板查看
+- 直方图是固定桶计数，分位数按桶上界估算；采集关闭时 DBManager 直接交出原始游标，没有额外开销
+"""
+import bisect
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from src.utils.logger import logger, LOG_DIR
+
+# 直方图桶上界（毫秒），最后一个桶收纳更慢的样本
+BUCKET_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+OTHER_STATEMENTS = "<其他语句>"   # 不同语句数超过 max_statements 后的归并项
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """把语句归一化为模板：字面量/占位符 -> ?，(?, ?, ...) -> (?)，多行 VALUES 折叠为一组"""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _IN_LIST.sub("(?)", text)
+    text = _VALUES_LIST.sub(r"\1", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class Histogram:
+    """固定桶耗时直方图（毫秒）"""
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """按桶上界估算 p 分位数（p 取 0~1），不超过实际最大值"""
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(BUCKET_BOUNDS_MS[i], self.max) if i < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {"count": self.count, "total_ms": round(self.total, 3), "max_ms": round(self.max, 3),
+                "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+                "p50_ms": round(self.percentile(0.50), 3), "p95_ms": round(self.percentile(0.95), 3),
+                "p99_ms": round(self.percentile(0.99), 3),
+                "buckets": dict(zip([f"<={b}" for b in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}"],
+                                    self.counts))}
+
+
+class StatementStats:
+    """单条归一化语句的聚合数据"""
+    __slots__ = ("sql", "latency", "fetch_ms", "rows", "errors", "slow")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.latency = Histogram()   # execute 耗时
+        self.fetch_ms = 0.0          # fetch* 累计耗时（流式游标的主要耗时在这里）
+        self.rows = 0
+        self.errors = 0
+        self.slow = 0
+
+    def snapshot(self):
+        data = self.latency.snapshot()
+        data.update({"sql": self.sql, "fetch_ms": round(self.fetch_ms, 3), "rows": self.rows,
+                     "errors": self.errors, "slow": self.slow})
+        return data
+
+
+class _ProfiledCursor:
+    """转发全部调用；execute/fetch 计时后交给 QueryProfiler 聚合"""
+    __slots__ = ("_cursor", "_profiler", "_stats")
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._stats = None   # 最近一次 execute 的语句，其后的 fetch 计入这条语句
+
+    def _run(self, method, sql, args):
+        start = time.perf_counter()
+        try:
+            result = method(sql, args)
+        except Exception:
+            self._stats = self._profiler.record(sql, (time.perf_counter() - start) * 1000, 0, error=True)
+            raise
+        elapsed = (time.perf_counter() - start) * 1000
+        cursor = self._cursor
+        # 有结果集的语句在 fetch 时计行数；写语句直接取影响行数
+        rows = 0 if cursor.description else max(cursor.rowcount or 0, 0)
+        self._stats = self._profiler.record(sql, elapsed, rows)
+        return result
+
+    def execute(self, sql, args=None):
+        return self._run(self._cursor.execute, sql, args)
+
+    def executemany(self, sql, args):
+        return self._run(self._cursor.executemany, sql, args)
+
+    def _fetched(self, start, rows):
+        if self._stats is not None:
+            self._profiler.record_fetch(self._stats, (time.perf_counter() - start) * 1000, rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class QueryProfiler:
+    """
+    进程内共享的查询统计（由 DBManager 持有，线程安全）
+    enabled      : 是否采集（可在运行时切换）
+    slow_query_ms: 慢查询阈值，0 表示不记录慢查询
+    slow_log_size: 保留最近多少条慢查询
+    max_statements: 最多区分多少种归一化语句，超出部分归入 OTHER_STATEMENTS
+    """
+    _NORMALIZE_MEMO_SIZE = 4096
+
+    def __init__(self, enabled=True, slow_query_ms=200, slow_log_size=100, max_statements=500):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._memo = {}   # 原始 SQL -> 归一化 SQL（SQL 多为常量字符串，归一化只在首次出现时做）
+        self._statements = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._acquire = Histogram()
+        self._started = datetime.datetime.now()
+
+    def configure(self, enabled, slow_query_ms, slow_log_size, max_statements):
+        """运行时调整采集参数（配置热加载），已采集的统计保留"""
+        with self._lock:
+            self.enabled = enabled
+            self.slow_query_ms = slow_query_ms
+            self.max_statements = max_statements
+            if self._slow.maxlen != slow_log_size:
+                self._slow = deque(self._slow, maxlen=slow_log_size)
+
+    # ---------- 采集（热路径） ----------
+
+    def wrap(self, cursor):
+        """采集开启时返回计时游标，否则原样返回"""
+        return _ProfiledCursor(cursor, self) if self.enabled else cursor
+
+    def record_acquire(self, ms):
+        with self._lock:
+            self._acquire.add(ms)
+
+    def _normalized(self, sql):
+        key = self._memo.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._memo) >= self._NORMALIZE_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[sql] = key
+        return key
+
+    def record(self, sql, ms, rows, error=False):
+        """记录一次 execute，返回该语句的聚合对象（供随后的 fetch 累加）"""
+        key = self._normalized(sql)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    key = OTHER_STATEMENTS
+                stats = self._statements.setdefault(key, StatementStats(key))
+            stats.latency.add(ms)
+            stats.rows += rows
+            if error:
+                stats.errors += 1
+            slow = self.slow_query_ms and ms >= self.slow_query_ms
+            if slow:
+                stats.slow += 1
+                self._slow.append({"time": datetime.datetime.now().isoformat(timespec="seconds"),
+                                   "ms": round(ms, 3), "sql": key, "error": error})
+        if slow:
+            logger.warning(f"慢查询 | 耗时: {ms:.1f}ms | 阈值: {self.slow_query_ms}ms | SQL: {key}")
+        return stats
+
+    def record_fetch(self, stats, ms, rows):
+        with self._lock:
+            stats.fetch_ms += ms
+            stats.rows += rows
+
+    # ---------- 读取 / 导出 ----------
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self._acquire = Histogram()
+            self._started = datetime.datetime.now()
+        logger.info("查询统计已清零")
+
+    def snapshot(self):
+        """当前统计：语句按总耗时降序"""
+        with self._lock:
+            statements = [s.snapshot() for s in self._statements.values()]
+            slow = list(self._slow)
+            acquire = self._acquire.snapshot()
+            started = self._started
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {"since": started.isoformat(timespec="seconds"), "enabled": self.enabled,
+                "slow_query_ms": self.slow_query_ms, "acquire": acquire,
+                "queries": sum(s["count"] for s in statements), "statements": statements,
+                "slow_queries": slow}
+
+    def dump(self, path=None, extra=None):
+        """把统计写成 JSON 文件（默认 logs/query_profile_时间.json），返回文件路径"""
+        if path is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            os.makedirs(LOG_DIR, exist_ok=True)
+            path = os.path.join(LOG_DIR, f"query_profile_{stamp}.json")
+        report = self.snapshot()
+        report["dumped_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        report.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        logger.info(f"查询统计已导出 | 文件: {path} | 语句数: {len(report['statements'])}")
+        return path
@@ -1,22 +1,45 @@
+import importlib
+import os
 import sys
+import time
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QListWidget, QStackedWidget, QLabel, QPushButton, 
-                             QFrame, QStatusBar)
-from PyQt6.QtCore import Qt, QSize
+                             QFrame, QStatusBar, QProgressBar)
+from PyQt6.QtCore import Qt, QSize, QTimer, QFileSystemWatcher, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 
-# 导入各个功能模块页面 
-from src.ui.modules.base_info import BaseInfoPage
-from src.ui.modules.purchase import PurchasePage
-from src.ui.modules.inventory import InventoryPage
-from src.ui.modules.sales import SalesPage
-from src.ui.modules.statistics import StatisticsPage
+from src.ui.task_runner import TaskRunner
+from src.utils.config_loader import CONFIG_PATH, add_settings_listener, get_settings, reload_settings
+from src.utils.logger import logger
+
+LOW_STOCK_POLL_MS = 60 * 1000  # 低库存增量检查间隔
+OFFLINE_SYNC_MS = 5 * 1000     # 离线单据同步间隔（离线期间按 [offline] retry_interval 探测中心库）
+PREFETCH_INTERVAL_MS = 50      # 首次绘制后逐个预建其余页面，两页之间让出事件循环处理用户输入
+CONFIG_RELOAD_DELAY_MS = 300   # config.ini 变化后等待写入完成再重新加载（编辑器保存时可能连续触发多次）
+
+# 功能模块页面：(导航标题, 模块, 类名)，按导航顺序排列
+# 页面在首次切换到它（或首次绘制后的后台预建）时才导入模块并实例化，构造函数中的数据加载也随之推迟
+PAGES = [
+    ("基础信息管理", "src.ui.modules.base_info", "BaseInfoPage"),
+    ("进货管理", "src.ui.modules.purchase", "PurchasePage"),
+    ("库房管理", "src.ui.modules.inventory", "InventoryPage"),
+    ("销售管理", "src.ui.modules.sales", "SalesPage"),
+    ("财务统计", "src.ui.modules.statistics", "StatisticsPage"),
+    ("系统维护", "src.ui.modules.system", "SystemPage"),
+]
 
 class MainWindow(QMainWindow):
+    first_painted = pyqtSignal()   # 窗口第一次绘制完成
+    pages_ready = pyqtSignal()     # 所有页面均已构建（后台预建完成）
+
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("医药销售管理系统 v1.0")
+        app = get_settings().app
+        self.setWindowTitle(f"{app.name} v{app.version}")
         self.resize(1200, 800)
+        self.pages = {}          # 导航索引 -> 已构建的页面
+        self.page_timings = {}   # 导航标题 -> 构建耗时（毫秒）
+        self._painted = False
         
         # 初始化界面
         self.init_ui()
@@ -73,12 +96,8 @@ class MainWindow(QMainWindow):
 
         # 导航列表
         self.nav_list = QListWidget()
-        self.nav_list.addItem("基础信息管理")
-        self.nav_list.addItem("进货管理")
-        self.nav_list.addItem("库房管理")
-        self.nav_list.addItem("销售管理")
-        self.nav_list.addItem("财务统计")
-        self.nav_list.addItem("系统维护")
+        for title, _, _ in PAGES:
+            self.nav_list.addItem(title)
         
         # 默认选中第一项
         self.nav_list.setCurrentRow(0)
@@ -96,23 +115,13 @@ class MainWindow(QMainWindow):
         self.page_title.setStyleSheet("font-size: 20px; font-weight: bold; color: #333; margin-bottom: 10px;")
         content_layout.addWidget(self.page_title)
 
-        # 堆栈窗口 (核心容器)
+        # 堆栈窗口 (核心容器)：先放占位页，真正的页面按需构建后替换到同一位置
         self.stack = QStackedWidget()
-        
-        # 实例化各个页面并加入堆栈
-        self.page_base_info = BaseInfoPage()
-        self.page_purchase = PurchasePage()
-        self.page_inventory = InventoryPage()
-        self.page_sales = SalesPage()
-        self.page_stats = StatisticsPage()
-        self.page_system = QWidget() # 暂时占位
-
-        self.stack.addWidget(self.page_base_info) # Index 0
-        self.stack.addWidget(self.page_purchase)  # Index 1
-        self.stack.addWidget(self.page_inventory) # Index 2
-        self.stack.addWidget(self.page_sales)     # Index 3
-        self.stack.addWidget(self.page_stats)     # Index 4
-        self.stack.addWidget(self.page_system)    # Index 5
+        for _ in PAGES:
+            placeholder = QLabel("正在加载...")
+            placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            placeholder.setStyleSheet("color: #999; font-size: 16px;")
+            self.stack.addWidget(placeholder)
 
         content_layout.addWidget(self.stack)
 
@@ -124,8 +133,168 @@ class MainWindow(QMainWindow):
         self.setStatusBar(QStatusBar())
         self.statusBar().showMessage("系统就绪 | 当前操作员：Admin")
 
+        # 后台任务忙碌指示：有任务排队或执行时显示滚动进度条和队列深度
+        self.busy_label = QLabel()
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setFixedWidth(120)
+        self.busy_bar.setFixedHeight(14)
+        self.statusBar().addPermanentWidget(self.busy_label)
+        self.statusBar().addPermanentWidget(self.busy_bar)
+        self.busy_bar.hide()
+        runner = TaskRunner.instance()
+        runner.busy_changed.connect(self.busy_bar.setVisible)
+        runner.metrics_changed.connect(self.on_task_metrics)
+
+        # 低库存监控：后台定时增量检查，只处理上次检查之后库存变动过的药品
+        self.low_stock_label = QLabel()
+        self.low_stock_label.setStyleSheet("color: red; font-weight: bold;")
+        self.statusBar().addPermanentWidget(self.low_stock_label)
+        self._low_stock_polling = False
+        self.low_stock_timer = QTimer(self)
+        self.low_stock_timer.timeout.connect(self.poll_low_stock)
+
+        # 离线收银：后台定时把离线受理的销售单按顺序同步到中心库，状态栏显示积压
+        self.offline_label = QLabel()
+        self.offline_label.setStyleSheet("color: #E67E22; font-weight: bold;")
+        self.statusBar().addPermanentWidget(self.offline_label)
+        self._offline_syncing = False
+        self.offline_timer = QTimer(self)
+        self.offline_timer.timeout.connect(self.sync_offline)
+
+        # 配置热加载：监视 config.ini，变化后重新读取并整体替换配置，收银不中断
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.fileChanged.connect(lambda _path: self.config_reload_timer.start())
+        self.config_reload_timer = QTimer(self)
+        self.config_reload_timer.setSingleShot(True)
+        self.config_reload_timer.setInterval(CONFIG_RELOAD_DELAY_MS)
+        self.config_reload_timer.timeout.connect(self.reload_settings)
+        add_settings_listener(self._apply_settings)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            # 首次绘制之后再构建当前页、启动后台检查，窗口尽早出现在屏幕上
+            QTimer.singleShot(0, self._after_first_paint)
+            self.first_painted.emit()
+
+    def _after_first_paint(self):
+        self.ensure_page(self.stack.currentIndex())
+        self._start_background_checks()
+        QTimer.singleShot(PREFETCH_INTERVAL_MS, self._prefetch_next_page)
+
+    def _start_background_checks(self):
+        """启动低库存监控与离线单据同步（控制器及其依赖的数据库模块在此时才导入）"""
+        from src.controllers.inventory_ctrl import LowStockMonitor
+        from src.controllers.sales_ctrl import OfflineSync
+        self.low_stock_monitor = LowStockMonitor()
+        self.low_stock_timer.start(LOW_STOCK_POLL_MS)
+        self.poll_low_stock()
+        self.offline_sync = OfflineSync()
+        if self.offline_sync.queue is not None:
+            self.offline_timer.start(OFFLINE_SYNC_MS)
+            self.sync_offline()
+        if os.path.exists(CONFIG_PATH):
+            self.config_watcher.addPath(CONFIG_PATH)
+
+    def reload_settings(self):
+        """重新加载 config.ini；文件内容无效时保留当前配置并提示"""
+        # 编辑器以“写临时文件再改名”的方式保存时文件会被替换，原有监视随之失效，需要重新添加
+        if CONFIG_PATH not in self.config_watcher.files() and os.path.exists(CONFIG_PATH):
+            self.config_watcher.addPath(CONFIG_PATH)
+        try:
+            changed = reload_settings()
+        except Exception as e:
+            logger.error(f"配置文件无效，继续使用当前配置 | 错误: {e}")
+            self.statusBar().showMessage(f"配置文件无效，未重新加载：{e}", 10000)
+            return
+        if changed:
+            logger.info("配置已重新加载 | 变更的节: %s", ", ".join(changed))
+            self.statusBar().showMessage(f"配置已重新加载：{', '.join(changed)}", 5000)
+
+    def _apply_settings(self, old, new):
+        if old.app != new.app:
+            self.setWindowTitle(f"{new.app.name} v{new.app.version}")
+
+    def _prefetch_next_page(self):
+        """后台预建：每次只构建一个尚未构建的页面，直到全部完成"""
+        missing = [i for i in range(len(PAGES)) if i not in self.pages]
+        if not missing:
+            logger.info("页面预建完成 | 构建耗时(ms): %s", self.page_timings)
+            self.pages_ready.emit()
+            return
+        self.ensure_page(missing[0])
+        QTimer.singleShot(PREFETCH_INTERVAL_MS, self._prefetch_next_page)
+
+    def ensure_page(self, index):
+        """
+        返回导航索引对应的页面，首次访问时导入模块、实例化并替换占位页
+        页面构造不访问数据库：初始数据与表格分页都经 TaskRunner 在后台加载，数据库不可达时也不会卡住界面
+        """
+        page = self.pages.get(index)
+        if page is not None:
+            return page
+        title, module_name, class_name = PAGES[index]
+        start = time.perf_counter()
+        page = getattr(importlib.import_module(module_name), class_name)()
+        self.page_timings[title] = round((time.perf_counter() - start) * 1000, 1)
+        logger.debug("页面已构建 | %s | 耗时: %sms", title, self.page_timings[title])
+
+        current = self.stack.currentIndex()
+        placeholder = self.stack.widget(index)
+        self.stack.insertWidget(index, page)
+        self.stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.stack.setCurrentIndex(current)
+        self.pages[index] = page
+        return page
+
+    def on_task_metrics(self, m):
+        if m['queue_depth'] or m['running']:
+            self.busy_label.setText(f"后台任务：运行 {m['running']} | 排队 {m['queue_depth']}")
+        else:
+            self.busy_label.clear()
+
+    def poll_low_stock(self):
+        if self._low_stock_polling: return  # 上一次检查尚未返回
+        self._low_stock_polling = True
+        TaskRunner.instance().submit(self.low_stock_monitor.poll,
+                                     on_result=self.on_low_stock_events, on_error=self.on_low_stock_error)
+
+    def on_low_stock_events(self, events):
+        self._low_stock_polling = False
+        count = len(self.low_stock_monitor.low)
+        self.low_stock_label.setText(f"低库存药品：{count} 种" if count else "")
+        new_low = [e['medicine_name'] for e in events if e['event'] == "low"]
+        if new_low:
+            names = "、".join(new_low[:5]) + (" 等" if len(new_low) > 5 else "")
+            self.statusBar().showMessage(f"库存预警：{names} 库存不足", 10000)
+
+    def on_low_stock_error(self, exc):
+        self._low_stock_polling = False
+
+    def sync_offline(self):
+        if self._offline_syncing: return  # 上一轮同步尚未返回
+        self._offline_syncing = True
+        TaskRunner.instance().submit(self.offline_sync.sync, key="offline_sync",
+                                     on_result=self.on_offline_synced, on_error=self.on_offline_sync_error)
+
+    def on_offline_synced(self, stats):
+        self._offline_syncing = False
+        if stats["offline"]:
+            self.offline_label.setText(f"离线收银中：待同步 {stats['depth']} 笔")
+        elif stats["depth"]:
+            self.offline_label.setText(f"正在同步离线单据：剩余 {stats['depth']} 笔")
+        else:
+            self.offline_label.setText(f"离线单据同步失败 {stats['failed_depth']} 笔" if stats["failed_depth"] else "")
+
+    def on_offline_sync_error(self, exc):
+        self._offline_syncing = False
+
     def switch_page(self, index):
-        """切换导航项时触发"""
+        """切换导航项时触发（页面尚未构建时先构建）"""
+        self.ensure_page(index)
         self.stack.setCurrentIndex(index)
         # 更新页面标题
         nav_text = self.nav_list.currentItem().text()
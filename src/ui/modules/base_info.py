@@ -73,6 +73,7 @@ class BaseInfoPage(QWidget):
             {
                 "name": "药品",
                 "layout_type": "adaptive",
+                "import": "medicine",
                 "headers": ["药品ID", "通用名", "分类", "规格", "厂家", "生产日期", "有效期", "零售价", "备注"],
                 "fields": [
                     ("medicine_id", "编号", "text"), ("medicine_name", "名称", "text"), 
@@ -83,6 +84,7 @@ class BaseInfoPage(QWidget):
                 ],
                 "methods": {
                     "fetch_all": self.ctrl.fetch_all_medicines,
+                    "query": self.ctrl.query_medicines,
                     "fetch_by_id": self.ctrl.fetch_medicine_by_id,
                     "add": self.ctrl.add_medicine,
                     "update": self.ctrl.update_medicine,
@@ -100,6 +102,7 @@ class BaseInfoPage(QWidget):
                 ],
                 "methods": {
                     "fetch_all": self.ctrl.fetch_all_employees,
+                    "query": self.ctrl.query_employees,
                     "fetch_by_id": self.ctrl.fetch_employee_by_id,
                     "add": self.ctrl.add_employee,
                     "update": self.ctrl.update_employee,
@@ -109,6 +112,7 @@ class BaseInfoPage(QWidget):
             {
                 "name": "客户",
                 "layout_type": "adaptive", 
+                "import": "customer",
                 "headers": ["客户ID", "姓名", "电话", "地址"],
                 "fields": [
                     ("cust_id", "编号", "text"), ("cust_name", "名称", "text"), 
@@ -116,6 +120,7 @@ class BaseInfoPage(QWidget):
                 ],
                 "methods": {
                     "fetch_all": self.ctrl.fetch_all_customers,
+                    "query": self.ctrl.query_customers,
                     "fetch_by_id": self.ctrl.fetch_customer_by_id,
                     "add": self.ctrl.add_customer,
                     "update": self.ctrl.update_customer,
@@ -133,6 +138,7 @@ class BaseInfoPage(QWidget):
                 ],
                 "methods": {
                     "fetch_all": self.ctrl.fetch_all_suppliers,
+                    "query": self.ctrl.query_suppliers,
                     "fetch_by_id": self.ctrl.fetch_supplier_by_id,
                     "add": self.ctrl.add_supplier,
                     "update": self.ctrl.update_supplier,
@@ -144,7 +150,8 @@ class BaseInfoPage(QWidget):
         # 循环生成四个 Tab
         self.tab_widgets = []
         for cfg in configs:
-            tab = BaseDataTab(cfg['name'], cfg['layout_type'], cfg['headers'], cfg['fields'], cfg['methods'])
+            tab = BaseDataTab(cfg['name'], cfg['layout_type'], cfg['headers'], cfg['fields'], cfg['methods'],
+                              import_entity=cfg.get('import'))
             self.tabs.addTab(tab, f"{cfg['name']}管理")
             self.tab_widgets.append(tab)
 
@@ -1,9 +1,14 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                             QTableWidgetItem, QPushButton, QLineEdit, QLabel, 
-                             QHeaderView, QMessageBox, QFrame)
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
+                             QLineEdit, QLabel, QHeaderView, QMessageBox, QFrame)
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QFont
-from src.controllers.inventory_ctrl import InventoryController
+from PyQt6.QtGui import QColor
+from src.controllers.inventory_ctrl import InventoryController, DEFAULT_LOW_STOCK_THRESHOLD
+from src.ui.widgets.table_model import Column, DataTableView
+from src.ui.task_runner import TaskRunner
+from src.ui.widgets.export_button import ExportButton
+from src.ui.widgets.import_button import ImportButton
+
+LOW_STOCK_THRESHOLD = DEFAULT_LOW_STOCK_THRESHOLD  # 低库存预警值
 
 class InventoryPage(QWidget):
     def __init__(self):
@@ -34,11 +39,21 @@ class InventoryPage(QWidget):
         tool_layout.addWidget(self.btn_search)
         tool_layout.addWidget(self.btn_refresh)
         tool_layout.addStretch()
+        tool_layout.addWidget(ImportButton("opening_stock", "期初库存", on_done=self.load_all_data, text="导入期初库存"))
+        tool_layout.addWidget(ExportButton("inventory", "库存报表"))
         
-        # 2. 表格区域
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["药品ID", "药品名称", "规格", "生产厂家", "库存总量", "有效期至"])
+        # 2. 表格区域（库存数量低于预警值时红色加粗）
+        is_low = lambda qty: qty < LOW_STOCK_THRESHOLD
+        self.table = DataTableView([
+            Column("medicine_id", "药品ID"),
+            Column("medicine_name", "药品名称"),
+            Column("specification", "规格"),
+            Column("manufacturer", "生产厂家"),
+            Column("stock_quantity", "库存总量",
+                   color=lambda qty: QColor("red") if is_low(qty) else None,
+                   bold=is_low, align=Qt.AlignmentFlag.AlignCenter),
+            Column("expiry_date", "有效期至"),
+        ])
         
         # 设置布局策略：自适应内容 + 最后一列拉伸
         header = self.table.horizontalHeader()
@@ -58,51 +73,29 @@ class InventoryPage(QWidget):
 
     def fill_table_data(self, data_list):
         """通用表格填充逻辑"""
-        self.table.setRowCount(0)
+        self.table.set_rows(data_list)
         if not data_list:
             self.status_label.setText("未发现库存记录。")
             return
 
-        self.table.setRowCount(len(data_list))
-        low_stock_count = 0
-        
-        for row_idx, row_data in enumerate(data_list):
-            # 提取数据
-            m_id = str(row_data['medicine_id'])
-            m_name = str(row_data['medicine_name'])
-            spec = str(row_data['specification'])
-            manu = str(row_data['manufacturer'])
-            stock = row_data['stock_quantity']
-            expiry = str(row_data['expiry_date'])
-
-            # 填充 Item
-            self.table.setItem(row_idx, 0, QTableWidgetItem(m_id))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(m_name))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(spec))
-            self.table.setItem(row_idx, 3, QTableWidgetItem(manu))
-            
-            # 库存数量项（带预警颜色）
-            stock_item = QTableWidgetItem(str(stock))
-            stock_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if stock < 10: # 低库存预警
-                stock_item.setForeground(QColor("red"))
-                font = QFont()
-                font.setBold(True)
-                stock_item.setFont(font)
-                low_stock_count += 1
-            self.table.setItem(row_idx, 4, stock_item)
-            
-            self.table.setItem(row_idx, 5, QTableWidgetItem(expiry))
-
+        low_stock_count = sum(1 for row in data_list if row['stock_quantity'] < LOW_STOCK_THRESHOLD)
         self.status_label.setText(f"总计 {len(data_list)} 种药品，其中 {low_stock_count} 种库存不足（红色标记）。")
 
     def load_all_data(self):
-        """调用 Controller 获取全量库存"""
-        success, res = self.ctrl.get_full_report()
+        """调用 Controller 获取全量库存（后台查询，回到界面线程后填充）"""
+        self.status_label.setText("当前库存状态：正在加载...")
+        TaskRunner.instance().submit(self.ctrl.get_full_report, key="inventory_full_report",
+                                     on_result=self._on_full_report, on_error=self._on_load_error)
+
+    def _on_full_report(self, res):
+        success, data = res
         if success:
-            self.fill_table_data(res)
+            self.fill_table_data(data)
         else:
-            QMessageBox.critical(self, "错误", f"无法加载库存数据: {res}")
+            QMessageBox.critical(self, "错误", f"无法加载库存数据: {data}")
+
+    def _on_load_error(self, exc):
+        QMessageBox.critical(self, "错误", f"无法加载库存数据: {exc}")
 
     def search_stock(self):
         """按 ID 查询单个库存"""
@@ -117,5 +110,5 @@ class InventoryPage(QWidget):
             self.fill_table_data([res])
         else:
             # 如果没搜到，清空表格并提示
-            self.table.setRowCount(0)
+            self.table.clear_rows()
             self.status_label.setText(f"搜索结果：{res}")
\ No newline at end of file
@@ -5,6 +5,11 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
 from PyQt6.QtCore import Qt, QDateTime
 from src.controllers.purchase_ctrl import PurchaseController
 from src.controllers.base_info_ctrl import BaseInfoController
+from src.ui.widgets.table_model import Column, DataTableView
+from src.ui.task_runner import TaskRunner
+from src.ui.widgets.export_button import ExportButton
+
+HISTORY_PAGE_SIZE = 100  # 历史入库记录每次向服务器请求的行数
 
 # ==========================================
 # 辅助类：进货详情弹窗
@@ -16,18 +21,13 @@ class PurchaseDetailDialog(QDialog):
         self.resize(600, 400)
         layout = QVBoxLayout(self)
         
-        table = QTableWidget()
-        table.setColumnCount(5)
-        table.setHorizontalHeaderLabels(["药品ID", "药品名称", "规格", "入库数量", "采购单价"])
+        table = DataTableView([
+            Column("medicine_id", "药品ID"), Column("medicine_name", "药品名称"),
+            Column("specification", "规格"), Column("quantity", "入库数量"),
+            Column("unit_price", "采购单价"),
+        ])
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
-        table.setRowCount(len(items))
-        for row, item in enumerate(items):
-            table.setItem(row, 0, QTableWidgetItem(str(item['medicine_id'])))
-            table.setItem(row, 1, QTableWidgetItem(str(item['medicine_name'])))
-            table.setItem(row, 2, QTableWidgetItem(str(item['specification'])))
-            table.setItem(row, 3, QTableWidgetItem(str(item['quantity'])))
-            table.setItem(row, 4, QTableWidgetItem(str(item['unit_price'])))
+        table.set_rows(items)
         
         layout.addWidget(table)
         btn_close = QPushButton("关闭")
@@ -42,6 +42,7 @@ class PurchasePage(QWidget):
         super().__init__()
         self.p_ctrl = PurchaseController()
         self.b_ctrl = BaseInfoController()
+        self.runner = TaskRunner.instance()  # 数据库调用在后台线程执行，避免界面卡顿
         self.draft_items = [] # 暂存当前拟入库的药品列表
         self.init_ui()
 
@@ -128,23 +129,33 @@ class PurchasePage(QWidget):
         main_layout.addWidget(self.btn_submit)
 
     def refresh_combos(self):
-        """加载下拉框数据"""
+        """加载下拉框数据（后台查询，回到界面线程后填充）"""
+        self.runner.submit(self._load_combo_data, key="purchase_combos",
+                           on_result=self._fill_combos, on_error=self._on_task_error)
+
+    def _load_combo_data(self):
+        """后台线程：拉取供应商、员工、药品下拉数据"""
+        return self.b_ctrl.fetch_all_suppliers(), self.b_ctrl.fetch_all_employees(), self.b_ctrl.fetch_all_medicines()
+
+    def _on_task_error(self, exc):
+        self.btn_submit.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"后台任务执行失败: {exc}")
+
+    def _fill_combos(self, res):
+        (s_ok, s_data), (e_ok, e_data), (m_ok, m_data) = res
         # 加载供应商
-        s_ok, s_data = self.b_ctrl.fetch_all_suppliers()
         if s_ok:
             self.combo_supplier.clear()
             for s in s_data:
                 self.combo_supplier.addItem(f"{s['supp_name']} ({s['supp_id']})", s['supp_id'])
             
         # 加载员工
-        e_ok, e_data = self.b_ctrl.fetch_all_employees()
         if e_ok:
             self.combo_employee.clear()
             for e in e_data:
                 self.combo_employee.addItem(f"{e['emp_name']} ({e['emp_id']})", e['emp_id'])
             
         # 加载药品
-        m_ok, m_data = self.b_ctrl.fetch_all_medicines()
         if m_ok:
             self.combo_medicine.clear()
             for m in m_data:
@@ -186,9 +197,14 @@ class PurchasePage(QWidget):
             QMessageBox.warning(self, "错误", "单据号不能为空且必须包含至少一项药品明细")
             return
 
-        # 确认提交
-        success, msg = self.p_ctrl.submit_purchase(order_id, supp_id, emp_id, invoice, remark, self.draft_items)
-        
+        # 确认提交（后台执行，期间禁用提交按钮防止重复提交）
+        self.btn_submit.setEnabled(False)
+        self.runner.submit(self.p_ctrl.submit_purchase, order_id, supp_id, emp_id, invoice, remark, list(self.draft_items),
+                           on_result=self._on_order_submitted, on_error=self._on_task_error)
+
+    def _on_order_submitted(self, res):
+        self.btn_submit.setEnabled(True)
+        success, msg = res
         if success:
             QMessageBox.information(self, "成功", msg)
             # 清空界面
@@ -209,43 +225,42 @@ class PurchasePage(QWidget):
         btn_refresh = QPushButton("刷新历史记录")
         btn_refresh.clicked.connect(self.refresh_history)
         tool_layout.addWidget(btn_refresh)
+        self.history_status = QLabel()  # 分页加载失败时的提示（不弹窗）
+        self.history_status.setStyleSheet("color: red;")
+        tool_layout.addWidget(self.history_status)
         tool_layout.addStretch()
+        tool_layout.addWidget(ExportButton("purchase_history", "进货历史", "导出明细"))
         layout.addLayout(tool_layout)
         
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels(["单据号", "供应商", "操作员", "日期", "总金额", "发票号"])
+        # 历史记录：滚动到底部时模型通过 fetchMore 向服务器请求下一页
+        self.history_table = DataTableView([
+            Column("order_id", "单据号"), Column("supp_name", "供应商"), Column("emp_name", "操作员"),
+            Column("order_date", "日期"), Column("total_amount", "总金额"), Column("invoice_number", "发票号"),
+        ], page_loader=self.load_history_page, batch_size=HISTORY_PAGE_SIZE)
+        self.history_table.load_failed.connect(lambda err: self.history_status.setText(f"查询失败: {err}"))
         self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.history_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.history_table.doubleClicked.connect(self.show_order_detail)
         
         layout.addWidget(self.history_table)
         layout.addWidget(QLabel("提示：双击行可查看该订单的药品明细"))
 
     def refresh_history(self):
-        # 接收元组 (success, data)
-        success, data = self.p_ctrl.get_purchase_history()
-        
-        if not success:
-            # 如果失败，data 此时是错误字符串
-            QMessageBox.critical(self, "查询失败", data)
-            return
+        """从最新一页重新加载历史入库记录（后台分页查询）"""
+        self.history_status.clear()
+        self.history_table.reload()
 
-        # 成功时，data 才是真正的列表
-        orders = data
-        self.history_table.setRowCount(len(orders))
-        for row, o in enumerate(orders):
-            self.history_table.setItem(row, 0, QTableWidgetItem(str(o['order_id'])))
-            self.history_table.setItem(row, 1, QTableWidgetItem(str(o['supp_name'])))
-            self.history_table.setItem(row, 2, QTableWidgetItem(str(o['emp_name'])))
-            self.history_table.setItem(row, 3, QTableWidgetItem(str(o['order_date'])))
-            self.history_table.setItem(row, 4, QTableWidgetItem(str(o['total_amount'])))
-            self.history_table.setItem(row, 5, QTableWidgetItem(str(o['invoice_number'])))
+    def load_history_page(self, cursor):
+        """后台线程：按键集游标拉取下一页入库记录，返回 (rows, has_more, 下一页游标)"""
+        # 接收元组 (success, page)；失败时 page 是错误字符串
+        success, page = self.p_ctrl.get_purchase_history_page(cursor, HISTORY_PAGE_SIZE)
+        if not success:
+            raise RuntimeError(page)
+        return page['rows'], page['has_more'], page['last'] or cursor
 
     def show_order_detail(self):
-        row = self.history_table.currentRow()
-        if row < 0: return
-        order_id = self.history_table.item(row, 0).text()
+        order = self.history_table.current_row_data()
+        if not order: return
+        order_id = order['order_id']
         
         # 解包元组
         success, items = self.p_ctrl.get_order_details(order_id)
@@ -1,11 +1,17 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
                              QTableWidgetItem, QPushButton, QLineEdit, QLabel, 
                              QHeaderView, QTabWidget, QMessageBox, QComboBox, 
-                             QDoubleSpinBox, QSpinBox, QGroupBox, QFormLayout, QDialog)
-from PyQt6.QtCore import Qt
+                             QDoubleSpinBox, QSpinBox, QGroupBox, QFormLayout, QDialog, QCompleter)
+from PyQt6.QtCore import Qt, QStringListModel
 from src.controllers.sales_ctrl import SalesController
 from src.controllers.base_info_ctrl import BaseInfoController
 from src.controllers.inventory_ctrl import InventoryController
+from src.ui.widgets.table_model import Column, DataTableView, money
+from src.ui.task_runner import TaskRunner
+from src.ui.widgets.export_button import ExportButton
+
+HISTORY_PAGE_SIZE = 100  # 流水/退货历史每次向服务器请求的行数
+MEDICINE_SUGGESTIONS = 20  # 选药联想列表最多显示的条数
 
 # ==========================================
 # 辅助类：销售明细查看弹窗 (查销售了哪些药)
@@ -17,17 +23,12 @@ class SalesDetailDialog(QDialog):
         self.resize(600, 400)
         layout = QVBoxLayout(self)
         
-        table = QTableWidget()
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["药品ID", "药品名称", "数量", "成交单价"])
+        table = DataTableView([
+            Column("medicine_id", "药品ID"), Column("medicine_name", "药品名称"),
+            Column("quantity", "数量"), Column("unit_price", "成交单价", money),
+        ])
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
-        table.setRowCount(len(items))
-        for row, item in enumerate(items):
-            table.setItem(row, 0, QTableWidgetItem(str(item['medicine_id'])))
-            table.setItem(row, 1, QTableWidgetItem(str(item['medicine_name'])))
-            table.setItem(row, 2, QTableWidgetItem(str(item['quantity'])))
-            table.setItem(row, 3, QTableWidgetItem(f"￥{float(item['unit_price']):.2f}"))
+        table.set_rows(items)
         
         layout.addWidget(table)
         btn_close = QPushButton("关闭")
@@ -44,16 +45,12 @@ class ReturnDetailDialog(QDialog):
         self.resize(500, 350)
         layout = QVBoxLayout(self)
         
-        table = QTableWidget()
-        table.setColumnCount(3)
-        table.setHorizontalHeaderLabels(["药品ID", "药品名称", "退回数量"])
+        table = DataTableView([
+            Column("medicine_id", "药品ID"), Column("medicine_name", "药品名称"),
+            Column("return_quantity", "退回数量"),
+        ])
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
-        table.setRowCount(len(items))
-        for row, item in enumerate(items):
-            table.setItem(row, 0, QTableWidgetItem(str(item['medicine_id'])))
-            table.setItem(row, 1, QTableWidgetItem(str(item['medicine_name'])))
-            table.setItem(row, 2, QTableWidgetItem(str(item['return_quantity'])))
+        table.set_rows(items)
         
         layout.addWidget(table)
         btn_close = QPushButton("关闭")
@@ -147,6 +144,7 @@ class SalesPage(QWidget):
         self.s_ctrl = SalesController()
         self.b_ctrl = BaseInfoController()
         self.i_ctrl = InventoryController()
+        self.runner = TaskRunner.instance()  # 数据库调用在后台线程执行，避免界面卡顿
         self.cart_items = [] 
         self.init_ui()
 
@@ -190,6 +188,16 @@ class SalesPage(QWidget):
         self.combo_medicine.setEditable(True)
         self.combo_medicine.currentIndexChanged.connect(self.on_medicine_selected)
         self.combo_medicine.setMinimumWidth(250)
+        # 输入联想：由药品检索索引给出候选（支持编号/名称/厂家/拼音首字母），补全器本身不再过滤
+        self.medicine_suggestions = {}
+        self.medicine_ids = frozenset()  # 下拉框中（有库存）的药品ID，随下拉框重新填充时更新
+        self.medicine_model = QStringListModel(self)
+        self.medicine_completer = QCompleter(self.medicine_model, self.combo_medicine)
+        self.medicine_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.medicine_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.medicine_completer.activated[str].connect(self.on_medicine_suggestion)
+        self.combo_medicine.setCompleter(self.medicine_completer)
+        self.combo_medicine.lineEdit().textEdited.connect(self.on_medicine_text_edited)
         self.label_stock_info = QLabel("库存: -")
         self.input_qty = QSpinBox(); self.input_qty.setRange(1, 9999)
         self.input_price = QDoubleSpinBox(); self.input_price.setRange(0, 9999.99)
@@ -218,12 +226,53 @@ class SalesPage(QWidget):
     def on_medicine_selected(self):
         m_id = self.combo_medicine.currentData()
         if not m_id: return
-        ok_i, i_info = self.i_ctrl.fetch_stock_by_id(m_id)
-        ok_m, m_info = self.b_ctrl.fetch_medicine_by_id(m_id)
-        if ok_i and ok_m:
-            self.label_stock_info.setText(f"库存: {i_info['stock_quantity']}")
-            self.input_price.setValue(float(m_info['retail_price']))
-            self.input_qty.setMaximum(i_info['stock_quantity'])
+        self.label_stock_info.setText("库存: 查询中...")
+        # 快速切换药品时，同 key 的旧查询会被新查询取代
+        self.runner.submit(self._lookup_medicine, m_id, key="sales_medicine_lookup",
+                           on_result=lambda res: self._apply_medicine_info(m_id, res),
+                           on_error=self._on_task_error)
+
+    def on_medicine_text_edited(self, text):
+        # 仅在有库存（即下拉框中存在）的药品里检索；索引失效后的首次检索需要重建，放到后台执行
+        self.runner.submit(self.b_ctrl.search_medicines, text, MEDICINE_SUGGESTIONS, self.medicine_ids,
+                           key="sales_medicine_search",
+                           on_result=lambda res: self._show_medicine_suggestions(text, res),
+                           on_error=self._on_task_error)
+
+    def _show_medicine_suggestions(self, text, res):
+        if text != self.combo_medicine.currentText(): return  # 结果返回前输入已改变
+        ok, rows = res
+        self.medicine_suggestions = {}
+        if ok:
+            for m in rows:
+                self.medicine_suggestions[f"{m['medicine_name']} [{m['specification']}]  {m['medicine_id']}"] = m['medicine_id']
+        self.medicine_model.setStringList(list(self.medicine_suggestions))
+        if self.medicine_suggestions:
+            self.medicine_completer.complete()
+
+    def on_medicine_suggestion(self, text):
+        idx = self.combo_medicine.findData(self.medicine_suggestions.get(text))
+        if idx >= 0:
+            self.combo_medicine.setCurrentIndex(idx)
+            self.combo_medicine.setEditText(self.combo_medicine.itemText(idx))
+
+    def _lookup_medicine(self, m_id):
+        """后台线程：一次联表查询取得售价与库存"""
+        return self.i_ctrl.pos_lookup(m_id)
+
+    def _apply_medicine_info(self, m_id, res):
+        if m_id != self.combo_medicine.currentData(): return  # 结果返回前已切换到其他药品
+        ok, info = res
+        if ok:
+            self.label_stock_info.setText(f"库存: {info['stock_quantity']}")
+            self.input_price.setValue(float(info['retail_price']))
+            self.input_qty.setMaximum(info['stock_quantity'])
+        else:
+            self.label_stock_info.setText("库存: -")
+
+    def _on_task_error(self, exc):
+        self.btn_submit_sale.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"后台任务执行失败: {exc}")
 
     def add_to_cart(self):
         m_id = self.combo_medicine.currentData()
@@ -250,9 +299,15 @@ class SalesPage(QWidget):
     def submit_sale(self):
         sid, cid, eid = self.input_sales_id.text().strip(), self.combo_customer.currentData(), self.combo_employee.currentData()
         if not sid or not self.cart_items: return QMessageBox.warning(self, "错误", "请填写单号并添加药品")
-        success, msg = self.s_ctrl.submit_sale(sid, cid, eid, "柜台零售", self.cart_items)
+        self.btn_submit_sale.setEnabled(False)  # 防止结账过程中重复提交
+        self.runner.submit(self.s_ctrl.submit_sale, sid, cid, eid, "柜台零售", list(self.cart_items),
+                           on_result=self._on_sale_submitted, on_error=self._on_task_error)
+
+    def _on_sale_submitted(self, res):
+        self.btn_submit_sale.setEnabled(True)
+        success, msg = res
         if success:
-            QMessageBox.information(self, "成功", "结账完成！")
+            QMessageBox.information(self, "成功", msg)
             self.cart_items = []; self.input_sales_id.clear()
             self.update_cart_table(); self.refresh_history(); self.refresh_combos()
         else: QMessageBox.critical(self, "失败", msg)
@@ -264,101 +319,135 @@ class SalesPage(QWidget):
         btn_refresh = QPushButton("刷新流水"); btn_refresh.clicked.connect(self.refresh_history)
         btn_return = QPushButton("办理退货"); btn_return.setStyleSheet("background-color: #607D8B; color: white;")
         btn_return.clicked.connect(self.on_return_click)
-        btn_layout.addWidget(btn_refresh); btn_layout.addWidget(btn_return); btn_layout.addStretch()
-        self.history_table = QTableWidget(); self.history_table.setColumnCount(5)
-        self.history_table.setHorizontalHeaderLabels(["单号", "客户", "收银员", "时间", "总额"])
+        btn_layout.addWidget(btn_refresh); btn_layout.addWidget(btn_return)
+        self.history_status = QLabel(); self.history_status.setStyleSheet("color: red;")  # 分页加载失败时的提示
+        btn_layout.addWidget(self.history_status); btn_layout.addStretch()
+        btn_layout.addWidget(ExportButton("sales_history", "销售流水", "导出明细"))
+        # 历史流水：滚动到底部时模型通过 fetchMore 向服务器请求下一页
+        self.history_table = DataTableView([
+            Column("sales_id", "单号"), Column("cust_name", "客户"), Column("emp_name", "收银员"),
+            Column("sales_date", "时间"), Column("total_amount", "总额", money),
+        ], page_loader=self.load_history_page, batch_size=HISTORY_PAGE_SIZE)
+        self.history_table.load_failed.connect(lambda err: self.history_status.setText(f"销售流水加载失败: {err}"))
         self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.history_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.history_table.doubleClicked.connect(self.show_sale_detail)
         layout.addLayout(btn_layout); layout.addWidget(self.history_table)
 
     def refresh_history(self):
-        success, data = self.s_ctrl.get_history()
-        if success:
-            self.history_table.setRowCount(len(data))
-            for row, d in enumerate(data):
-                item_id = QTableWidgetItem(str(d['sales_id']))
-                item_id.setData(Qt.ItemDataRole.UserRole, d) 
-                self.history_table.setItem(row, 0, item_id)
-                self.history_table.setItem(row, 1, QTableWidgetItem(str(d['cust_name'])))
-                self.history_table.setItem(row, 2, QTableWidgetItem(str(d['emp_name'])))
-                self.history_table.setItem(row, 3, QTableWidgetItem(str(d['sales_date'])))
-                self.history_table.setItem(row, 4, QTableWidgetItem(f"￥{float(d['total_amount']):.2f}"))
+        """从最新一页重新加载销售流水（后台分页查询）"""
+        self.history_status.clear()
+        self.history_table.reload()
+
+    def load_history_page(self, cursor):
+        """后台线程：按键集游标拉取下一页销售流水，返回 (rows, has_more, 下一页游标)"""
+        success, page = self.s_ctrl.get_history_page(cursor, HISTORY_PAGE_SIZE)
+        if not success: raise RuntimeError(page)
+        return page['rows'], page['has_more'], page['last'] or cursor
 
     def show_sale_detail(self):
-        row = self.history_table.currentRow()
-        if row < 0: return
-        sid = self.history_table.item(row, 0).text()
-        success, items = self.s_ctrl.get_order_details(sid)
+        sale_info = self.history_table.current_row_data()
+        if not sale_info: return
+        sid = sale_info['sales_id']
+        self.runner.submit(self.s_ctrl.get_order_details, sid, key="sales_order_details",
+                           on_result=lambda res: self._show_sale_detail(sid, res), on_error=self._on_task_error)
+
+    def _show_sale_detail(self, sid, res):
+        success, items = res
         if success: SalesDetailDialog(sid, items).exec()
+        else: QMessageBox.warning(self, "提示", items)
 
     def on_return_click(self):
-        row = self.history_table.currentRow()
-        if row < 0: return QMessageBox.warning(self, "提示", "请选择销售单")
-        sale_info = self.history_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        success, items = self.s_ctrl.get_order_details(sale_info['sales_id'])
-        if success:
-            dialog = ReturnDialog(sale_info, items)
-            if dialog.exec():
-                data = dialog.get_return_data()
-                if not data['return_id'] or not data['items']: return
-                res_ok, res_msg = self.s_ctrl.process_return(data['return_id'], data['sales_id'], data['emp_id'], data['cust_id'], data['total_amount'], data['reason'], data['items'])
-                if res_ok:
-                    QMessageBox.information(self, "成功", "退货已办理")
-                    self.refresh_return_history(); self.refresh_history(); self.refresh_combos()
-                else: QMessageBox.critical(self, "失败", res_msg)
+        sale_info = self.history_table.current_row_data()
+        if not sale_info: return QMessageBox.warning(self, "提示", "请选择销售单")
+        self.runner.submit(self.s_ctrl.get_order_details, sale_info['sales_id'], key="sales_order_details",
+                           on_result=lambda res: self._open_return_dialog(sale_info, res), on_error=self._on_task_error)
+
+    def _open_return_dialog(self, sale_info, res):
+        success, items = res
+        if not success: return QMessageBox.warning(self, "提示", items)
+        dialog = ReturnDialog(sale_info, items)
+        if dialog.exec():
+            data = dialog.get_return_data()
+            if not data['return_id'] or not data['items']: return
+            self.runner.submit(self.s_ctrl.process_return, data['return_id'], data['sales_id'], data['emp_id'], data['cust_id'], data['total_amount'], data['reason'], data['items'],
+                               on_result=self._on_return_processed, on_error=self._on_task_error)
+
+    def _on_return_processed(self, res):
+        res_ok, res_msg = res
+        if res_ok:
+            QMessageBox.information(self, "成功", "退货已办理")
+            self.refresh_return_history(); self.refresh_history(); self.refresh_combos()
+        else: QMessageBox.critical(self, "失败", res_msg)
 
     # --- 选项卡3：退货历史 (补全双击功能) ---
     def init_return_history_ui(self):
         layout = QVBoxLayout(self.tab_returns)
         tool = QHBoxLayout()
         btn = QPushButton("刷新退货历史"); btn.clicked.connect(self.refresh_return_history)
-        tool.addWidget(btn); tool.addStretch()
-        self.return_table = QTableWidget(); self.return_table.setColumnCount(6)
-        self.return_table.setHorizontalHeaderLabels(["退货单号", "原销售单", "客户", "办理人", "退款额", "日期"])
+        tool.addWidget(btn)
+        self.return_status = QLabel(); self.return_status.setStyleSheet("color: red;")
+        tool.addWidget(self.return_status); tool.addStretch()
+        tool.addWidget(ExportButton("return_history", "退货历史", "导出明细"))
+        self.return_table = DataTableView([
+            Column("return_id", "退货单号"), Column("sales_id", "原销售单"), Column("cust_name", "客户"),
+            Column("emp_name", "办理人"), Column("total_amount", "退款额", money), Column("return_date", "日期"),
+        ], page_loader=self.load_return_page, batch_size=HISTORY_PAGE_SIZE)
+        self.return_table.load_failed.connect(lambda err: self.return_status.setText(f"退货历史加载失败: {err}"))
         self.return_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.return_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         # 核心补全：绑定双击查看详情事件
         self.return_table.doubleClicked.connect(self.show_return_detail)
         layout.addLayout(tool); layout.addWidget(self.return_table)
 
     def refresh_return_history(self):
-        success, data = self.s_ctrl.get_return_history()
-        if success:
-            self.return_table.setRowCount(len(data))
-            for row, d in enumerate(data):
-                self.return_table.setItem(row, 0, QTableWidgetItem(str(d['return_id'])))
-                self.return_table.setItem(row, 1, QTableWidgetItem(str(d['sales_id'])))
-                self.return_table.setItem(row, 2, QTableWidgetItem(str(d['cust_name'])))
-                self.return_table.setItem(row, 3, QTableWidgetItem(str(d['emp_name'])))
-                self.return_table.setItem(row, 4, QTableWidgetItem(f"￥{float(d['total_amount']):.2f}"))
-                self.return_table.setItem(row, 5, QTableWidgetItem(str(d['return_date'])))
+        """从最新一页重新加载退货历史（后台分页查询）"""
+        self.return_status.clear()
+        self.return_table.reload()
+
+    def load_return_page(self, cursor):
+        """后台线程：按键集游标拉取下一页退货记录，返回 (rows, has_more, 下一页游标)"""
+        success, page = self.s_ctrl.get_return_history_page(cursor, HISTORY_PAGE_SIZE)
+        if not success: raise RuntimeError(page)
+        return page['rows'], page['has_more'], page['last'] or cursor
 
     def show_return_detail(self):
         """双击查看退货明细"""
-        row = self.return_table.currentRow()
-        if row < 0: return
-        rid = self.return_table.item(row, 0).text()
-        # 注意：这里需要 SalesController 有 get_return_details 方法
-        success, items = self.s_ctrl.get_return_details(rid)
+        ret = self.return_table.current_row_data()
+        if not ret: return
+        rid = ret['return_id']
+        self.runner.submit(self.s_ctrl.get_return_details, rid, key="sales_return_details",
+                           on_result=lambda res: self._show_return_detail(rid, res), on_error=self._on_task_error)
+
+    def _show_return_detail(self, rid, res):
+        success, items = res
         if success:
             ReturnDetailDialog(rid, items).exec()
         else:
             QMessageBox.critical(self, "错误", f"查询失败: {items}")
 
     def refresh_combos(self):
-        ok_c, c_list = self.b_ctrl.fetch_all_customers()
+        self.runner.submit(self._load_combo_data, key="sales_combos",
+                           on_result=self._fill_combos, on_error=self._on_task_error)
+
+    def _load_combo_data(self):
+        """后台线程：拉取客户、员工、库存下拉数据，并预热药品检索索引"""
+        self.b_ctrl.warm_medicine_index()
+        return self.b_ctrl.fetch_all_customers(), self.b_ctrl.fetch_all_employees(), self.i_ctrl.get_full_report()
+
+    def _fill_combos(self, res):
+        (ok_c, c_list), (ok_e, e_list), (ok_i, i_list) = res
         if ok_c:
             self.combo_customer.clear()
             for c in c_list: self.combo_customer.addItem(c['cust_name'], c['cust_id'])
-        ok_e, e_list = self.b_ctrl.fetch_all_employees()
         if ok_e:
             self.combo_employee.clear()
             for e in e_list: self.combo_employee.addItem(e['emp_name'], e['emp_id'])
-        ok_i, i_list = self.i_ctrl.get_full_report()
         if ok_i:
+            # 填充期间屏蔽信号，避免每加一项都触发一次药品查询
+            self.combo_medicine.blockSignals(True)
             self.combo_medicine.clear()
-            for item in i_list:
-                if item['stock_quantity'] > 0:
-                    self.combo_medicine.addItem(f"{item['medicine_name']} [{item['specification']}]", item['medicine_id'])
+            in_stock = [item for item in i_list if item['stock_quantity'] > 0]
+            for item in in_stock:
+                self.combo_medicine.addItem(f"{item['medicine_name']} [{item['specification']}]", item['medicine_id'])
+            self.medicine_ids = frozenset(item['medicine_id'] for item in in_stock)
+            self.combo_medicine.blockSignals(False)
             self.on_medicine_selected()
\ No newline at end of file
@@ -1,15 +1,20 @@
 import sys
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                             QTableWidgetItem, QPushButton, QLabel, QHeaderView, 
-                             QTabWidget, QMessageBox, QGroupBox, QGridLayout, QComboBox)
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
+                             QLabel, QHeaderView, QTabWidget, QMessageBox, QGroupBox, QGridLayout, QComboBox,
+                             QDateEdit, QSpinBox)
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont, QColor 
 from src.controllers.finance_ctrl import FinanceController
+from src.controllers.analytics_ctrl import AnalyticsController
+from src.ui.task_runner import TaskRunner
+from src.ui.widgets.export_button import ExportButton
+from src.ui.widgets.table_model import Column, DataTableView, money
 
 class StatisticsPage(QWidget):
     def __init__(self):
         super().__init__()
         self.f_ctrl = FinanceController()
+        self.a_ctrl = AnalyticsController()
         self.init_ui()
 
     def init_ui(self):
@@ -19,12 +24,15 @@ class StatisticsPage(QWidget):
         # 两个选项卡
         self.tab_daily = QWidget()
         self.tab_monthly = QWidget()
+        self.tab_analytics = QWidget()
         
         self.init_daily_ui()
         self.init_monthly_ui()
+        self.init_analytics_ui()
         
         self.tabs.addTab(self.tab_daily, "日销售统计流水")
         self.tabs.addTab(self.tab_monthly, "月度经营报表")
+        self.tabs.addTab(self.tab_analytics, "销售分析")
         
         # 切换到“日统计”标签时自动刷新数据
         self.tabs.currentChanged.connect(self.on_tab_changed)
@@ -49,11 +57,18 @@ class StatisticsPage(QWidget):
         btn_refresh.clicked.connect(self.refresh_daily_table)
         tool_layout.addWidget(btn_refresh)
         tool_layout.addStretch()
+        tool_layout.addWidget(ExportButton("daily_summary", "日结数据"))
         layout.addLayout(tool_layout)
         
-        self.daily_table = QTableWidget()
-        self.daily_table.setColumnCount(5)
-        self.daily_table.setHorizontalHeaderLabels(["统计日期", "当日销售额", "当日退货额", "当日净额", "销售单数"])
+        # 净利润着色：赚钱蓝色，亏钱红色
+        net_color = lambda net: QColor("red") if float(net) < 0 else QColor("blue")
+        self.daily_table = DataTableView([
+            Column("summary_date", "统计日期"),
+            Column("total_sales_amount", "当日销售额", money),
+            Column("total_return_amount", "当日退货额", money),
+            Column("net_amount", "当日净额", money, color=net_color),
+            Column("order_count", "销售单数"),
+        ])
         
         header = self.daily_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
@@ -61,28 +76,15 @@ class StatisticsPage(QWidget):
         layout.addWidget(self.daily_table)
 
     def refresh_daily_table(self):
-        """获取日汇总数据并渲染"""
-        success, data = self.f_ctrl.get_daily_logs()
+        """获取日汇总数据并渲染（后台查询，回到界面线程后填充）"""
+        TaskRunner.instance().submit(self.f_ctrl.get_daily_logs, key="statistics_daily",
+                                     on_result=self._on_daily_logs,
+                                     on_error=lambda exc: QMessageBox.warning(self, "查询失败", f"无法加载统计数据: {exc}"))
+
+    def _on_daily_logs(self, res):
+        success, data = res
         if success:
-            self.daily_table.setRowCount(0) # 先清空
-            if not data: return
-            
-            self.daily_table.setRowCount(len(data))
-            for row, d in enumerate(data):
-                self.daily_table.setItem(row, 0, QTableWidgetItem(str(d['summary_date'])))
-                self.daily_table.setItem(row, 1, QTableWidgetItem(f"￥{float(d['total_sales_amount']):.2f}"))
-                self.daily_table.setItem(row, 2, QTableWidgetItem(f"￥{float(d['total_return_amount']):.2f}"))
-                
-                # 净利润着色：赚钱蓝色，亏钱红色
-                net = float(d['net_amount'])
-                net_item = QTableWidgetItem(f"￥{net:.2f}")
-                if net < 0:
-                    net_item.setForeground(QColor("red"))
-                else:
-                    net_item.setForeground(QColor("blue"))
-                
-                self.daily_table.setItem(row, 3, net_item)
-                self.daily_table.setItem(row, 4, QTableWidgetItem(str(d['order_count'])))
+            self.daily_table.set_rows(data)
         else:
             QMessageBox.warning(self, "查询失败", f"无法加载统计数据: {data}")
 
@@ -168,4 +170,94 @@ class StatisticsPage(QWidget):
             self.val_m_net.setText(f"￥{float(n):.2f}")
             self.val_m_orders.setText(str(int(o)))
         else:
-            QMessageBox.warning(self, "错误", f"统计失败: {data}")
\ No newline at end of file
+            QMessageBox.warning(self, "错误", f"统计失败: {data}")
+
+    # ---------------------------
+    # 选项卡3：销售分析（药品排行 / 分类构成 / 收银员业绩 / 客户消费）
+    # ---------------------------
+    def init_analytics_ui(self):
+        layout = QVBoxLayout(self.tab_analytics)
+
+        filter_group = QGroupBox("分析区间")
+        filter_layout = QHBoxLayout(filter_group)
+        today = QDate.currentDate()
+        self.date_start = QDateEdit(today.addDays(1 - today.day()))
+        self.date_end = QDateEdit(today)
+        for w in (self.date_start, self.date_end):
+            w.setCalendarPopup(True)
+            w.setDisplayFormat("yyyy-MM-dd")
+        self.spin_top = QSpinBox()
+        self.spin_top.setRange(3, 100)
+        self.spin_top.setValue(10)
+
+        self.btn_analyze = QPushButton("执行分析")
+        self.btn_analyze.setStyleSheet("background-color: #2196F3; color: white; padding: 5px;")
+        self.btn_analyze.clicked.connect(self.run_analytics)
+
+        filter_layout.addWidget(QLabel("开始:"))
+        filter_layout.addWidget(self.date_start)
+        filter_layout.addWidget(QLabel("结束:"))
+        filter_layout.addWidget(self.date_end)
+        filter_layout.addWidget(QLabel("排行前:"))
+        filter_layout.addWidget(self.spin_top)
+        filter_layout.addWidget(self.btn_analyze)
+        filter_layout.addStretch()
+
+        self.analytics_summary = QLabel("选择区间后点击“执行分析”")
+        self.analytics_summary.setStyleSheet("color: #666;")
+
+        share = lambda v: f"{float(v) * 100:.1f}%"
+        def ranking_table(name_header):
+            return DataTableView([
+                Column("name", name_header),
+                Column("amount", "销售额", money),
+                Column("quantity", "销量"),
+                Column("orders", "单数"),
+                Column("share", "占比", share),
+            ])
+
+        self.analytics_tables = {
+            "medicine": ranking_table("药品"),
+            "category": ranking_table("分类"),
+            "employee": ranking_table("收银员"),
+            "customer": ranking_table("客户"),
+        }
+        titles = {"medicine": "药品销售排行", "category": "分类构成",
+                  "employee": "收银员业绩", "customer": "客户消费排行"}
+        grid = QGridLayout()
+        for i, (dim, table) in enumerate(self.analytics_tables.items()):
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            box = QGroupBox(titles[dim])
+            QVBoxLayout(box).addWidget(table)
+            grid.addWidget(box, i // 2, i % 2)
+
+        layout.addWidget(filter_group)
+        layout.addWidget(self.analytics_summary)
+        layout.addLayout(grid)
+
+    def run_analytics(self):
+        start = self.date_start.date().toPyDate()
+        end = self.date_end.date().toPyDate()
+        if start > end:
+            return QMessageBox.warning(self, "提示", "开始日期不能晚于结束日期")
+        self.btn_analyze.setEnabled(False)
+        self.analytics_summary.setText("正在分析...")
+        TaskRunner.instance().submit(self.a_ctrl.get_dashboard, start, end, self.spin_top.value(),
+                                     key="sales_analytics", on_result=self.show_analytics,
+                                     on_error=self.on_analytics_error)
+
+    def show_analytics(self, res):
+        self.btn_analyze.setEnabled(True)
+        success, data = res
+        if not success:
+            self.analytics_summary.setText("")
+            return QMessageBox.warning(self, "分析失败", f"无法生成销售分析: {data}")
+        t = data["totals"]
+        self.analytics_summary.setText(
+            f"区间销售额 ￥{t['amount']:.2f} | 销量 {t['quantity']} | 销售单 {t['orders']} 张 | 明细 {t['lines']} 行")
+        for dim, table in self.analytics_tables.items():
+            table.set_rows(data[dim])
+
+    def on_analytics_error(self, exc):
+        self.btn_analyze.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"后台任务执行失败: {exc}")
@@ -0,0 +1,139 @@
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QHeaderView,
+                             QTabWidget, QMessageBox, QCheckBox, QFileDialog)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor
+from src.controllers.system_ctrl import SystemController
+from src.ui.task_runner import TaskRunner
+from src.ui.widgets.table_model import Column, DataTableView
+
+REFRESH_MS = 3000  # 页面可见时的自动刷新间隔
+
+ms = lambda v: f"{float(v):.2f}"
+
+
+class SystemPage(QWidget):
+    """系统维护：查询性能诊断（按语句聚合的耗时分布、慢查询、连接池、缓存与离线队列状态）"""
+    def __init__(self):
+        super().__init__()
+        self.ctrl = SystemController()
+        self._loading = False
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        # 1. 工具栏
+        tool_layout = QHBoxLayout()
+        self.chk_enabled = QCheckBox("采集查询统计")
+        self.chk_enabled.setChecked(self.ctrl.db.profiler.enabled)
+        self.chk_enabled.toggled.connect(self.ctrl.set_profiling)
+        btn_refresh = QPushButton("刷新")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset = QPushButton("清零统计")
+        btn_reset.clicked.connect(self.reset_stats)
+        btn_dump = QPushButton("导出诊断报告")
+        btn_dump.clicked.connect(self.dump_stats)
+        tool_layout.addWidget(self.chk_enabled)
+        tool_layout.addWidget(btn_refresh)
+        tool_layout.addWidget(btn_reset)
+        tool_layout.addStretch()
+        tool_layout.addWidget(btn_dump)
+        layout.addLayout(tool_layout)
+
+        # 2. 概要：查询总数、借连接等待、连接池与缓存
+        self.summary_label = QLabel("正在加载诊断数据...")
+        self.summary_label.setStyleSheet("color: #333; padding: 4px;")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        # 3. 语句统计 / 慢查询
+        tabs = QTabWidget()
+        slow_color = lambda n: QColor("red") if n else None
+        self.stmt_table = DataTableView([
+            Column("sql", "SQL（归一化）"),
+            Column("count", "次数", align=Qt.AlignmentFlag.AlignCenter),
+            Column("total_ms", "总耗时(ms)", ms),
+            Column("avg_ms", "平均(ms)", ms),
+            Column("p95_ms", "p95(ms)", ms),
+            Column("max_ms", "最大(ms)", ms),
+            Column("fetch_ms", "读取(ms)", ms),
+            Column("rows", "行数"),
+            Column("errors", "错误", color=slow_color),
+            Column("slow", "慢查询", color=slow_color, bold=bool),
+        ])
+        header = self.stmt_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.stmt_table.setWordWrap(False)
+        tabs.addTab(self.stmt_table, "语句统计")
+
+        self.slow_table = DataTableView([
+            Column("time", "时间"),
+            Column("ms", "耗时(ms)", ms, color=lambda _: QColor("red")),
+            Column("sql", "SQL（归一化）"),
+        ])
+        self.slow_table.horizontalHeader().setStretchLastSection(True)
+        tabs.addTab(self.slow_table, "最近慢查询")
+        layout.addWidget(tabs)
+
+        # 页面可见时定时刷新，隐藏后停止
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        if self._loading: return  # 上一次刷新尚未返回
+        self._loading = True
+        TaskRunner.instance().submit(self.ctrl.get_diagnostics, key="system_diagnostics",
+                                     on_result=self.on_diagnostics, on_error=self.on_error)
+
+    def on_diagnostics(self, res):
+        self._loading = False
+        success, data = res
+        if not success:
+            self.summary_label.setText(data)
+            return
+        q, pool, acq = data["queries"], data["pool"], data["queries"]["acquire"]
+        cache = data["cache"]
+        hit_rates = "，".join(f"{name} {c['hit_rate'] * 100:.0f}%" for name, c in cache.items())
+        text = (f"统计起点：{q['since']} | 查询 {q['queries']} 次，{len(q['statements'])} 种语句 | "
+                f"慢查询阈值 {q['slow_query_ms']:g}ms，最近 {len(q['slow_queries'])} 条\n"
+                f"借连接：{acq['count']} 次，p50 {acq['p50_ms']:g}ms / p95 {acq['p95_ms']:g}ms / 最大 {acq['max_ms']:g}ms | "
+                f"连接池：{pool['in_use']} 使用中 / {pool['idle']} 空闲 / 上限 {pool['max_size']}，"
+                f"等待 {pool['waits']} 次，超时 {pool['timeouts']} 次\n"
+                f"缓存命中率：{hit_rates}")
+        off = data["offline"]
+        if off is not None:
+            text += (f"\n离线队列：{'离线' if off['offline'] else '在线'} | 待同步 {off['depth']} 笔"
+                     f"（最早 {off['oldest_age']:g}s 前），同步失败 {off['failed_depth']} 笔 | "
+                     f"上轮同步 {off['last_sync_ops']} 笔，{off['last_sync_rate']:g} 笔/s | "
+                     f"累计受理 {off['enqueued']} / 同步 {off['synced']} / 重复 {off['duplicates']}")
+        self.summary_label.setText(text)
+        self.stmt_table.set_rows(q["statements"])
+        self.slow_table.set_rows(list(reversed(q["slow_queries"])))
+
+    def on_error(self, exc):
+        self._loading = False
+        self.summary_label.setText(f"获取诊断数据失败: {exc}")
+
+    def reset_stats(self):
+        self.ctrl.reset_query_stats()
+        self.refresh()
+
+    def dump_stats(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出诊断报告", "", "JSON 文件 (*.json)")
+        if not path:
+            return
+        success, res = self.ctrl.dump_diagnostics(path)
+        if success:
+            QMessageBox.information(self, "导出完成", f"诊断报告已保存到：\n{res}")
+        else:
+            QMessageBox.warning(self, "导出失败", res)
@@ -0,0 +1,180 @@
+# src/ui/task_runner.py
+"""
+后台任务执行层：把控制器调用放到 QThreadPool 中执行，结果通过信号回到 GUI 线程
+- submit(fn, ..., on_result=, on_error=, key=) 提交任务
+- 相同 key 的新任务会取消尚未开始的旧任务，已在运行的旧任务结果被丢弃（如连续切换药品）
+- busy_changed 信号驱动忙碌指示；metrics() 提供队列深度等计数
+"""
+import itertools
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from src.utils.logger import logger
+
+
+class _TaskSignals(QObject):
+    # 在工作线程中发射，经队列连接回到 GUI 线程
+    started = pyqtSignal(object)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, object)
+
+
+class _Task(QRunnable):
+    def __init__(self, task_id, key, fn, args, kwargs, on_result, on_error):
+        super().__init__()
+        self.setAutoDelete(False)  # 生命周期由 TaskRunner 持有的引用管理
+        self.task_id = task_id
+        self.key = key
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.on_result, self.on_error = on_result, on_error
+        self.stale = False
+        self.signals = _TaskSignals()
+
+    def run(self):
+        self._emit(self.signals.started)
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self._emit(self.signals.failed, e)
+        else:
+            self._emit(self.signals.finished, result)
+
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(self, *args)
+        except RuntimeError:
+            # 程序退出后仍在运行的任务（如等待连接超时）：信号对象已销毁，结果无人接收
+            pass
+
+
+class TaskRunner(QObject):
+    busy_changed = pyqtSignal(bool)
+    metrics_changed = pyqtSignal(dict)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """全局共享的任务执行器（须在 GUI 线程中首次创建）"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, max_threads=4):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tasks = {}    # task_id -> _Task（排队中或运行中）
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0,
+                          "cancelled": 0, "stale_dropped": 0, "max_queue_depth": 0}
+
+    # ---------- 提交与取消 ----------
+
+    def submit(self, fn, *args, on_result=None, on_error=None, key=None, **kwargs):
+        """
+        在后台线程执行 fn(*args, **kwargs)
+        on_result(result) / on_error(exception) 在 GUI 线程中回调
+        key: 同类请求的标识，新请求会让同 key 的旧请求失效
+        返回任务 ID，可用于 cancel_task
+        """
+        task = _Task(next(self._ids), key, fn, args, kwargs, on_result, on_error)
+        task.signals.started.connect(self._on_started)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+
+        was_busy = self.is_busy()
+        with self._lock:
+            self._tasks[task.task_id] = task
+            self._queued += 1
+            self._counters["submitted"] += 1
+        if key is not None:
+            self.cancel(key, keep=task.task_id)
+        with self._lock:
+            self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], self._queued)
+        self.pool.start(task)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        self.metrics_changed.emit(self.metrics())
+        return task.task_id
+
+    def cancel(self, key, keep=None):
+        """让指定 key 的任务失效（keep 除外）：未开始的直接移出队列，运行中的结果将被丢弃"""
+        for task in [t for t in list(self._tasks.values()) if t.key == key and t.task_id != keep]:
+            self._cancel(task)
+
+    def cancel_task(self, task_id):
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self._cancel(task)
+
+    def _cancel(self, task):
+        task.stale = True
+        if self.pool.tryTake(task):
+            with self._lock:
+                self._tasks.pop(task.task_id, None)
+                self._queued -= 1
+                self._counters["cancelled"] += 1
+            self._after_change()
+
+    # ---------- 工作线程回调（已回到 GUI 线程） ----------
+
+    def _on_started(self, task):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        self.metrics_changed.emit(self.metrics())
+
+    def _finish(self, task):
+        with self._lock:
+            self._tasks.pop(task.task_id, None)
+            self._running -= 1
+
+    def _on_finished(self, task, result):
+        self._finish(task)
+        with self._lock:
+            self._counters["completed"] += 1
+            if task.stale:
+                self._counters["stale_dropped"] += 1
+        if not task.stale and task.on_result is not None:
+            try:
+                task.on_result(result)
+            except Exception as e:
+                logger.error(f"后台任务结果回调异常 | 任务: {task.key or task.task_id} | 错误: {e}")
+        self._after_change()
+
+    def _on_failed(self, task, exc):
+        self._finish(task)
+        with self._lock:
+            self._counters["failed"] += 1
+        if not task.stale:
+            if task.on_error is not None:
+                task.on_error(exc)
+            else:
+                logger.error(f"后台任务执行失败 | 任务: {task.key or task.task_id} | 错误: {exc}")
+        self._after_change()
+
+    def _after_change(self):
+        if not self.is_busy():
+            self.busy_changed.emit(False)
+        self.metrics_changed.emit(self.metrics())
+
+    # ---------- 状态 ----------
+
+    def is_busy(self):
+        with self._lock:
+            return self._queued + self._running > 0
+
+    def metrics(self):
+        """队列深度、运行中任务数以及累计计数"""
+        with self._lock:
+            data = dict(self._counters)
+            data.update({"queue_depth": self._queued, "running": self._running})
+            return data
+
+    def shutdown(self, timeout_ms=3000):
+        """程序退出前清空队列并等待运行中的任务结束"""
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
@@ -1,20 +1,27 @@
 # src/ui/widgets/base_data_tab.py
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                             QTableWidgetItem, QPushButton, QMessageBox, QHeaderView)
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
+                             QMessageBox, QHeaderView, QLineEdit, QLabel)
 from PyQt6.QtCore import Qt
+from src.ui.task_runner import TaskRunner
+from .table_model import Column, DataTableView
+from .import_button import ImportButton
+
+SEARCH_PAGE_SIZE = 200  # 条件查询每次向服务器请求的行数
 
 
 class BaseDataTab(QWidget):
     """
     通用数据管理组件：负责表格展示和增删改查的调度
     """
-    def __init__(self, name, layout_type, headers, field_config, ctrl_methods):
+    def __init__(self, name, layout_type, headers, field_config, ctrl_methods, import_entity=None):
         super().__init__()
         self.name = name
         self.headers = headers
         self.fields = field_config  # 字段配置，用于生成对话框
-        self.ctrl = ctrl_methods    # 包含：fetch_all, fetch_by_id, add, update, delete
+        self.ctrl = ctrl_methods    # 包含：fetch_all, fetch_by_id, add, update, delete；可选 query（服务端条件查询）
         self.layout_type = layout_type  # 保存布局类型
+        self.import_entity = import_entity  # 支持 CSV 批量导入时的导入类型（见 import_ctrl.IMPORT_SPECS）
+        self.search_keyword = None  # 当前检索关键字（刷新时从输入框读取，后台分页查询只读这个值）
         self.init_ui()
 
     def init_ui(self):
@@ -29,13 +36,30 @@ class BaseDataTab(QWidget):
         
         for btn in [self.btn_refresh, self.btn_add, self.btn_edit, self.btn_delete]:
             tool_layout.addWidget(btn)
+        # 加载失败显示在工具栏的提示行中，不弹窗打断操作
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: red;")
+        tool_layout.addWidget(self.status_label)
         tool_layout.addStretch()
+        if 'query' in self.ctrl:
+            # 关键字在服务端按编号/名称/电话等列做前缀匹配，表格按页向服务器请求
+            self.input_search = QLineEdit()
+            self.input_search.setPlaceholderText("编号 / 名称 / 电话 前缀，回车检索")
+            self.input_search.setClearButtonEnabled(True)
+            self.input_search.setMaximumWidth(260)
+            self.input_search.returnPressed.connect(self.refresh_data)
+            self.input_search.textChanged.connect(self.on_search_text_changed)
+            tool_layout.addWidget(self.input_search)
+        if self.import_entity:
+            tool_layout.addWidget(ImportButton(self.import_entity, self.name, on_done=self.refresh_data))
         
-        # 2. 表格
-        self.table = QTableWidget()
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        # 2. 表格（列式模型，列与字段配置一一对应）
+        columns = [Column(field[0], header) for field, header in zip(self.fields, self.headers)]
+        if 'query' in self.ctrl:
+            self.table = DataTableView(columns, page_loader=self.load_page, batch_size=SEARCH_PAGE_SIZE)
+            self.table.load_failed.connect(self.on_load_failed)
+        else:
+            self.table = DataTableView(columns)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
         
         # --- 根据布局类型设置表格头部 ---
@@ -65,32 +89,53 @@ class BaseDataTab(QWidget):
 
     def refresh_data(self):
         """
-        核心修改：处理 Controller 返回的 (success, data) 元组
+        重新加载列表：查询在后台线程执行，结果回到界面线程后交给模型按需渲染
         """
-        # 1. 解包元组
-        success, result = self.ctrl['fetch_all']()
-        
-        # 2. 判断是否成功
+        self.status_label.clear()
+        if 'query' in self.ctrl:
+            # 服务端分页：从第一页重新查询，滚动到底部时再取下一页
+            self.search_keyword = self.input_search.text().strip() or None
+            self.table.reload()
+            return
+
+        TaskRunner.instance().submit(self.ctrl['fetch_all'], key=f"base_data_{self.name}",
+                                     on_result=self._on_fetch_all, on_error=self.on_load_failed)
+
+    def _on_fetch_all(self, res):
+        # 处理 Controller 返回的 (success, data) 元组
+        success, result = res
         if not success:
-            QMessageBox.critical(self, "错误", f"无法加载{self.name}数据: {result}")
+            self.on_load_failed(result)
             return
+        self.table.set_rows(result)
 
-        # 3. 这里的 result 才是真正的列表数据
-        data_list = result
-        
-        self.table.setRowCount(0)
-        self.table.setColumnCount(len(self.headers))
-        self.table.setHorizontalHeaderLabels(self.headers)
-        
-        if not data_list: 
-            return # 如果没数据，直接返回
-        
-        # 4. 遍历真正的列表数据
-        for row_idx, row_dict in enumerate(data_list):
-            self.table.insertRow(row_idx)
-            # row_dict 现在确定是一个字典了
-            for col_idx, value in enumerate(row_dict.values()):
-                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value if value is not None else "")))
+    def on_load_failed(self, error):
+        self.status_label.setText(f"无法加载{self.name}数据: {error}")
+
+    def on_search_text_changed(self, text):
+        if not text:  # 清空关键字后恢复完整列表
+            self.refresh_data()
+
+    def load_page(self, offset):
+        """后台线程：按检索关键字请求从 offset 开始的一页，返回 (rows, has_more, 下一页的 offset)"""
+        offset = offset or 0
+        success, page = self.ctrl['query'](self.search_keyword, limit=SEARCH_PAGE_SIZE, offset=offset)
+        if not success:
+            raise RuntimeError(page)
+        return page['rows'], page['has_more'], offset + len(page['rows'])
+
+    def current_pk(self):
+        """当前选中行的主键值（字段配置中的第一个字段）"""
+        row = self.table.current_row_data()
+        return None if row is None else str(row[self.fields[0][0]])
+
+    def _submit(self, method, *args, on_result, key=None):
+        """增删改查都在后台线程调用控制器，结果回到界面线程后再提示"""
+        TaskRunner.instance().submit(self.ctrl[method], *args, key=key,
+                                     on_result=on_result, on_error=self._on_task_error)
+
+    def _on_task_error(self, exc):
+        QMessageBox.critical(self, "错误", f"后台任务执行失败: {exc}")
 
     def on_add(self):
         from ..modules.base_info import DataInputDialog
@@ -100,39 +145,40 @@ class BaseDataTab(QWidget):
             # 这里的 res 是一个字典，如 {'medicine_id': 'M01', 'name': 'xxx', ...}
             # 我们需要按照字段顺序提取值组成元组
             data_tuple = tuple(res.values())
-            
-            # 调用控制器
-            success, msg = self.ctrl['add'](data_tuple)
-            
-            if success:
-                QMessageBox.information(self, "操作结果", msg)
-                self.refresh_data()
-            else:
-                QMessageBox.warning(self, "操作失败", msg)
+            self._submit('add', data_tuple, on_result=self._on_added)
+
+    def _on_added(self, res):
+        success, msg = res
+        if success:
+            QMessageBox.information(self, "操作结果", msg)
+            self.refresh_data()
+        else:
+            QMessageBox.warning(self, "操作失败", msg)
 
     def on_edit(self):
+        pk_id = self.current_pk()
+        if pk_id is None: return QMessageBox.warning(self, "提示", "请选择要修改的行")
+        self._submit('fetch_by_id', pk_id, key=f"base_data_edit_{self.name}",
+                     on_result=lambda res: self._open_edit_dialog(pk_id, res))
+
+    def _open_edit_dialog(self, pk_id, res):
         from ..modules.base_info import DataInputDialog
-        row = self.table.currentRow()
-        if row < 0: return QMessageBox.warning(self, "提示", "请选择要修改的行")
-        pk_id = self.table.item(row, 0).text()
-        
-        success, info = self.ctrl['fetch_by_id'](pk_id)
-        if success:
-            dialog = DataInputDialog(f"修改{self.name}", self.fields, initial_data=info, is_edit=True)
-            if dialog.exec():
-                new_data = dialog.get_data()
-                # 移除主键（通常是第一个字段）不参与更新
-                pk_field_name = self.fields[0][0]
-                new_data.pop(pk_field_name, None)
-                success_upd, msg = self.ctrl['update'](pk_id, new_data)
-                QMessageBox.information(self, "操作结果", msg)
-                self.refresh_data()
+        success, info = res
+        if not success: return QMessageBox.warning(self, "提示", info)
+        dialog = DataInputDialog(f"修改{self.name}", self.fields, initial_data=info, is_edit=True)
+        if dialog.exec():
+            new_data = dialog.get_data()
+            # 移除主键（通常是第一个字段）不参与更新
+            pk_field_name = self.fields[0][0]
+            new_data.pop(pk_field_name, None)
+            self._submit('update', pk_id, new_data, on_result=self._on_changed)
 
     def on_delete(self):
-        row = self.table.currentRow()
-        if row < 0: return QMessageBox.warning(self, "提示", "请选择要删除的行")
-        pk_id = self.table.item(row, 0).text()
+        pk_id = self.current_pk()
+        if pk_id is None: return QMessageBox.warning(self, "提示", "请选择要删除的行")
         if QMessageBox.question(self, "确认", f"确定删除该{self.name}记录吗？") == QMessageBox.StandardButton.Yes:
-            success, msg = self.ctrl['delete'](pk_id)
-            QMessageBox.information(self, "结果", msg)
-            self.refresh_data()
\ No newline at end of file
+            self._submit('delete', pk_id, on_result=self._on_changed)
+
+    def _on_changed(self, res):
+        QMessageBox.information(self, "操作结果", res[1])
+        self.refresh_data()
\ No newline at end of file
@@ -0,0 +1,70 @@
+# src/ui/widgets/export_button.py
+"""
+通用“导出”按钮：选择保存位置 -> 后台流式导出 -> 进度对话框（可取消）
+各页面只需 ExportButton("sales_history", "销售流水") 放进工具栏即可
+"""
+import os
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtWidgets import QPushButton, QFileDialog, QProgressDialog, QMessageBox
+from src.controllers.export_ctrl import ExportController, xlsx_available
+from src.ui.task_runner import TaskRunner
+
+
+class _ProgressRelay(QObject):
+    # 导出在工作线程中回调进度，经信号转回 GUI 线程更新对话框
+    progressed = pyqtSignal(int, int)
+
+
+class ExportButton(QPushButton):
+    def __init__(self, dataset, title, text="导出", parent=None):
+        super().__init__(text, parent)
+        self.dataset = dataset
+        self.title = title
+        self.ctrl = ExportController()
+        self.clicked.connect(self.start_export)
+
+    def start_export(self):
+        filters = "CSV 文件 (*.csv)"
+        if xlsx_available():
+            filters += ";;Excel 文件 (*.xlsx)"
+        path, selected = QFileDialog.getSaveFileName(
+            self, f"导出{self.title}", self.ctrl.default_filename(self.dataset), filters)
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".xlsx" if "xlsx" in selected else ".csv"
+
+        self.cancel_event = threading.Event()
+        self.dialog = QProgressDialog(f"正在导出{self.title}...", "取消", 0, 0, self)
+        self.dialog.setWindowTitle("数据导出")
+        self.dialog.setMinimumDuration(300)
+        self.dialog.canceled.connect(self.cancel_event.set)
+        self.relay = _ProgressRelay()
+        self.relay.progressed.connect(self.on_progress)
+
+        self.setEnabled(False)
+        TaskRunner.instance().submit(self.ctrl.export, self.dataset, path,
+                                     progress=self.relay.progressed.emit, cancel_event=self.cancel_event,
+                                     on_result=self.on_finished, on_error=self.on_error)
+
+    def on_progress(self, done, total):
+        if self.cancel_event.is_set():
+            return
+        self.dialog.setMaximum(max(total, 1))
+        self.dialog.setValue(min(done, max(total, 1) - 1))  # 写完之前不让对话框自动关闭
+        self.dialog.setLabelText(f"正在导出{self.title}... {done} / {total} 行")
+
+    def on_finished(self, res):
+        self.setEnabled(True)
+        self.dialog.reset()
+        success, msg = res
+        if success:
+            QMessageBox.information(self, "导出完成", msg)
+        elif not self.cancel_event.is_set():
+            QMessageBox.warning(self, "导出失败", msg)
+
+    def on_error(self, exc):
+        self.setEnabled(True)
+        self.dialog.reset()
+        QMessageBox.critical(self, "错误", f"导出失败: {exc}")
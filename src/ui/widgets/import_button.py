@@ -0,0 +1,65 @@
+# src/ui/widgets/import_button.py
+"""
+通用“批量导入”按钮：选择 CSV -> 后台分块导入 -> 进度对话框（可取消）-> 结果汇总
+导入结束后调用 on_done()，由所在页面刷新表格
+"""
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtWidgets import QPushButton, QFileDialog, QProgressDialog, QMessageBox
+from src.controllers.import_ctrl import ImportController
+from src.ui.task_runner import TaskRunner
+
+
+class _ProgressRelay(QObject):
+    progressed = pyqtSignal(int)
+
+
+class ImportButton(QPushButton):
+    def __init__(self, entity, title, on_done=None, text="批量导入", parent=None):
+        super().__init__(text, parent)
+        self.entity = entity
+        self.title = title
+        self.on_done = on_done
+        self.ctrl = ImportController()
+        self.setToolTip("CSV 表头：" + ", ".join(self.ctrl.template_header(entity)))
+        self.clicked.connect(self.start_import)
+
+    def start_import(self):
+        path, _ = QFileDialog.getOpenFileName(self, f"导入{self.title}", "", "CSV 文件 (*.csv)")
+        if not path:
+            return
+
+        self.cancel_event = threading.Event()
+        self.dialog = QProgressDialog(f"正在导入{self.title}...", "取消", 0, 0, self)
+        self.dialog.setWindowTitle("批量导入")
+        self.dialog.setMinimumDuration(300)
+        self.dialog.canceled.connect(self.cancel_event.set)
+        self.relay = _ProgressRelay()
+        self.relay.progressed.connect(lambda n: self.dialog.setLabelText(f"正在导入{self.title}... 已处理 {n} 行"))
+
+        self.setEnabled(False)
+        TaskRunner.instance().submit(self.ctrl.import_csv, self.entity, path,
+                                     progress=self.relay.progressed.emit, cancel_event=self.cancel_event,
+                                     on_result=self.on_finished, on_error=self.on_error)
+
+    def on_finished(self, res):
+        self.setEnabled(True)
+        self.dialog.reset()
+        success, data = res
+        if not success:
+            QMessageBox.warning(self, "导入失败", data)
+            return
+        msg = (f"共处理 {data['total']} 行，成功 {data['imported']} 行，失败 {data['failed']} 行\n"
+               f"耗时 {data['seconds']} 秒（{data['rows_per_sec']} 行/秒）")
+        if data['cancelled']:
+            msg = "导入已取消（已提交的批次保留）\n" + msg
+        if data['error_report']:
+            msg += f"\n错误明细已保存到：{data['error_report']}"
+        QMessageBox.information(self, "导入结果", msg)
+        if self.on_done:
+            self.on_done()
+
+    def on_error(self, exc):
+        self.setEnabled(True)
+        self.dialog.reset()
+        QMessageBox.critical(self, "错误", f"导入失败: {exc}")
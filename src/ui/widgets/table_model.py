@@ -0,0 +1,271 @@
+# src/ui/widgets/table_model.py
+"""
+通用虚拟化表格组件：列式存储 + 懒格式化 + 增量加载 + 代理排序/筛选
+替代 QTableWidget 的“一格一个 QTableWidgetItem”渲染方式，只有可见单元格才会被格式化
+"""
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QTableView, QHeaderView
+from src.ui.task_runner import TaskRunner
+
+# 列定义：
+#   key    : 行字典中的字段名
+#   header : 表头文字
+#   fmt    : 显示格式化函数 value -> str，缺省为 str(value)
+#   color  : 前景色函数 value -> QColor/None
+#   bold   : 加粗判断函数 value -> bool
+#   align  : Qt.AlignmentFlag 对齐方式
+Column = namedtuple("Column", ["key", "header", "fmt", "color", "bold", "align"],
+                    defaults=(None, None, None, None))
+
+RAW_ROLE = Qt.ItemDataRole.UserRole + 1   # 原始值（供排序使用）
+
+
+def money(value):
+    """金额列格式：￥12.34"""
+    return f"￥{float(value):.2f}"
+
+
+def _sort_key(value):
+    """把原始值转换为 Qt 可比较的类型"""
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """
+    只读列式表格模型
+    - 数据按列存放在 self._store[key] 列表中，每行不再创建对象
+    - data() 只在视图请求时才格式化可见单元格
+    - 已加载的行按 batch_size 分批暴露给视图（canFetchMore/fetchMore）；
+      全部暴露后若设置了 page_loader，则在后台线程（TaskRunner）请求下一页，结果回到界面线程后再插入，
+      fetchMore 本身不访问数据库；同一时间只有一个请求，set_rows/reload 之后旧请求的结果被丢弃
+    page_loader: page_loader(token) -> (rows, has_more, next_token)，在后台线程执行，不能访问界面控件
+                 token 为上一页返回的 next_token（第一页为 None）；失败时抛出异常，
+                 此后不再自动翻页（避免视图反复重试），错误信息经 load_failed 信号发出
+    """
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns, page_loader=None, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.page_loader = page_loader
+        self.batch_size = batch_size
+        self._keys = []         # 存储的全部字段（含未显示的字段，如外键 ID）
+        self._store = {}
+        self._loaded = 0        # 已存储的行数
+        self._visible = 0       # 已暴露给视图的行数
+        self._has_more = page_loader is not None
+        self._page_token = None   # 下一页的游标（由 page_loader 返回）
+        self._loading = False     # 是否有一页正在后台加载
+        self._generation = 0      # 每次替换数据加一，用于丢弃过期的分页结果
+        self._fetch_all = False
+        self._task_key = ("table_page", id(self))
+
+    # ---------- 数据装载 ----------
+
+    def _append_to_store(self, rows):
+        for row in rows:
+            if not self._keys:
+                self._keys = list(row.keys())
+                self._store = {k: [] for k in self._keys}
+            for k in self._keys:
+                self._store[k].append(row.get(k))
+        self._loaded += len(rows)
+
+    def set_rows(self, rows, has_more=None):
+        """替换全部数据；rows 为字典列表"""
+        if self._loading:
+            TaskRunner.instance().cancel(self._task_key)
+        self.beginResetModel()
+        self._keys, self._store = [], {}
+        self._loaded = self._visible = 0
+        self._append_to_store(rows or [])
+        self._visible = min(self._loaded, self.batch_size)
+        self._has_more = self.page_loader is not None if has_more is None else has_more
+        self._page_token = None
+        self._loading = self._fetch_all = False
+        self._generation += 1
+        self.endResetModel()
+
+    def reload(self):
+        """清空并从第一页重新加载（配合 page_loader 使用）"""
+        self.set_rows([], has_more=self.page_loader is not None)
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def clear(self):
+        self.set_rows([], has_more=False)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._visible < self._loaded or (self._has_more and not self._loading)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._visible >= self._loaded:
+            if self._has_more and not self._loading:
+                self._request_page()
+            return
+        self._expose(min(self._loaded - self._visible, self.batch_size))
+
+    def _expose(self, count):
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible, self._visible + count - 1)
+        self._visible += count
+        self.endInsertRows()
+
+    def _request_page(self):
+        self._loading = True
+        generation = self._generation
+        TaskRunner.instance().submit(self.page_loader, self._page_token, key=self._task_key,
+                                     on_result=lambda result: self._on_page(generation, result),
+                                     on_error=lambda exc: self._on_page_error(generation, exc))
+
+    def _on_page(self, generation, result):
+        if generation != self._generation:
+            return
+        self._loading = False
+        rows, self._has_more, self._page_token = result
+        self._append_to_store(rows)
+        if self._fetch_all:
+            self.fetch_all()
+        else:
+            self._expose(min(self._loaded - self._visible, self.batch_size))
+
+    def _on_page_error(self, generation, exc):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._has_more = False
+        self.load_failed.emit(str(exc))
+
+    def is_loading(self):
+        return self._loading
+
+    def fetch_all(self):
+        """把剩余数据全部拉取并暴露（导出、统计前使用）；服务器上的剩余页在后台逐页请求，到达后陆续插入"""
+        self._fetch_all = True
+        self._expose(self._loaded - self._visible)
+        if self._has_more and not self._loading:
+            self._request_page()
+
+    # ---------- 访问 ----------
+
+    def row_count_loaded(self):
+        return self._loaded
+
+    def value(self, row, key):
+        col = self._store.get(key)
+        return col[row] if col is not None and row < self._loaded else None
+
+    def row_dict(self, row):
+        """按行号还原该行的完整字典"""
+        if row < 0 or row >= self._loaded:
+            return None
+        return {k: self._store[k][row] for k in self._keys}
+
+    def column_values(self, key):
+        """某列已加载的全部原始值"""
+        return list(self._store.get(key, []))
+
+    # ---------- QAbstractTableModel 接口 ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visible
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal and section < len(self.columns):
+            return self.columns[section].header
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + 1)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = self.columns[index.column()]
+        value = self.value(index.row(), col.key)
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return ""
+            return col.fmt(value) if col.fmt else str(value)
+        if role == RAW_ROLE:
+            return _sort_key(value)
+        if role == Qt.ItemDataRole.ForegroundRole and col.color and value is not None:
+            return col.color(value)
+        if role == Qt.ItemDataRole.FontRole and col.bold and value is not None and col.bold(value):
+            font = QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.ItemDataRole.TextAlignmentRole and col.align is not None:
+            return col.align
+        return None
+
+
+class DataTableView(QTableView):
+    """
+    绑定 ColumnTableModel + QSortFilterProxyModel 的只读表格
+    通过 row_data()/current_row_data() 取得源数据，不必关心排序后的行号映射
+    load_failed(str): 后台分页加载失败，由页面显示在状态栏/提示行中（不在 fetchMore 里弹窗）
+    """
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns, page_loader=None, batch_size=500, sortable=True, parent=None):
+        super().__init__(parent)
+        self.source_model = ColumnTableModel(columns, page_loader, batch_size, self)
+        self.source_model.load_failed.connect(self.load_failed)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.source_model)
+        self.proxy.setSortRole(RAW_ROLE)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.proxy.setFilterKeyColumn(-1)  # 在所有列中筛选
+        self.setModel(self.proxy)
+
+        self.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.setSortingEnabled(sortable)
+        # 不设置排序列时保持数据原有顺序
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.verticalHeader().setDefaultSectionSize(26)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+
+    def set_rows(self, rows, has_more=None):
+        self.source_model.set_rows(rows, has_more)
+
+    def reload(self):
+        self.source_model.reload()
+
+    def clear_rows(self):
+        self.source_model.clear()
+
+    def set_filter_text(self, text):
+        self.proxy.setFilterFixedString(text)
+
+    def row_data(self, view_row):
+        """视图行号 -> 源数据字典"""
+        if view_row < 0:
+            return None
+        src = self.proxy.mapToSource(self.proxy.index(view_row, 0))
+        return self.source_model.row_dict(src.row())
+
+    def current_row_data(self):
+        return self.row_data(self.currentIndex().row())
@@ -1,25 +1,291 @@
 import configparser
 import os
+import threading
+import weakref
+from typing import NamedTuple
 
-def get_db_config():
-    # 获取 config.ini 的绝对路径
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.ini')
-    
+# config.ini 的绝对路径
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.ini')
+
+# 环境变量覆盖：PHARMACY_<节>_<键>，如 PHARMACY_DATABASE_PASSWORD、PHARMACY_POOL_MAX_SIZE、PHARMACY_LOG_LEVEL
+ENV_PREFIX = "PHARMACY_"
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+CACHE_ENTITIES = ("medicine", "employee", "customer", "supplier")
+
+
+# ---------- 各节的类型化配置（不可变） ----------
+
+class DatabaseSettings(NamedTuple):
+    backend: str
+    host: str
+    port: int
+    user: str
+    password: str
+    database: str
+    charset: str
+
+
+class SQLiteSettings(NamedTuple):
+    path: str
+    busy_timeout: int
+    cache_size_kb: int
+
+
+class PoolSettings(NamedTuple):
+    min_size: int
+    max_size: int
+    timeout: float
+    recycle: int
+    ping_interval: int
+
+
+class CacheEntrySettings(NamedTuple):
+    ttl: float
+    max_size: int
+
+
+class CacheSettings(NamedTuple):
+    medicine: CacheEntrySettings
+    employee: CacheEntrySettings
+    customer: CacheEntrySettings
+    supplier: CacheEntrySettings
+
+
+class ProfilerSettings(NamedTuple):
+    enabled: bool
+    slow_query_ms: float
+    slow_log_size: int
+    max_statements: int
+
+
+class OfflineSettings(NamedTuple):
+    enabled: bool
+    path: str
+    retry_interval: float
+    sync_batch: int
+    snapshot_ttl: float
+
+
+class AppSettings(NamedTuple):
+    name: str
+    version: str
+    author: str
+
+
+class LogSettings(NamedTuple):
+    level: str
+    rate_limit_burst: int
+    rate_limit_window: float
+
+
+class Settings(NamedTuple):
+    """整个应用的配置快照：一次加载、各模块共享；热加载时整体替换，不会出现新旧配置混用"""
+    database: DatabaseSettings
+    sqlite: SQLiteSettings
+    pool: PoolSettings
+    cache: CacheSettings
+    profiler: ProfilerSettings
+    offline: OfflineSettings
+    app: AppSettings
+    log: LogSettings
+
+    def changed_sections(self, other):
+        """与另一份配置相比取值不同的节名"""
+        return [name for name in self._fields if getattr(self, name) != getattr(other, name)]
+
+
+# ---------- 解析 ----------
+
+def _apply_env_overrides(config, environ):
+    """把 PHARMACY_<节>_<键> 环境变量写入对应的节（只接受已知的节），返回被覆盖的 “节.键” 列表"""
+    applied = []
+    for name, value in environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        section, _, key = name[len(ENV_PREFIX):].lower().partition("_")
+        if section not in Settings._fields or not key:
+            continue
+        if not config.has_section(section):
+            config.add_section(section)
+        config.set(section, key, value)
+        applied.append(f"{section}.{key}")
+    return applied
+
+
+def _project_path(path):
+    """相对路径按项目根目录解析，与启动目录无关"""
+    if path != ':memory:' and not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(CONFIG_PATH), path)
+    return path
+
+
+def load_settings(path=CONFIG_PATH, environ=None):
+    """
+    读取配置文件并叠加环境变量覆盖，返回新的 Settings（不影响当前生效的配置）
+    取值无法转换为对应类型时抛出 ValueError
+    """
     config = configparser.ConfigParser()
-    config.read(config_path, encoding='utf-8')
-    
-    # 读取 database 这一节的内容
-    db_info = {
-        "host": config.get('database', 'host'),
-        "port": config.getint('database', 'port'),  # 注意这里可以用 getint 转为整数
-        "user": config.get('database', 'user'),
-        "password": config.get('database', 'password'),
-        "database": config.get('database', 'database'),
-        "charset": config.get('database', 'charset')
-    }
-    return db_info
+    config.read(path, encoding='utf-8')
+    _apply_env_overrides(config, os.environ if environ is None else environ)
+
+    backend = config.get('database', 'backend', fallback='mysql').strip().lower()
+    if backend not in ("mysql", "sqlite"):
+        raise ValueError(f"未知的存储后端: {backend}")
+    level = config.get('log', 'level', fallback='INFO').strip().upper()
+
+    return Settings(
+        database=DatabaseSettings(
+            backend=backend,
+            host=config.get('database', 'host', fallback='localhost'),
+            port=config.getint('database', 'port', fallback=3306),
+            user=config.get('database', 'user', fallback='root'),
+            password=config.get('database', 'password', fallback=''),
+            database=config.get('database', 'database', fallback=''),
+            charset=config.get('database', 'charset', fallback='utf8mb4'),
+        ),
+        sqlite=SQLiteSettings(
+            path=_project_path(config.get('sqlite', 'path', fallback='data/pharmacy.db')),
+            busy_timeout=config.getint('sqlite', 'busy_timeout', fallback=5000),
+            cache_size_kb=config.getint('sqlite', 'cache_size_kb', fallback=16384),
+        ),
+        pool=PoolSettings(
+            min_size=config.getint('pool', 'min_size', fallback=1),
+            max_size=config.getint('pool', 'max_size', fallback=8),
+            timeout=config.getfloat('pool', 'timeout', fallback=5.0),
+            recycle=config.getint('pool', 'recycle', fallback=3600),
+            ping_interval=config.getint('pool', 'ping_interval', fallback=30),
+        ),
+        cache=CacheSettings(**{
+            entity: CacheEntrySettings(
+                ttl=config.getfloat('cache', f'{entity}_ttl', fallback=300),
+                max_size=config.getint('cache', f'{entity}_size', fallback=1000),
+            ) for entity in CACHE_ENTITIES
+        }),
+        profiler=ProfilerSettings(
+            enabled=config.getboolean('profiler', 'enabled', fallback=True),
+            slow_query_ms=config.getfloat('profiler', 'slow_query_ms', fallback=200),
+            slow_log_size=config.getint('profiler', 'slow_log_size', fallback=100),
+            max_statements=config.getint('profiler', 'max_statements', fallback=500),
+        ),
+        offline=OfflineSettings(
+            enabled=config.getboolean('offline', 'enabled', fallback=True),
+            path=_project_path(config.get('offline', 'path', fallback='data/offline_queue.db')),
+            retry_interval=config.getfloat('offline', 'retry_interval', fallback=30),
+            sync_batch=config.getint('offline', 'sync_batch', fallback=200),
+            snapshot_ttl=config.getfloat('offline', 'snapshot_ttl', fallback=300),
+        ),
+        app=AppSettings(
+            name=config.get('app', 'name', fallback='医药销售管理系统'),
+            version=config.get('app', 'version', fallback='1.0.0'),
+            author=config.get('app', 'author', fallback=''),
+        ),
+        log=LogSettings(
+            level=level if level in LOG_LEVELS else "INFO",
+            rate_limit_burst=config.getint('log', 'rate_limit_burst', fallback=20),
+            rate_limit_window=config.getfloat('log', 'rate_limit_window', fallback=10.0),
+        ),
+    )
+
+
+# ---------- 当前生效的配置 ----------
+
+_settings = None
+_settings_lock = threading.Lock()
+_listeners = []   # 元素: 可调用对象，或绑定方法的弱引用（对象销毁后自动失效）
+
+
+def get_settings():
+    """
+    当前生效的配置（进程内只解析一次）
+    一次业务操作内应只取一次并沿用该对象，热加载替换的是整个对象，已取得的快照不会被改动
+    """
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _swap(load_settings())
+            settings = _settings
+    return settings
+
+
+def _swap(settings):
+    global _settings
+    _settings = settings
+
+
+def add_settings_listener(callback):
+    """注册配置变更回调 callback(old, new)；绑定方法以弱引用保存，不会延长所属对象的生命周期"""
+    ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+    with _settings_lock:
+        _listeners.append(ref)
+
+
+def reload_settings(path=CONFIG_PATH):
+    """
+    重新读取配置并整体替换当前配置，随后依次通知监听者，返回发生变化的节名列表
+    新配置无效时抛出异常，当前配置保持不变；单个监听者出错只记录日志，不影响其他监听者
+    """
+    from src.utils.logger import logger   # logger 本身依赖本模块，延迟导入
+
+    new = load_settings(path)
+    with _settings_lock:
+        old = _settings
+        if old == new:
+            return []
+        _swap(new)
+        callbacks = [ref() for ref in _listeners]
+        _listeners[:] = [ref for ref, cb in zip(_listeners, callbacks) if cb is not None]
+    if old is None:
+        return list(Settings._fields)
+    for callback in callbacks:
+        if callback is None:
+            continue
+        try:
+            callback(old, new)
+        except Exception as e:
+            logger.error(f"配置变更回调执行失败 | 回调: {getattr(callback, '__qualname__', callback)} | 错误: {e}")
+    return new.changed_sections(old)
+
+
+# ---------- 字典形式（兼容旧接口，供脚本与 create_backend 使用） ----------
+
+def get_db_config():
+    return get_settings().database._asdict()
+
+def get_sqlite_config():
+    """读取 [sqlite] 嵌入式数据库配置（[database] backend = sqlite 时生效），缺省时使用默认值"""
+    return get_settings().sqlite._asdict()
+
+def get_pool_config():
+    """读取 [pool] 连接池配置，缺省时使用默认值"""
+    return get_settings().pool._asdict()
+
+def get_profiler_config():
+    """读取 [profiler] 查询性能采集配置，缺省时使用默认值"""
+    return get_settings().profiler._asdict()
+
+def get_offline_config():
+    """读取 [offline] 离线收银队列配置，缺省时使用默认值"""
+    return get_settings().offline._asdict()
+
+def get_log_config():
+    """读取 [log] 日志配置：级别与同一位置日志的限流参数，缺省时使用默认值"""
+    return get_settings().log._asdict()
+
+def get_cache_config():
+    """读取 [cache] 基础资料缓存配置：{实体: {"ttl": 秒, "max_size": 条目数}}"""
+    cache = get_settings().cache
+    return {entity: getattr(cache, entity)._asdict() for entity in CACHE_ENTITIES}
 
 # 测试一下
 if __name__ == "__main__":
-    conf = get_db_config()
-    print(f"准备连接到数据库: {conf['database']}，用户: {conf['user']}")
\ No newline at end of file
+    settings = get_settings()
+    print(f"准备连接到数据库: {settings.database.database}，用户: {settings.database.user}")
+    print(f"存储后端: {settings.database.backend}，SQLite 配置: {settings.sqlite}")
+    print(f"连接池配置: {settings.pool}")
+    print(f"缓存配置: {settings.cache}")
+    print(f"查询采集配置: {settings.profiler}")
+    print(f"离线收银配置: {settings.offline}")
+    print(f"日志配置: {settings.log}")
+    print(f"应用信息: {settings.app}")
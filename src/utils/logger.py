@@ -1,48 +1,148 @@
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
-from datetime import datetime
+import queue
+import threading
+import time
+from src.utils.config_loader import add_settings_listener, get_settings
 
 # 1. 确定项目根目录和日志目录
 # 确保无论在哪里运行，日志都会放进项目根目录的 logs 文件夹里
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+log_settings = get_settings().log
 
 # 2. 配置日志格式
 log_format = logging.Formatter('%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
 
-# 3. 创建日志对象
+
+class RateLimitFilter(logging.Filter):
+    """
+    按调用位置（文件 + 行号）限流：每个位置在 window 秒内最多放行 burst 条，其余丢弃并计数
+    窗口结束后该位置的下一条日志会附带被抑制的条数；ERROR 及以上级别不限流
+    """
+    def __init__(self, burst=20, window=10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._sites = {}   # (pathname, lineno) -> [窗口开始时间, 已放行条数, 已抑制条数]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.burst:
+                site[1] += 1
+                return True
+            else:
+                site[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.msg}（此前同一位置有 {suppressed} 条日志因频率过高被抑制）"
+        return True
+
+
+class _LazyQueueHandler(logging.Handler):
+    """
+    只把日志记录放进队列：调用线程里仅合并消息参数（msg % args），
+    时间戳、格式化与异常堆栈的展开都交给后台监听线程
+    """
+    def __init__(self, log_queue):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+class _DeferredSetupHandler(logging.Handler):
+    """占位输出端：第一条日志到达时才创建日志目录、输出端和监听线程，之后由队列输出端接替"""
+    def handle(self, record):
+        return _setup_handlers().handle(record)
+
+
+# 3. 创建日志对象，级别取自 config.ini 的 [log] level
 logger = logging.getLogger("PharmacyMS")
-logger.setLevel(logging.DEBUG)
-
-# --- 控制台输出  ---
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(log_format)
-logger.addHandler(console_handler)
-
-# --- 每天自动生成一个新文件 (TimedRotatingFileHandler) ---
-# filename: 日志基础名
-# when: "midnight" 表示每天午夜切换
-# interval: 1 表示每 1 天换一个文件
-# backupCount: 30 表示只保留最近 30 天的日志，旧的会自动删除
-app_log_path = os.path.join(LOG_DIR, "app.log")
-file_handler = TimedRotatingFileHandler(
-    app_log_path, 
-    when="midnight", 
-    interval=1, 
-    backupCount=30, 
-    encoding='utf-8'
-)
-file_handler.setFormatter(log_format)
-logger.addHandler(file_handler)
-
-# --- 专门把错误日志(ERROR/CRITICAL)单独存一个文件 ---
-# 查 Bug 的时候不需要在几千行正常日志里翻，直接看 error.log 即可
-error_log_path = os.path.join(LOG_DIR, "error.log")
-error_handler = logging.FileHandler(error_log_path, encoding='utf-8')
-error_handler.setLevel(logging.ERROR) # 只有 ERROR 及以上的才进这个文件
-error_handler.setFormatter(log_format)
-logger.addHandler(error_handler)
\ No newline at end of file
+logger.setLevel(log_settings.level)
+logger.addHandler(_DeferredSetupHandler())
+
+log_queue = queue.SimpleQueue()
+queue_handler = _LazyQueueHandler(log_queue)
+rate_limit_filter = RateLimitFilter(log_settings.rate_limit_burst, log_settings.rate_limit_window)
+queue_handler.addFilter(rate_limit_filter)
+log_listener = None
+_setup_lock = threading.Lock()
+
+
+def _setup_handlers():
+    """建立日志目录与三个输出端，启动后台监听线程（只执行一次）"""
+    global log_listener
+    with _setup_lock:
+        if log_listener is not None:
+            return queue_handler
+        import atexit
+        from logging.handlers import TimedRotatingFileHandler, QueueListener
+        os.makedirs(LOG_DIR, exist_ok=True)
+
+        # --- 控制台输出  ---
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(log_format)
+
+        # --- 每天自动生成一个新文件 (TimedRotatingFileHandler) ---
+        # filename: 日志基础名
+        # when: "midnight" 表示每天午夜切换
+        # interval: 1 表示每 1 天换一个文件
+        # backupCount: 30 表示只保留最近 30 天的日志，旧的会自动删除
+        file_handler = TimedRotatingFileHandler(
+            os.path.join(LOG_DIR, "app.log"),
+            when="midnight",
+            interval=1,
+            backupCount=30,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(log_format)
+
+        # --- 专门把错误日志(ERROR/CRITICAL)单独存一个文件 ---
+        # 查 Bug 的时候不需要在几千行正常日志里翻，直接看 error.log 即可
+        error_handler = logging.FileHandler(os.path.join(LOG_DIR, "error.log"), encoding='utf-8')
+        error_handler.setLevel(logging.ERROR) # 只有 ERROR 及以上的才进这个文件
+        error_handler.setFormatter(log_format)
+
+        # --- 队列化：业务线程（包括 GUI 线程）只入队，三个输出端由后台监听线程统一写入 ---
+        log_listener = QueueListener(log_queue, console_handler, file_handler, error_handler,
+                                     respect_handler_level=True)
+        log_listener.start()
+        # 程序退出时停止监听线程，队列中剩余的日志会先写完
+        atexit.register(log_listener.stop)
+
+        for handler in list(logger.handlers):
+            if isinstance(handler, _DeferredSetupHandler):
+                logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+        return queue_handler
+
+
+def _apply_log_settings(old, new):
+    """配置热加载：日志级别与限流参数即时生效，输出端与监听线程不需要重建"""
+    if old.log == new.log:
+        return
+    logger.setLevel(new.log.level)
+    rate_limit_filter.burst = new.log.rate_limit_burst
+    rate_limit_filter.window = new.log.rate_limit_window
+    logger.info("日志配置已更新 | 级别: %s | 限流: %s 条/%ss", new.log.level,
+                new.log.rate_limit_burst, new.log.rate_limit_window)
+
+
+add_settings_listener(_apply_log_settings)
@@ -0,0 +1,200 @@
+# src/utils/search_index.py
+"""
+内存检索索引：前缀 + n-gram 子串 + 拼音首字母
+- 每条记录有若干检索键（编号、名称、厂家、规格、名称拼音首字母……），统一转小写
+- 前缀匹配：全部检索键排序后二分查找（等价于一棵压缩的前缀树）
+- 子串匹配：单字/二元组倒排表，沿最短的一张逐条校验
+- 模糊匹配：以上都没有结果时，按共享二元组的数量排序（容忍个别错字/漏字）
+"""
+import bisect
+import heapq
+import importlib.util
+import threading
+from collections import Counter
+from itertools import chain
+
+# GB2312 一级汉字按拼音排序，用区位码区间即可得到声母（未安装 pypinyin 时的后备方案，二级汉字见下方查表）
+_GB2312_INITIALS = [
+    (-20319, "a"), (-20283, "b"), (-19775, "c"), (-19218, "d"), (-18710, "e"), (-18526, "f"),
+    (-18239, "g"), (-17922, "h"), (-17417, "j"), (-16474, "k"), (-16212, "l"), (-15640, "m"),
+    (-15165, "n"), (-14922, "o"), (-14914, "p"), (-14630, "q"), (-14149, "r"), (-14090, "s"),
+    (-13318, "t"), (-12838, "w"), (-12556, "x"), (-11847, "y"), (-11055, "z"),
+]
+_GB2312_BOUNDS = [b for b, _ in _GB2312_INITIALS]
+_GB2312_LAST = -10247
+
+# GB2312 二级汉字（56–87 区）按部首笔画排列，逐字查表：每区一行 94 个声母，按位号顺序（多音字取常用读音）
+_GB2312_LEVEL2 = "".join((
+    "cjwgnspgcgnegypbtyyzdxykygtzjnmjqmbsgzscyjsyyfpgkbzgydywjkgkljswkpjqhyjwrdzlsgmrypywwcckznkyyg",  # 56 区
+    "ttngjeykkzytcjnmcylqlypyqfqrpzslwbtgkjfyxjwzltbncxjjjjtxdttsqzycdxxhgckbphffsstybgmxlpbyllbhlx",  # 57 区
+    "smzmyjhsojnghdzqyklgjhsgqzhxqgkezzwyscscjxyeyxadzpmdssmzjzqjyzcjjfwqjbdzbxgznzcpwhkxhqkmwfbpby",  # 58 区
+    "dtjzzkqhylygxfptyjyyzpszlfchmqshgmxxsxjyqdcsbbqbefsjyhwwgzkpylqbgldlcctnmayddkssngycsgxlyzaypn",  # 59 区
+    "ptsdkdylhgymylcxpycjndqjwqqxfyyfjlejpzrxccqwqqsbzkymgplbmjrqcflnymyqmsqtrbcjthztqfrxqhxmjjcjlx",  # 60 区
+    "xgjmshzkbswyemyltxfsydsglycjqxsjnqbsctyhbftdcyjdjwyghqfrxwckqkxebptlpxjzsrmebwhjlbjslyysmdxlcl",  # 61 区
+    "qkxlhxjrzjmfqhxhwywsbhtrxxglhqhfnmgykldyxzpylggsmtcfpajjzyljtyanjgbjplqgdzyqyaxbkysecjsznslyzh",  # 62 区
+    "zxlzcghpxzhznytdsbcjkdlzyyfwydlebbgqyzkggldndnyskjshdlyxbcghxypkdjmmzngmmclgwzszxzjfznmlzzthcs",  # 63 区
+    "ydbdllscddnlkjykjsycjlkohqasdknhcsganhdaashtcplcpqybsdmpjlpcjoqlcdhjjysprchnwjnlhlyyqyhwzptczg",  # 64 区
+    "wwmzffjqqqqyxaclbhkdjxdgmmydjxzllsygxgkjrywzwyclzmssjzldbydcpcxyhlxchyzjqsqqagmnyxpfrkssbjlyxy",  # 65 区
+    "syglnscmhcwwmnzjjlxxhchsyzsttxrycyxbyhcsmxjsznpwgpxxtaybgajcxlyxdccwzocwkccsbnhcpdyznfcyytyckx",  # 66 区
+    "kybsqkkytqqxfcwchcykelzqbsqyjqcclmthsywhmktlkjlycxwheqqhtqhqpqsqscfymmdmgbwhwlgsllystlmlxpthmj",  # 67 区
+    "hwljzyhzjxhtxjlhxrswlwzjcbxmhzqxsdzpmgfcsglsxymjshxpjxwmyqksmyplrthbxftpmhyxlchlhlzylxgsssstcl",  # 68 区
+    "sldclrpbhzhxyyfhbmgdmycnqqwlqhjjcywjzyejjdhpblqxtqkwhlchqxagtlxljxmsljhtzkzjecxjcjnmfbycsfywyb",  # 69 区
+    "jzgnysdzsqyrsljpclpwxsdwejbjcbcnaytwgmpapclyqpclzxsbnmsggfnzjjbzsfzyndxhplqkzczwalsbccjxsyzgwk",  # 70 区
+    "ypsgxfzfcdkhjgxtlqfsgdslqwzkxtmhsbgzmjzrglyjbpmlmsxlzjqqhzyjczydjwbwjklddpmjegxyhylxhlqyqhkycw",  # 71 区
+    "cjmyyxnatjhyccxzpcqlbzwwytwbqcmlpmyrjcccxfpznzzljplxxyztzlgdldcklyrzzgqtgjhhgjljaxfgfjzslcfdqz",  # 72 区
+    "lclgjdjzsnzlljpjqdcclcjxmyzftsxgcgsbrzxjqqctzhgyqtjqqlzxjylylbcyamcstylpdjbyregklzyzhlyszqlznw",  # 73 区
+    "czcllwjqjjjkdgjzolbbzppglghtgzxyjhzmycnqcycyhbhgxkamtxyxnbskyzzgjzlqjdfcjxdygjqjjpmgwgjjjpkqsb",  # 74 区
+    "gbmmcjssclpqpdxcdyykypcjddyygywrhjrtgznyqldkljszzgzqzjgdykshpzmtlcpwnjyfyzdjcnmwescyglbtzcgmss",  # 75 区
+    "llyxysxsbsjsbbsgghfjlypmzjnlyywdqshzxtyywhmcyhywdbxbtlmsyyyfsxjcbdxxlhjhfssxzqhfzmzcztqcxzxrtt",  # 76 区
+    "djhnnyzqqmtqdmmgyydxmjgdhcdyzbffallztdltfxmxqzdngwqdbdcdjdxbzgsqqddjcmbkzffxmkdmdsyyszcmljdsyn",  # 77 区
+    "sprskmkmpcklgtbqtfzswtfgglyplljzhgjjgypzltcsmcnbtjbqfkthbyzgkpbbymtdssxtbnpdkleycjnyddykzddhqh",  # 78 区
+    "sdzsctarlltkzlgecllkjlqjaqnbdkkghpjtzqksecshalqfmmgjnlyjbbtmlyzxdcjpldlpcqdhzycbzsczbzmsljflkr",  # 79 区
+    "zjsnfrgjhxpdhyjybzgdlqcsezgxlblgyxtwmabchecmwyjyzlljjyhlgndjlslygkdzpzxjyyzlwcxszfgwyydlyhcljs",  # 80 区
+    "cmbjhblyzlycblydpdqysxqzbytdkyxjyycnrjmpdjgklcljbctbjddbblblczqrppxjcjlzcshltoljnmdddlngkathqh",  # 81 区
+    "jhykheznmshrphqqjchgmfprxhjgdychghlyrzqlcyqjnzsqtkqjymszswlcfqqqxyfggyptqwlmcrnfkkfsyylqbmqamm",  # 82 区
+    "myxctpshcptxxzzsmphpshmclmldqfyqxszyjdjjzzhqpdszglstjbckbxyqzysgpsxqzqzrqtbdkyxzkhhgflbcsmdldg",  # 83 区
+    "dzdblzyycxnncsybzbfglzzxswmsccmqnjqsbdqsjtxxmbltxzclzshzcxrqjgjylxzfjphymzqqydfqjjlzznzjsdgzyg",  # 84 区
+    "ctxmzysctlkphtxhtlbjxjlxscdqxcbbtjfqzfsltjbtkqbxxjjljchczdbzjdczjdcprnpqcjpfczlclzxzdmxmphjsgz",  # 85 区
+    "gszzqjylwtjpfsyaxmcjbtzkycwmytzsjjlqcqlwzmalbxyfbpnlsfhtgjwejjxxglljstgshjqlzfkcgnndszfdeqfhbs",  # 86 区
+    "aqtgylbxmmygszldydqmjjrgbjtkgdhgkblqkbdmbylxwcxyttybkmrtjzxqjbhlmhmjjzmqasldcyxyqdlqcafywyxqhz",  # 87 区
+))
+
+if importlib.util.find_spec("pypinyin") is not None:
+    from pypinyin import lazy_pinyin, Style
+else:
+    lazy_pinyin = None
+
+
+def _char_initial(ch):
+    if ch.isascii():
+        return ch.lower() if ch.isalnum() else ""
+    try:
+        raw = ch.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    if len(raw) != 2:
+        return ""
+    code = raw[0] * 256 + raw[1] - 65536
+    if _GB2312_BOUNDS[0] <= code <= _GB2312_LAST:
+        return _GB2312_INITIALS[bisect.bisect_right(_GB2312_BOUNDS, code) - 1][1]
+    level2 = (raw[0] - 0xD8) * 94 + (raw[1] - 0xA1)
+    if 0 <= level2 < len(_GB2312_LEVEL2):
+        return _GB2312_LEVEL2[level2]
+    return ""   # 符号等非汉字
+
+
+def pinyin_initials(text):
+    """汉字串的拼音首字母：阿莫西林 -> amxl（字母数字原样保留，其它符号忽略）"""
+    if not text:
+        return ""
+    if lazy_pinyin is not None:
+        return "".join(p[0] for p in lazy_pinyin(text, style=Style.FIRST_LETTER, errors="default") if p).lower()
+    return "".join(_char_initial(ch) for ch in text)
+
+
+def _grams(text, n):
+    """text 的全部 n 元组；不足 n 个字符时返回自身"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _index_grams(text):
+    """建索引用：单字与二元组都收录（单字查询很常见，如输入一个“阿”）"""
+    return _grams(text, 1) | _grams(text, 2)
+
+
+class SearchIndex:
+    """
+    build(records, key_func, id_func) 建立索引；search(query) 返回记录 ID 列表（按相关度排序）
+    key_func(record) -> 前缀检索键列表，id_func(record) -> 记录 ID
+    text_func(record) -> 参与子串检索的文本列表（默认与前缀键相同；编号这类只按前缀查的键不必放进来）
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}     # id -> record
+        self._rank = {}        # id -> 同级匹配内的次序
+        self._keys = {}        # id -> [子串检索文本]
+        self._sorted = []      # [(检索键, id)] 按键排序
+        self._grams = {}       # n 元组 -> [id]（按次序）
+
+    def __len__(self):
+        return len(self._records)
+
+    def build(self, records, key_func, id_func, order_func=None, text_func=None):
+        """order_func(record) -> 同等匹配级别内的排序键（默认按 ID）"""
+        ordered = sorted(records, key=order_func or id_func)
+        records_by_id, keys_by_id, rank, sorted_keys, grams = {}, {}, {}, [], {}
+        # 按排序次序建倒排表，每个 n 元组的 ID 列表天然有序，检索时取够 limit 条即可停止
+        for i, record in enumerate(ordered):
+            rid = id_func(record)
+            keys = [k.lower() for k in key_func(record) if k]
+            texts = [t.lower() for t in text_func(record) if t] if text_func else keys
+            records_by_id[rid] = record
+            keys_by_id[rid] = texts
+            rank[rid] = i
+            sorted_keys += [(k, rid) for k in keys]
+            seen = set()
+            for t in texts:
+                for g in _index_grams(t) - seen:
+                    grams.setdefault(g, []).append(rid)
+                    seen.add(g)
+        sorted_keys.sort()
+        with self._lock:
+            self._records, self._keys, self._sorted, self._grams, self._rank = (
+                records_by_id, keys_by_id, sorted_keys, grams, rank)
+
+    def get(self, rid):
+        return self._records.get(rid)
+
+    def _prefix(self, q, limit, allowed):
+        found = []
+        i = bisect.bisect_left(self._sorted, (q,))
+        while i < len(self._sorted) and self._sorted[i][0].startswith(q):
+            rid = self._sorted[i][1]
+            if rid not in found and (allowed is None or rid in allowed):
+                found.append(rid)
+                if len(found) >= limit * 4:
+                    break
+            i += 1
+        return found
+
+    def _substring(self, q, limit, allowed, exclude):
+        postings = [self._grams.get(g) for g in _grams(q, min(len(q), 2))]
+        if not postings or not all(postings):
+            return []
+        found = []
+        for rid in min(postings, key=len):   # 沿最短的倒排表按次序逐个校验，取够即停
+            if rid in exclude or (allowed is not None and rid not in allowed):
+                continue
+            if any(q in k for k in self._keys[rid]):
+                found.append(rid)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _fuzzy(self, q, limit, allowed):
+        grams = _grams(q, 2)
+        scores = Counter(chain.from_iterable(self._grams.get(g, ()) for g in grams))
+        need = max(1, (len(grams) + 1) // 2)
+        return heapq.nsmallest(limit, (rid for rid, n in scores.items()
+                                       if n >= need and (allowed is None or rid in allowed)),
+                               key=lambda r: (-scores[r], self._rank[r]))
+
+    def search(self, query, limit=20, allowed=None):
+        """
+        检索顺序：前缀匹配 > 子串匹配 > 模糊匹配（前两者无结果时才启用）
+        allowed: 只返回该集合内的 ID（如仅限有库存的药品）
+        """
+        q = (query or "").strip().lower()
+        if not q:
+            return []
+        with self._lock:
+            prefix = self._prefix(q, limit, allowed)
+            prefix.sort(key=lambda r: self._rank[r])
+            result = prefix[:limit]
+            if len(result) < limit:
+                result += self._substring(q, limit - len(result), allowed, set(result))
+            if not result and len(q) >= 3:
+                result = self._fuzzy(q, limit, allowed)
+            return result
@@ -0,0 +1,62 @@
+# tests/conftest.py
+"""
+DAO / 控制器测试：在进程内的 SQLite 内存库上运行（DBManager.configure(SQLiteBackend(":memory:"))），
+不需要 MySQL 服务器；每个测试使用一份全新的内存库
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 测试不使用离线收银队列（否则会在项目目录下创建队列文件），日志只输出警告以上
+os.environ.setdefault("PHARMACY_OFFLINE_ENABLED", "false")
+os.environ.setdefault("PHARMACY_LOG_LEVEL", "WARNING")
+
+import pytest  # noqa: E402
+from src.database.backends import SQLiteBackend  # noqa: E402
+from src.database.cache import get_master_cache  # noqa: E402
+from src.database.dao import CustomerDAO, EmployeeDAO, MedicineDAO, PurchaseDAO, SupplierDAO  # noqa: E402
+from src.database.db_manager import DBManager  # noqa: E402
+
+MEDICINES = ("TM00000001", "TM00000002", "TM00000003")
+SUPPLIER, EMPLOYEE, CUSTOMER = "TV00000001", "TE001", "TC00000001"
+INITIAL_STOCK = 100
+
+
+@pytest.fixture
+def db():
+    """全新的内存库；基础资料缓存一并清空，避免上一个测试的数据残留"""
+    manager = DBManager.configure(SQLiteBackend(":memory:"))
+    get_master_cache().invalidate_all()
+    yield manager
+    manager.close()
+
+
+def seed(db):
+    """在 db 上写入基础资料：1 个供应商、员工、客户，3 种药品，每种入库 INITIAL_STOCK"""
+    SupplierDAO().add(SUPPLIER, "测试供应商", "张三", "13800000000", "测试地址", "6222000000000000")
+    EmployeeDAO().add(EMPLOYEE, "测试员工", "F", "13900000000", "收银员")
+    CustomerDAO().add(CUSTOMER, "测试客户", "13700000000", "测试地址")
+    for i, m_id in enumerate(MEDICINES, 1):
+        MedicineDAO().add(m_id, f"测试药品{i}", "测试", "10片/盒", "测试药厂", "2025-01-01", "2030-01-01", "9.90", None)
+    PurchaseDAO().register_purchase("TP00000001", SUPPLIER, EMPLOYEE, "INV-0001", "期初",
+                                    [{"medicine_id": m_id, "quantity": INITIAL_STOCK, "unit_price": "5.00"}
+                                     for m_id in MEDICINES])
+    return db
+
+
+@pytest.fixture
+def seeded(db):
+    return seed(db)
+
+
+@pytest.fixture
+def stock(db):
+    """stock(m_id)：药品当前库存，没有库存记录时返回 None"""
+    def read(m_id):
+        with db.session() as cursor:
+            cursor.execute("SELECT stock_quantity FROM inventory WHERE medicine_id = %s", (m_id,))
+            row = cursor.fetchone()
+        return row["stock_quantity"] if row else None
+    return read
@@ -0,0 +1,154 @@
+# tests/test_controllers.py
+import time
+from conftest import CUSTOMER, EMPLOYEE, INITIAL_STOCK, MEDICINES, SUPPLIER
+from src.controllers import base_info_ctrl
+from src.controllers.base_info_ctrl import BaseInfoController
+from src.controllers.import_ctrl import ImportController
+from src.controllers.inventory_ctrl import InventoryController, LowStockMonitor
+from src.controllers.purchase_ctrl import PurchaseController
+from src.controllers.sales_ctrl import SalesController
+from src.database.cache import get_master_cache
+from src.database.dao import MedicineDAO
+from src.utils.search_index import pinyin_initials
+
+
+def test_base_info_add_fetch_and_duplicate(seeded):
+    ctrl = BaseInfoController()
+    data = ("TM00000010", "阿莫西林胶囊", "抗生素", "0.25g*24粒", "测试药厂", "2025-01-01", "2030-01-01", "15.00", None)
+    assert ctrl.add_medicine(data) == (True, "药品添加成功")
+    ok, msg = ctrl.add_medicine(data)
+    assert not ok and "数据库错误" in msg
+    ok, medicine = ctrl.fetch_medicine_by_id("TM00000010")
+    assert ok and medicine["medicine_name"] == "阿莫西林胶囊"
+
+
+def test_search_medicines_by_pinyin_initials(seeded):
+    ctrl = BaseInfoController()
+    ctrl.add_medicine(("TM00000010", "阿莫西林胶囊", "抗生素", "0.25g*24粒", "测试药厂", "2025-01-01", "2030-01-01",
+                       "15.00", None))
+    ok, rows = ctrl.search_medicines("amxl")
+    assert ok and [r["medicine_id"] for r in rows] == ["TM00000010"]
+
+
+def test_submit_sale_and_return(seeded, stock):
+    ctrl = SalesController()
+    items = [{"medicine_id": MEDICINES[0], "quantity": 4, "unit_price": "9.90"}]
+    assert ctrl.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", items) == (True, "销售结账成功！")
+    assert ctrl.process_return("TR00000001", "TS00000001", EMPLOYEE, CUSTOMER, "9.90", "测试",
+                               [{"medicine_id": MEDICINES[0], "return_quantity": 1}])[0]
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 3
+
+    ok, page = ctrl.get_history_page(page_size=10)
+    assert ok and [r["sales_id"] for r in page["rows"]] == ["TS00000001"]
+
+
+def test_submit_sale_rejections(seeded):
+    ctrl = SalesController()
+    assert ctrl.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", []) == (False, "未选择任何药品！")
+    ok, msg = ctrl.submit_sale("TS00000002", CUSTOMER, EMPLOYEE, "", [
+        {"medicine_id": MEDICINES[0], "quantity": INITIAL_STOCK + 1, "unit_price": "9.90"}])
+    assert not ok and msg.startswith("销售拦截")
+
+
+def test_purchase_then_inventory_lookup(seeded):
+    ok, _ = PurchaseController().submit_purchase("TP00000002", SUPPLIER, EMPLOYEE, "INV-2", "", [
+        {"medicine_id": MEDICINES[2], "quantity": 5, "unit_price": "5.00"}])
+    assert ok
+    ctrl = InventoryController()
+    ok, row = ctrl.pos_lookup(MEDICINES[2])
+    assert ok and row["stock_quantity"] == INITIAL_STOCK + 5
+    ok, rows = ctrl.pos_lookup_batch([MEDICINES[0], "TM99999999"])
+    assert ok and set(rows) == {MEDICINES[0]}
+
+
+def test_pos_lookup_batch_accepts_generator(seeded):
+    ok, rows = InventoryController().pos_lookup_batch(m_id for m_id in MEDICINES)
+    assert ok and set(rows) == set(MEDICINES)
+
+
+def test_set_same_low_stock_threshold_twice(seeded):
+    ctrl = InventoryController()
+    assert ctrl.set_low_stock_threshold(MEDICINES[0], 20) == (True, "预警阈值已更新")
+    assert ctrl.set_low_stock_threshold(MEDICINES[0], 20) == (True, "预警阈值已更新")
+    assert not ctrl.set_low_stock_threshold("TM99999999", 20)[0]
+
+
+def _change_log_ids(db):
+    with db.session() as cursor:
+        cursor.execute("SELECT log_id FROM inventory_change_log ORDER BY log_id")
+        return [row["log_id"] for row in cursor.fetchall()]
+
+
+def test_low_stock_monitor_purges_processed_log(seeded):
+    sales = SalesController()
+    monitor = LowStockMonitor(retention=0, settle_lag=0)
+    monitor.start()
+    sales.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", [
+        {"medicine_id": MEDICINES[0], "quantity": INITIAL_STOCK - 5, "unit_price": "9.90"}])
+    events = monitor.poll()
+    assert [(e["medicine_id"], e["event"]) for e in events] == [(MEDICINES[0], "low")]
+    assert _change_log_ids(seeded) == []
+
+    # 保留期内的日志不清理（其他收银机的监控可能还没读到）
+    keeping = LowStockMonitor()
+    keeping.start()
+    sales.submit_sale("TS00000002", CUSTOMER, EMPLOYEE, "", [
+        {"medicine_id": MEDICINES[1], "quantity": 1, "unit_price": "9.90"}])
+    keeping.poll()
+    assert len(_change_log_ids(seeded)) == 1
+
+
+def test_low_stock_monitor_rescans_recent_log_ids(seeded):
+    sales = SalesController()
+    monitor = LowStockMonitor()
+    monitor.start()
+    start_id = monitor.last_id
+    sales.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", [
+        {"medicine_id": MEDICINES[0], "quantity": INITIAL_STOCK - 5, "unit_price": "9.90"}])
+    assert [e["event"] for e in monitor.poll()] == ["low"]
+    # 刚写入的日志之前可能还有未提交的流水号：水位不推进，下一轮重新扫描但不重复报警
+    assert monitor.last_id == start_id
+    assert monitor.poll() == []
+
+    with seeded.session() as cursor:
+        cursor.execute("UPDATE inventory_change_log SET changed_at = '2000-01-01 00:00:00'")
+    latest = max(_change_log_ids(seeded))
+    monitor.poll()
+    assert monitor.last_id == latest
+
+
+def _low_stock_threshold(db, m_id):
+    with db.session() as cursor:
+        cursor.execute("SELECT low_stock_threshold FROM inventory WHERE medicine_id = %s", (m_id,))
+        return cursor.fetchone()["low_stock_threshold"]
+
+
+def test_opening_stock_import_keeps_thresholds_without_column(seeded, stock, tmp_path):
+    InventoryController().set_low_stock_threshold(MEDICINES[0], 20)
+    path = tmp_path / "stock.csv"
+    path.write_text(f"药品ID,库存总量\n{MEDICINES[0]},30\n", encoding="utf-8")
+    ok, result = ImportController().import_csv("opening_stock", str(path))
+    assert ok and result["imported"] == 1
+    assert stock(MEDICINES[0]) == 30
+    assert _low_stock_threshold(seeded, MEDICINES[0]) == 20
+
+    path.write_text(f"药品ID,库存总量,预警阈值\n{MEDICINES[0]},30,5\n", encoding="utf-8")
+    assert ImportController().import_csv("opening_stock", str(path))[0]
+    assert _low_stock_threshold(seeded, MEDICINES[0]) == 5
+
+
+def test_medicine_index_expires_with_cache(seeded, monkeypatch):
+    """其他收银机新增的药品（本进程缓存未失效）在缓存 ttl 过期后可以检索到"""
+    monkeypatch.setattr(base_info_ctrl, "INDEX_MIN_AGE", 0)
+    get_master_cache().caches["medicine"].configure(0.05, 1000)
+    ctrl = BaseInfoController()
+    assert ctrl.search_medicines("tbkw") == (True, [])
+    MedicineDAO().add("TM00000011", "头孢克肟", "抗生素", "0.1g*6片", "测试药厂", "2025-01-01", "2030-01-01", "30.00", None)
+    time.sleep(0.1)
+    ok, rows = ctrl.search_medicines("tbkw")
+    assert ok and [r["medicine_id"] for r in rows] == ["TM00000011"]
+
+
+def test_pinyin_initials_cover_level2_characters():
+    assert pinyin_initials("头孢克肟") == "tbkw"
+    assert pinyin_initials("阿莫西林") == "amxl"
@@ -0,0 +1,91 @@
+# tests/test_offline_queue.py
+import pymysql
+import pytest
+from conftest import CUSTOMER, EMPLOYEE, INITIAL_STOCK, MEDICINES
+from src.controllers.sales_ctrl import OfflineSync, SalesController
+from src.database import backends
+from src.database.dao import SalesDAO
+from src.database.offline_queue import OfflineQueue
+
+_EXISTS_SQL = "SELECT 1 FROM sales_order WHERE sales_id = %s"
+
+
+def _item(qty, m_id=MEDICINES[0]):
+    return {"medicine_id": m_id, "quantity": qty, "unit_price": "9.90"}
+
+
+def _miss_first_exists_check(monkeypatch):
+    """模拟竞态：幂等预检查没有看到单据，随后插入时才与其他连接已写入的单据冲突"""
+    translate = backends.translate_sql
+    missed = []
+
+    def fake(sql):
+        if sql == _EXISTS_SQL and not missed:
+            missed.append(sql)
+            return translate(sql + " AND 0")
+        return translate(sql)
+    monkeypatch.setattr(backends, "translate_sql", fake)
+
+
+def test_register_sale_once_treats_duplicate_key_as_applied(seeded, stock, monkeypatch):
+    dao = SalesDAO()
+    dao.register_sale("TS00000001", CUSTOMER, EMPLOYEE, "", [_item(2)])
+    _miss_first_exists_check(monkeypatch)
+    assert dao.register_sale_once("TS00000001", CUSTOMER, EMPLOYEE, "", [_item(2)]) is False
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 2
+
+
+def test_register_sale_once_keeps_duplicate_detail_errors(seeded):
+    with pytest.raises(pymysql.err.IntegrityError):
+        SalesDAO().register_sale_once("TS00000001", CUSTOMER, EMPLOYEE, "", [_item(1), _item(1)])
+
+
+def test_offline_start_uses_saved_snapshot(seeded, stock, tmp_path):
+    path = str(tmp_path / "offline_queue.db")
+    queue = OfflineQueue(path)
+    OfflineSync(queue).sync()
+    queue.close()
+
+    # 重新启动时中心库不可达：使用队列文件中保存的快照受理销售
+    queue = OfflineQueue(path)
+    queue.mark_offline()
+    ctrl = SalesController()
+    ctrl.offline = queue
+    ok, msg = ctrl.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", [_item(3)])
+    assert ok and "离线受理" in msg
+    assert not ctrl.submit_sale("TS00000002", CUSTOMER, EMPLOYEE, "", [_item(INITIAL_STOCK)])[0]
+
+    queue.mark_online()
+    stats = OfflineSync(queue).sync()
+    assert stats["depth"] == 0 and stats["synced"] == 1
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 3
+    queue.close()
+
+
+def test_offline_return_is_checked_locally_and_replayed(seeded, stock, tmp_path):
+    queue = OfflineQueue(str(tmp_path / "offline_queue.db"))
+    OfflineSync(queue).sync()
+    ctrl = SalesController()
+    ctrl.offline = queue
+    assert ctrl.submit_sale("TS00000001", CUSTOMER, EMPLOYEE, "", [_item(5)])[0]
+
+    queue.mark_offline()
+    ok, items = ctrl.get_order_details("TS00000001")
+    assert ok and [(i["medicine_id"], i["quantity"]) for i in items] == [(MEDICINES[0], 5)]
+    before = {r["medicine_id"]: r["stock_quantity"] for r in queue.snapshot_rows()}
+    back = [{"medicine_id": MEDICINES[0], "return_quantity": 2}]
+    ok, msg = ctrl.process_return("TR00000001", "TS00000001", EMPLOYEE, CUSTOMER, 19.8, "", back)
+    assert ok and "离线受理" in msg
+    snapshot = {r["medicine_id"]: r["stock_quantity"] for r in queue.snapshot_rows()}
+    assert snapshot[MEDICINES[0]] == before[MEDICINES[0]] + 2
+    # 可退数量按本地副本扣减：剩余 3 件，再退 4 件被拦截
+    over = [{"medicine_id": MEDICINES[0], "return_quantity": 4}]
+    assert not ctrl.process_return("TR00000002", "TS00000001", EMPLOYEE, CUSTOMER, 39.6, "", over)[0]
+
+    queue.mark_online()
+    stats = OfflineSync(queue).sync()
+    assert stats["depth"] == 0 and stats["synced"] == 1
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 3
+    assert SalesDAO().register_return_once("TR00000001", "TS00000001", EMPLOYEE, CUSTOMER, 19.8, "", back) is False
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 3
+    queue.close()
@@ -0,0 +1,88 @@
+# tests/test_sqlite_backend.py
+import sqlite3
+import threading
+import pymysql
+import pytest
+from conftest import CUSTOMER, EMPLOYEE, INITIAL_STOCK, MEDICINES, seed
+from src.controllers.sales_ctrl import SalesController
+from src.database import backends
+from src.database.backends import SQLiteBackend, translate_sql
+from src.database.dao import MedicineDAO, SalesDAO
+from src.database.db_manager import DBManager
+
+
+def test_translate_sql_rewrites_mysql_dialect():
+    assert translate_sql("INSERT IGNORE INTO t VALUES (%s, %s)") == "INSERT OR IGNORE INTO t VALUES (?, ?)"
+    assert translate_sql("SELECT * FROM t WHERE id = %s FOR UPDATE") == "SELECT * FROM t WHERE id = ?"
+    assert translate_sql("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = b + VALUES(b)") == \
+        "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = b + excluded.b"
+
+
+def test_errors_map_to_mysql_codes(seeded):
+    with pytest.raises(pymysql.err.IntegrityError) as dup:
+        MedicineDAO().add(MEDICINES[0], "重复", "测试", "x", "x", "2025-01-01", "2030-01-01", "1.00", None)
+    assert dup.value.args[0] == 1062
+
+    with pytest.raises(pymysql.err.OperationalError) as shortage:
+        SalesDAO().register_sale("TS_SHORT", CUSTOMER, EMPLOYEE, "", [
+            {"medicine_id": MEDICINES[0], "quantity": INITIAL_STOCK + 1, "unit_price": "9.90"}])
+    assert shortage.value.args[0] == 1644
+
+
+def _concurrent_sales(threads=4, per_thread=20):
+    """threads 个线程各提交 per_thread 笔单件销售，返回失败信息列表"""
+    failures = []
+    lock = threading.Lock()
+
+    def worker(t):
+        ctrl = SalesController()
+        for i in range(per_thread):
+            ok, msg = ctrl.submit_sale(f"TS{t:02d}{i:06d}", CUSTOMER, EMPLOYEE, "", [
+                {"medicine_id": MEDICINES[0], "quantity": 1, "unit_price": "9.90"}])
+            if not ok:
+                with lock:
+                    failures.append(msg)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return failures
+
+
+def test_memory_db_serializes_concurrent_writers(seeded, stock):
+    assert _concurrent_sales() == []
+    assert stock(MEDICINES[0]) == INITIAL_STOCK - 80
+
+
+def test_file_db_concurrent_writers(tmp_path):
+    db = seed(DBManager.configure(SQLiteBackend(str(tmp_path / "pharmacy.db"))))
+    assert _concurrent_sales() == []
+    with db.session() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM sales_order")
+        assert cursor.fetchone()["n"] == 80
+    db.close()
+
+
+def test_schema_upgrade_recreates_changed_triggers(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    SQLiteBackend(path).connect().close()
+
+    # 模拟旧版数据库：触发器内容与当前脚本不同
+    raw = sqlite3.connect(path)
+    raw.executescript("""
+        DROP TRIGGER tri_return_add_stock;
+        CREATE TRIGGER tri_return_add_stock AFTER INSERT ON sales_return_detail BEGIN SELECT 1; END;
+    """)
+    raw.close()
+
+    monkeypatch.setattr(backends, "SQLITE_SCHEMA_VERSION", backends.SQLITE_SCHEMA_VERSION + 1)
+    SQLiteBackend(path).connect().close()
+
+    raw = sqlite3.connect(path)
+    sql = raw.execute("SELECT sql FROM sqlite_master WHERE name = 'tri_return_add_stock'").fetchone()[0]
+    version = raw.execute("PRAGMA user_version").fetchone()[0]
+    raw.close()
+    assert "stock_quantity + NEW.return_quantity" in sql
+    assert version == backends.SQLITE_SCHEMA_VERSION
@@ -0,0 +1,91 @@
+# tests/test_table_model.py
+import os
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+from src.ui.widgets.table_model import Column, ColumnTableModel  # noqa: E402
+
+PAGE = 3
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def _wait(model, timeout=5):
+    """处理事件直到后台分页返回（结果经信号回到界面线程）"""
+    deadline = time.monotonic() + timeout
+    while model.is_loading() and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+    QApplication.processEvents()
+    assert not model.is_loading()
+
+
+def _ids(model):
+    return [model.value(row, "id") for row in range(model.rowCount())]
+
+
+def test_pages_load_off_the_gui_thread(app):
+    threads = []
+
+    def loader(token):
+        threads.append(threading.current_thread())
+        start = token or 0
+        return [{"id": i} for i in range(start, start + PAGE)], start + PAGE < 2 * PAGE, start + PAGE
+
+    model = ColumnTableModel([Column("id", "ID")], page_loader=loader, batch_size=PAGE)
+    model.fetchMore()
+    assert model.rowCount() == 0 and model.is_loading() and not model.canFetchMore()
+    _wait(model)
+    assert _ids(model) == [0, 1, 2]
+
+    model.fetchMore()
+    _wait(model)
+    assert _ids(model) == list(range(2 * PAGE)) and not model.canFetchMore()
+    assert threads and threading.main_thread() not in threads
+
+
+def test_failed_page_stops_paging_and_reports(app):
+    calls, errors = [], []
+
+    def loader(token):
+        calls.append(token)
+        raise RuntimeError("数据库不可达")
+
+    model = ColumnTableModel([Column("id", "ID")], page_loader=loader)
+    model.load_failed.connect(errors.append)
+    model.reload()
+    _wait(model)
+    assert errors == ["数据库不可达"]
+    assert not model.canFetchMore()
+    model.fetchMore()
+    assert calls == [None] and not model.is_loading()
+
+
+def test_reload_discards_pages_of_the_previous_load(app):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader(token):
+        calls.append(token)
+        if len(calls) == 1:   # 第一次加载在后台卡住，期间列表被重新加载
+            started.set()
+            release.wait(5)
+            return [{"id": "stale"}], False, None
+        return [{"id": "fresh"}], False, None
+
+    model = ColumnTableModel([Column("id", "ID")], page_loader=loader)
+    model.reload()
+    assert started.wait(5)
+    model.reload()
+    _wait(model)
+    release.set()
+    time.sleep(0.05)
+    QApplication.processEvents()
+    assert _ids(model) == ["fresh"]